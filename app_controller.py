@@ -5,7 +5,8 @@ This controller implements the unified interface with navigation capabilities.
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import queue
 import sys
 import os
 
@@ -16,6 +17,22 @@ sys.path.insert(0, current_dir)
 from views import MainView
 from controllers import ContactController
 from project_controller import ProjectController
+from backup import BackupManager
+from autocomplete import CustomerNameIndex
+from replica import ReadReplica, replica_enabled
+from schema import ContactSchema
+from reports import ReportRunner, weekly_jobs
+from write_behind import WriteBehindQueue, write_behind_enabled
+from profiler import ActionProfiler, SamplingProfiler, profile_actions_from_env, sampling_enabled
+from stall_watchdog import StallWatchdog, watchdog_enabled
+from memory_diagnostics import MemoryTracker, memory_diagnostics_enabled
+
+
+# Seconds to wait for queued writes when the window is closed
+CLOSE_FLUSH_TIMEOUT = 10.0
+
+# Key profiling the next user actions
+PROFILE_HOTKEY = "<Control-P>"  # Ctrl+Shift+P
 
 
 class AppController:
@@ -23,8 +40,23 @@ class AppController:
     
     def __init__(self):
         """Initialize the main application controller."""
+        # Optional profiling of user actions; the actions are wrapped before
+        # the views bind them as callbacks
+        self.profiler = ActionProfiler(on_saved=self._on_profile_saved)
+        self.profiler.instrument(AppController, ['show_contacts', 'show_projects', 'start_backup',
+                                                 'start_reports'])
+        self.profiler.instrument(ContactController, ['refresh_contacts', 'show_add_form', 'show_edit_form',
+                                                     'save_contact', 'delete_contacts'])
+        self.profiler.instrument(ProjectController, ['refresh_projects', 'show_timeline', 'load_timeline_range',
+                                                     'show_add_form', 'show_edit_form', 'save_project',
+                                                     'delete_projects', 'update_projects', 'archive_projects'])
+        self.profiler.arm(profile_actions_from_env())
+        self.sampler = SamplingProfiler() if sampling_enabled() else None
+        if self.sampler:
+            self.sampler.start()
+        
         # Initialize main view
-        self.main_view = MainView("Architecture Project Manager")
+        self.main_view = MainView("Architecture Project Manager", on_close=self._on_closing)
         self.root = self.main_view.get_root()
         
         # Create main container frame
@@ -40,13 +72,71 @@ class AppController:
         # Create navigation frame
         self._create_navigation()
         
-        # Initialize controllers
+        # Create application status bar
+        self._create_status_bar()
+        self.root.bind_all(PROFILE_HOTKEY, lambda event: self.start_profiling())
+        
+        # Optional logging of event loop stalls (frozen window)
+        self.watchdog = StallWatchdog(self.root) if watchdog_enabled() else None
+        if self.watchdog:
+            self.watchdog.start()
+        
+        # Online backups run on a background thread; their progress is handed
+        # to the Tk thread through a queue
+        self.backup_events: queue.Queue = queue.Queue()
+        self.backup_manager = BackupManager(
+            on_progress=lambda copied, total: self.backup_events.put(('progress', copied, total)),
+            on_complete=lambda success, message: self.backup_events.put(('complete', success, message))
+        )
+        self.backup_manager.schedule()
+        self._poll_backup_events()
+        
+        # Reports are built in worker processes; their completion is handed to
+        # the Tk thread through a queue
+        self.report_events: queue.Queue = queue.Queue()
+        self.report_runner = ReportRunner()
+        self.reports_pending = 0
+        self.reports_dir = ""
+        self._poll_report_events()
+        
+        # Customer name autocomplete index, kept up to date by the contact controller
+        self.customer_index = CustomerNameIndex()
+        
+        # Optional in-memory read replica (reads served from memory, writes to the file)
+        self.replica = ReadReplica() if replica_enabled() else None
+        
+        # Optional write-behind queue (edits are saved in groups on a background
+        # thread); failed writes are handed to the Tk thread through a queue
+        self.write_events: queue.Queue = queue.Queue()
+        self.write_behind = None
+        if write_behind_enabled():
+            self.write_behind = WriteBehindQueue(
+                on_error=lambda description, message: self.write_events.put((description, message)),
+                on_commit=self._on_writes_committed
+            )
+            self._poll_write_events()
+        
+        # Initialize controllers (each module's frame and controller are
+        # created the first time its view is shown)
         self.contact_controller = None
         self.project_controller = None
+        self.contact_frame = None
+        self.project_frame = None
         self.current_view = None
         
+        # Optional report of memory growth per tab switch
+        self.memory_tracker = MemoryTracker(self.root) if memory_diagnostics_enabled() else None
+        
         # Start with contacts view
         self.show_contacts()
+        if self.memory_tracker:
+            self.memory_tracker.start()
+        
+        # Build the autocomplete index and the read replica in the background
+        # (after the contact model has brought the database schema up to date)
+        self.customer_index.load_async()
+        if self.replica:
+            self.replica.load_async()
     
     def _create_navigation(self) -> None:
         """Create the navigation bar with tabs/buttons."""
@@ -77,14 +167,173 @@ class AppController:
                                       command=self.show_projects, width=20)
         self.projects_btn.pack(side=tk.LEFT, padx=5)
         
+        # Backup button
+        self.backup_btn = ttk.Button(button_frame, text="גיבוי (Backup)", 
+                                    command=self.start_backup, width=20)
+        self.backup_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Reports button
+        self.reports_btn = ttk.Button(button_frame, text="דוחות (Reports)", 
+                                     command=self.start_reports, width=20)
+        self.reports_btn.pack(side=tk.LEFT, padx=5)
+        
         # Separator
         separator = ttk.Separator(nav_frame, orient='horizontal')
         separator.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=10)
     
-    def _clear_main_container(self) -> None:
-        """Clear all widgets from the main container."""
-        for widget in self.main_container.winfo_children():
-            widget.destroy()
+    def _create_status_bar(self) -> None:
+        """Create the application-wide status bar at the bottom of the window."""
+        self.app_status_var = tk.StringVar(value="")
+        status_bar = ttk.Label(self.root, textvariable=self.app_status_var, 
+                              relief=tk.SUNKEN, anchor=tk.W, padding=(5, 2))
+        status_bar.grid(row=2, column=0, sticky=(tk.W, tk.E))
+        self.root.rowconfigure(2, weight=0)
+    
+    def start_backup(self) -> None:
+        """Start an online backup of the database."""
+        if self.backup_manager.start_backup():
+            self.backup_btn.configure(state='disabled')
+            self.app_status_var.set("Backup started...")
+        else:
+            self.app_status_var.set("A backup is already running")
+    
+    def _poll_backup_events(self) -> None:
+        """Apply backup progress/completion events on the Tk thread."""
+        try:
+            while True:
+                event = self.backup_events.get_nowait()
+                if event[0] == 'progress':
+                    _, copied, total = event
+                    percent = int(copied * 100 / total) if total else 100
+                    self.app_status_var.set(f"Backing up database... {percent}%")
+                else:
+                    _, success, message = event
+                    self.backup_btn.configure(state='normal')
+                    self.app_status_var.set(message)
+                    if not success:
+                        messagebox.showerror("Backup Error", message)
+        except queue.Empty:
+            pass
+        
+        self.root.after(200, self._poll_backup_events)
+    
+    def start_reports(self) -> None:
+        """Build the weekly reports into a chosen folder, in the background."""
+        output_dir = filedialog.askdirectory(title="Save reports to", parent=self.root)
+        if not output_dir:
+            return
+        
+        jobs = weekly_jobs(output_dir)
+        self.reports_pending = len(jobs)
+        self.reports_dir = output_dir
+        self.reports_btn.configure(state='disabled')
+        self.app_status_var.set(f"Building {len(jobs)} reports...")
+        for job in jobs:
+            self.report_runner.submit(
+                job, on_done=lambda job, success, message: self.report_events.put((success, message))
+            )
+    
+    def _poll_report_events(self) -> None:
+        """Apply report completion events on the Tk thread."""
+        try:
+            while True:
+                success, message = self.report_events.get_nowait()
+                self.reports_pending -= 1
+                if not success:
+                    messagebox.showerror("Report Error", message)
+                if self.reports_pending:
+                    self.app_status_var.set(f"Building reports... {self.reports_pending} left")
+                else:
+                    self.reports_btn.configure(state='normal')
+                    self.app_status_var.set(f"Reports finished ({self.reports_dir})")
+        except queue.Empty:
+            pass
+        
+        self.root.after(200, self._poll_report_events)
+    
+    def _on_writes_committed(self, writes) -> None:
+        """Update the customer name index once queued contact writes are saved (flush thread)."""
+        contact_writes = [write for write in writes if write.table == ContactSchema.TABLE_NAME]
+        if contact_writes:
+            self.customer_index.refresh([
+                self.write_behind.resolve_id(contact_id)
+                for write in contact_writes if write.action != 'create'
+                for contact_id in write.record_ids
+            ])
+    
+    def _poll_write_events(self) -> None:
+        """Report queued writes that failed, on the Tk thread."""
+        failed = False
+        try:
+            while True:
+                description, message = self.write_events.get_nowait()
+                failed = True
+                self.app_status_var.set(f"{description} failed")
+                messagebox.showerror("Save Error", f"{description} failed: {message}")
+        except queue.Empty:
+            pass
+        
+        # Show the lists without the changes that were not saved
+        if failed:
+            if self.current_view == 'contacts' and self.contact_controller:
+                self.contact_controller.refresh_contacts()
+            elif self.current_view == 'projects' and self.project_controller:
+                self.project_controller.refresh_projects()
+        
+        self.root.after(200, self._poll_write_events)
+    
+    def start_profiling(self) -> None:
+        """Profile the next user actions (see profiler.py)."""
+        self.profiler.arm()
+        self.app_status_var.set(f"Profiling the next {self.profiler.remaining} actions "
+                                f"(saved in {self.profiler.output_dir}/)")
+    
+    def _on_profile_saved(self, action: str, path: str, seconds: float) -> None:
+        """Show where the profile of an action was saved."""
+        self.app_status_var.set(f"{action} took {seconds * 1000:.0f} ms; profile saved to {path}")
+    
+    def _on_closing(self) -> bool:
+        """
+        Stop report workers, save queued writes and write the sampling profile,
+        stall report and memory report before the window closes.
+        
+        Returns:
+            False to keep the window open
+        """
+        self.report_runner.shutdown(wait=False)
+        if not self._save_queued_writes():
+            return False
+        if self.sampler:
+            path = self.sampler.stop()
+            if path:
+                print(f"Sampling profile saved to {path}")
+        if self.watchdog:
+            path = self.watchdog.stop()
+            if path:
+                print(f"Stall report saved to {path}")
+        if self.memory_tracker:
+            path = self.memory_tracker.stop()
+            if path:
+                print(f"Memory report saved to {path}")
+        return True
+    
+    def _save_queued_writes(self) -> bool:
+        """
+        Wait for the write-behind queue to save queued writes.
+        
+        Returns:
+            False if writes are still queued and the user chose not to close
+        """
+        if not self.write_behind:
+            return True
+        if self.write_behind.flush(timeout=CLOSE_FLUSH_TIMEOUT):
+            self.write_behind.close()
+            return True
+        count = self.write_behind.pending_count()
+        return messagebox.askyesno(
+            "Unsaved Changes",
+            f"{count} change{'s' if count != 1 else ''} could not be saved yet. Close anyway?"
+        )
     
     def _update_button_states(self, active_view: str) -> None:
         """
@@ -103,66 +352,50 @@ class AppController:
     def show_contacts(self) -> None:
         """Show the contacts management view."""
         try:
-            # Clear current view
-            self._clear_main_container()
-            
             # Close any open project forms
             if self.project_controller and self.project_controller.form_view:
                 self.project_controller.form_view.close()
                 self.project_controller.form_view = None
+            if self.project_controller and self.project_controller.timeline_view:
+                if self.project_controller.timeline_view.is_open():
+                    self.project_controller.timeline_view.close()
+                self.project_controller.timeline_view = None
+            
+            # The views of both modules are created once and then only hidden
+            # and shown, so switching tabs creates no widgets
+            if self.project_frame:
+                self.project_frame.grid_remove()
             
-            # Initialize contact controller if needed
             if not self.contact_controller:
-                # Create a temporary frame for the contact view
-                contact_frame = ttk.Frame(self.main_container)
-                contact_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-                contact_frame.columnconfigure(0, weight=1)
-                contact_frame.rowconfigure(0, weight=1)
-                
-                # Initialize contact controller with the frame as parent
-                self.contact_controller = ContactController()
+                self.contact_frame = self._create_module_frame()
                 
-                # Replace the contact controller's main view with our frame
-                self.contact_controller.main_view.root.withdraw()  # Hide original window
-                
-                # Update the contact controller to use the main app window for forms
-                self.contact_controller.main_view.root = self.root
-                
-                # Recreate the contact list view in our frame
-                from views import ContactListView
-                self.contact_controller.list_view = ContactListView(
-                    parent=contact_frame,
-                    on_add=self.contact_controller.show_add_form,
-                    on_edit=self.contact_controller.show_edit_form,
-                    on_delete=self.contact_controller.delete_contact,
-                    on_refresh=self.contact_controller.refresh_contacts
+                self.contact_controller = ContactController(
+                    on_contacts_changed=self.customer_index.refresh,
+                    replica=self.replica,
+                    write_behind=self.write_behind
                 )
                 
-                # Load initial data
-                self.contact_controller.refresh_contacts()
-            else:
-                # Recreate the contact view in the main container
-                contact_frame = ttk.Frame(self.main_container)
-                contact_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-                contact_frame.columnconfigure(0, weight=1)
-                contact_frame.rowconfigure(0, weight=1)
-                
-                # Update the contact controller to use the main app window for forms
+                # The controller creates its own window and list view; forms
+                # use the main app window and the list lives in our frame
+                self.contact_controller.main_view.root.destroy()
                 self.contact_controller.main_view.root = self.root
                 
                 from views import ContactListView
                 self.contact_controller.list_view = ContactListView(
-                    parent=contact_frame,
+                    parent=self.contact_frame,
                     on_add=self.contact_controller.show_add_form,
                     on_edit=self.contact_controller.show_edit_form,
-                    on_delete=self.contact_controller.delete_contact,
+                    on_delete=self.contact_controller.delete_contacts,
                     on_refresh=self.contact_controller.refresh_contacts
                 )
-                
-                self.contact_controller.refresh_contacts()
+            else:
+                self.contact_frame.grid()
+            
+            self.contact_controller.refresh_contacts()
             
             self.current_view = 'contacts'
             self._update_button_states('contacts')
+            self._record_memory('contacts')
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load contacts view: {e}")
@@ -170,29 +403,43 @@ class AppController:
     def show_projects(self) -> None:
         """Show the projects management view."""
         try:
-            # Clear current view
-            self._clear_main_container()
-            
             # Close any open contact forms
             if self.contact_controller and self.contact_controller.form_view:
                 self.contact_controller.form_view.close()
                 self.contact_controller.form_view = None
             
-            # Create project frame
-            project_frame = ttk.Frame(self.main_container)
-            project_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-            project_frame.columnconfigure(0, weight=1)
-            project_frame.rowconfigure(0, weight=1)
+            if self.contact_frame:
+                self.contact_frame.grid_remove()
             
-            # Initialize project controller
-            self.project_controller = ProjectController(project_frame)
+            if not self.project_controller:
+                self.project_frame = self._create_module_frame()
+                # Loads the projects
+                self.project_controller = ProjectController(self.project_frame, customer_index=self.customer_index,
+                                                            replica=self.replica, write_behind=self.write_behind)
+            else:
+                self.project_frame.grid()
+                self.project_controller.refresh_projects()
             
             self.current_view = 'projects'
             self._update_button_states('projects')
+            self._record_memory('projects')
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load projects view: {e}")
     
+    def _create_module_frame(self) -> ttk.Frame:
+        """Create the frame holding one module's view in the main container."""
+        frame = ttk.Frame(self.main_container)
+        frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(0, weight=1)
+        return frame
+    
+    def _record_memory(self, label: str) -> None:
+        """Record memory use after a tab switch (in memory diagnostics mode)."""
+        if self.memory_tracker:
+            self.memory_tracker.record(label)
+    
     def run(self) -> None:
         """Start the main application."""
         self.main_view.run()
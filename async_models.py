@@ -0,0 +1,198 @@
+# File: async_models.py
+"""
+Asyncio facade over the Contact and Project models for scripts and services.
+Model calls are dispatched to dedicated database thread pools: reads go to a
+pool of reader threads (each call opens its own connection, so concurrent
+readers do not queue behind one another) and writes go to a single writer
+thread, so writers never contend for the SQLite write lock.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from models import ContactModel
+from project_model import ProjectModel
+
+
+# Default number of reader threads
+DEFAULT_READERS = 4
+
+# Default page size for async iteration
+DEFAULT_PAGE_SIZE = 1000
+
+
+class ModelExecutor:
+    """Reader and writer thread pools shared by the async models of one database."""
+    
+    def __init__(self, readers: int = DEFAULT_READERS):
+        """
+        Initialize the thread pools.
+        
+        Args:
+            readers: Number of reader threads
+        """
+        self.readers = readers
+        self._read_pool = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-reader")
+        self._write_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+    
+    async def read(self, func: Callable, *args, **kwargs):
+        """Run a read-only model call on a reader thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_pool, functools.partial(func, *args, **kwargs))
+    
+    async def write(self, func: Callable, *args, **kwargs):
+        """Run a model call that writes on the writer thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._write_pool, functools.partial(func, *args, **kwargs))
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the thread pools."""
+        self._read_pool.shutdown(wait=wait)
+        self._write_pool.shutdown(wait=wait)
+
+
+class AsyncContactModel:
+    """Async API for contacts (see ContactModel for the semantics of each call)."""
+    
+    def __init__(self, db_path: str = "contacts.db", executor: Optional[ModelExecutor] = None):
+        """
+        Initialize the async contact model.
+        
+        Args:
+            db_path: Path to SQLite database file
+            executor: Thread pools to use (a new ModelExecutor if omitted; pass
+                the same executor to the project model to share the writer)
+        """
+        self.model = ContactModel(db_path)
+        self.executor = executor or ModelExecutor()
+    
+    async def create_contact(self, contact_data: Dict[str, str]) -> Tuple[bool, str]:
+        return await self.executor.write(self.model.create_contact, contact_data)
+    
+    async def create_contacts(self, contacts: List[Dict[str, str]]) -> Tuple[bool, str]:
+        return await self.executor.write(self.model.create_contacts, contacts)
+    
+    async def get_all_contacts(self) -> List[Dict[str, str]]:
+        return await self.executor.read(self.model.get_all_contacts)
+    
+    async def get_contacts_page(self, after_id: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> List[Dict[str, str]]:
+        return await self.executor.read(self.model.get_contacts_page, after_id, limit)
+    
+    async def get_contact_by_id(self, contact_id: int) -> Optional[Dict[str, str]]:
+        return await self.executor.read(self.model.get_contact_by_id, contact_id)
+    
+    async def find_contacts_by_phone(self, phone: str) -> List[Dict[str, str]]:
+        return await self.executor.read(self.model.find_contacts_by_phone, phone)
+    
+    async def find_contacts_by_email(self, email: str) -> List[Dict[str, str]]:
+        return await self.executor.read(self.model.find_contacts_by_email, email)
+    
+    async def update_contact(self, contact_id: int, contact_data: Dict[str, str]) -> Tuple[bool, str]:
+        return await self.executor.write(self.model.update_contact, contact_id, contact_data)
+    
+    async def delete_contact(self, contact_id: int) -> Tuple[bool, str]:
+        return await self.executor.write(self.model.delete_contact, contact_id)
+    
+    async def delete_contacts(self, contact_ids: List[int]) -> Tuple[bool, str]:
+        return await self.executor.write(self.model.delete_contacts, contact_ids)
+    
+    async def iter_contacts(self, page_size: int = DEFAULT_PAGE_SIZE) -> AsyncIterator[Dict[str, str]]:
+        """
+        Iterate over all contacts in ID order, fetching one page at a time.
+        
+        Args:
+            page_size: Number of contacts fetched per query
+        """
+        after_id = 0
+        while True:
+            page = await self.get_contacts_page(after_id, page_size)
+            for contact in page:
+                yield contact
+            if len(page) < page_size:
+                return
+            after_id = int(page[-1]['id'])
+
+
+class AsyncProjectModel:
+    """Async API for projects (see ProjectModel for the semantics of each call)."""
+    
+    def __init__(self, db_path: str = "contacts.db", executor: Optional[ModelExecutor] = None,
+                 archive_db_path: Optional[str] = None):
+        """
+        Initialize the async project model.
+        
+        Args:
+            db_path: Path to SQLite database file
+            executor: Thread pools to use (a new ModelExecutor if omitted)
+            archive_db_path: Optional separate database file for archived projects
+        """
+        self.model = ProjectModel(db_path, archive_db_path=archive_db_path)
+        self.executor = executor or ModelExecutor()
+    
+    async def create_project(self, project_data: Dict[str, str]) -> Tuple[bool, str]:
+        return await self.executor.write(self.model.create_project, project_data)
+    
+    async def get_all_projects(self, include_archived: bool = False) -> List[Dict[str, str]]:
+        return await self.executor.read(self.model.get_all_projects, include_archived)
+    
+    async def get_projects_page(self, after_id: int = 0, limit: int = DEFAULT_PAGE_SIZE,
+                                state: Optional[str] = None) -> List[Dict[str, str]]:
+        return await self.executor.read(self.model.get_projects_page, after_id, limit, state)
+    
+    async def get_project_by_id(self, project_id: int) -> Optional[Dict[str, str]]:
+        return await self.executor.read(self.model.get_project_by_id, project_id)
+    
+    async def get_contact_with_projects(self, contact_id: int) -> Optional[Dict]:
+        return await self.executor.read(self.model.get_contact_with_projects, contact_id)
+    
+    async def get_project_consultants(self, project_id: int) -> List[Dict[str, str]]:
+        return await self.executor.read(self.model.get_project_consultants, project_id)
+    
+    async def get_projects_active_between(self, start_date: str, end_date: str) -> List[Dict[str, str]]:
+        return await self.executor.read(self.model.get_projects_active_between, start_date, end_date)
+    
+    async def get_projects_ending_within(self, days: int, from_date: Optional[str] = None) -> List[Dict[str, str]]:
+        return await self.executor.read(self.model.get_projects_ending_within, days, from_date)
+    
+    async def get_overdue_projects(self, as_of: Optional[str] = None) -> List[Dict[str, str]]:
+        return await self.executor.read(self.model.get_overdue_projects, as_of)
+    
+    async def update_project(self, project_id: int, project_data: Dict[str, str]) -> Tuple[bool, str]:
+        return await self.executor.write(self.model.update_project, project_id, project_data)
+    
+    async def update_projects(self, project_ids: List[int], changes: Dict[str, str]) -> Tuple[bool, str]:
+        return await self.executor.write(self.model.update_projects, project_ids, changes)
+    
+    async def set_project_consultants(self, project_id: int, contact_ids: List[int]) -> Tuple[bool, str]:
+        return await self.executor.write(self.model.set_project_consultants, project_id, contact_ids)
+    
+    async def delete_project(self, project_id: int) -> Tuple[bool, str]:
+        return await self.executor.write(self.model.delete_project, project_id)
+    
+    async def delete_projects(self, project_ids: List[int]) -> Tuple[bool, str]:
+        return await self.executor.write(self.model.delete_projects, project_ids)
+    
+    async def archive_finished_projects(self, max_age_days: Optional[int] = None) -> int:
+        return await self.executor.write(self.model.archive_finished_projects, max_age_days)
+    
+    async def restore_projects(self, project_ids: List[int]) -> Tuple[bool, str]:
+        return await self.executor.write(self.model.restore_projects, project_ids)
+    
+    async def iter_projects(self, page_size: int = DEFAULT_PAGE_SIZE,
+                            state: Optional[str] = None) -> AsyncIterator[Dict[str, str]]:
+        """
+        Iterate over all (non-archived) projects in ID order, fetching one page at a time.
+        
+        Args:
+            page_size: Number of projects fetched per query
+            state: Only iterate over projects in this state
+        """
+        after_id = 0
+        while True:
+            page = await self.get_projects_page(after_id, page_size, state)
+            for project in page:
+                yield project
+            if len(page) < page_size:
+                return
+            after_id = int(page[-1]['id'])
@@ -0,0 +1,257 @@
+# File: autocomplete.py
+"""
+Prefix index for customer-name autocomplete.
+Keeps contact and customer names in a sorted in-memory list searched with
+bisect, built once on a background thread and updated incrementally when
+contacts change.
+"""
+
+import bisect
+import heapq
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from schema import ContactSchema
+from project_schema import ProjectSchema
+
+
+# Maximum number of suggestions returned by a search
+DEFAULT_LIMIT = 10
+
+# Entries sorted per chunk when building; the chunks are merged afterwards so a
+# background build never holds the interpreter lock (and stalls the GUI) for long
+SORT_CHUNK_SIZE = 10000
+
+# Entries examined per search at most (names shared by many contacts are
+# collapsed into one suggestion, so a few more than the limit are scanned)
+SCAN_FACTOR = 5
+
+# A suggestion: (display name, contact ID or None for free-text customer names)
+Suggestion = Tuple[str, Optional[int]]
+
+# Entries are (key, display, contact_id) tuples; free-text names use contact_id 0
+# (contact IDs start at 1) so entries always compare and sort
+Entry = Tuple[str, str, int]
+
+
+class PrefixIndex:
+    """Sorted list of (key, display, contact_id) entries searched by key prefix."""
+    
+    def __init__(self):
+        """Initialize an empty index."""
+        # Keys and entries are parallel lists, swapped in together as one tuple
+        self._data: Tuple[List[str], List[Entry]] = ([], [])
+        # Guards incremental updates against concurrent searches
+        self._lock = threading.RLock()
+    
+    def __len__(self) -> int:
+        return len(self._data[0])
+    
+    def build(self, entries: List[Entry]) -> None:
+        """
+        Replace the index contents (sorting happens before the swap, so
+        searches keep using the old contents meanwhile).
+        
+        Args:
+            entries: List of (key, display, contact_id) tuples; keys must be normalized
+                and free-text names use contact_id 0
+        """
+        chunks = [sorted(entries[start:start + SORT_CHUNK_SIZE])
+                  for start in range(0, len(entries), SORT_CHUNK_SIZE)]
+        entries = list(heapq.merge(*chunks))
+        keys = [entry[0] for entry in entries]
+        with self._lock:
+            self._data = (keys, entries)
+    
+    def add(self, key: str, display: str, contact_id: int) -> None:
+        """Insert one entry, keeping the index sorted."""
+        with self._lock:
+            keys, entries = self._data
+            entry = (key, display, contact_id)
+            index = bisect.bisect_left(entries, entry)
+            if index < len(entries) and entries[index] == entry:
+                return
+            keys.insert(index, key)
+            entries.insert(index, entry)
+    
+    def remove(self, key: str, display: str, contact_id: int) -> None:
+        """Remove one entry if present."""
+        with self._lock:
+            keys, entries = self._data
+            entry = (key, display, contact_id)
+            index = bisect.bisect_left(entries, entry)
+            if index < len(entries) and entries[index] == entry:
+                del keys[index]
+                del entries[index]
+    
+    def search(self, text: str, limit: int = DEFAULT_LIMIT) -> List[Suggestion]:
+        """
+        Find the entries whose key starts with the normalized text.
+        
+        Args:
+            text: Text typed so far
+            limit: Maximum number of suggestions
+        
+        Returns:
+            List of (display, contact_id) suggestions, in key order, one per display name
+        """
+        prefix = ContactSchema.normalize_name(text)
+        if not prefix:
+            return []
+        
+        suggestions: List[Suggestion] = []
+        seen = set()
+        with self._lock:
+            keys, entries = self._data
+            start = bisect.bisect_left(keys, prefix)
+            for index in range(start, min(start + limit * SCAN_FACTOR, len(keys))):
+                if not keys[index].startswith(prefix):
+                    break
+                _, display, contact_id = entries[index]
+                if display in seen:
+                    continue
+                seen.add(display)
+                suggestions.append((display, contact_id or None))
+                if len(suggestions) == limit:
+                    break
+        return suggestions
+
+
+class CustomerNameIndex(PrefixIndex):
+    """
+    Prefix index of contact names and free-text project customer names.
+    
+    Each contact is indexed under "first last" and "last first", so typing
+    either name finds it. The index is loaded from the database on a
+    background thread; changes reported before loading finishes are applied
+    once it does.
+    """
+    
+    def __init__(self, db_path: str = "contacts.db"):
+        """
+        Initialize the index (call load or load_async to fill it).
+        
+        Args:
+            db_path: Path to SQLite database file
+        """
+        super().__init__()
+        self.db_path = db_path
+        self.ready = False
+        # Changes reported while loading (None: no refresh needed afterwards)
+        self._pending_ids: Optional[List[int]] = None
+        self._contact_entries: Dict[int, List[Entry]] = {}
+        self._max_contact_id = 0
+    
+    @staticmethod
+    def _contact_entries_for(contact_id: int, first_name: str,
+                             last_name: str) -> List[Entry]:
+        """Build the index entries of one contact."""
+        first_name = " ".join((first_name or '').split())
+        last_name = " ".join((last_name or '').split())
+        display = f"{first_name} {last_name}".strip()
+        keys = {ContactSchema.normalize_name(display),
+                ContactSchema.normalize_name(f"{last_name} {first_name}")}
+        return [(key, display, contact_id) for key in keys if key]
+    
+    def load(self) -> None:
+        """Load all contacts and unlinked customer names (blocking)."""
+        entries = []
+        contact_entries = {}
+        max_contact_id = 0
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                for contact_id, first_name, last_name in conn.execute(
+                        f"SELECT id, first_name, last_name FROM {ContactSchema.TABLE_NAME}"):
+                    own = self._contact_entries_for(contact_id, first_name, last_name)
+                    contact_entries[contact_id] = own
+                    entries.extend(own)
+                    max_contact_id = max(max_contact_id, contact_id)
+                
+                for (customer_name,) in conn.execute(
+                        f"SELECT DISTINCT customer_name FROM {ProjectSchema.TABLE_NAME} "
+                        f"WHERE customer_id IS NULL"):
+                    key = ContactSchema.normalize_name(customer_name)
+                    if key:
+                        entries.append((key, " ".join(customer_name.split()), 0))
+        except sqlite3.Error as e:
+            print(f"Error loading customer names: {e}")
+        
+        self.build(entries)
+        with self._lock:
+            self._contact_entries = contact_entries
+            self._max_contact_id = max_contact_id
+            self.ready = True
+            pending, self._pending_ids = self._pending_ids, None
+        if pending is not None:
+            self.refresh(pending)
+    
+    def load_async(self, on_ready: Optional[Callable[[], None]] = None) -> threading.Thread:
+        """
+        Load the index on a background thread.
+        
+        Args:
+            on_ready: Called (on the loading thread) when the index is ready
+        
+        Returns:
+            The loading thread
+        """
+        def run():
+            self.load()
+            if on_ready:
+                on_ready()
+        
+        thread = threading.Thread(target=run, name="customer-name-index", daemon=True)
+        thread.start()
+        return thread
+    
+    def refresh(self, contact_ids: Optional[List[int]] = None) -> None:
+        """
+        Update the index after contacts changed.
+        
+        Re-reads the given contacts (removing deleted ones) and adds contacts
+        created since the index was loaded.
+        
+        Args:
+            contact_ids: IDs of updated or deleted contacts
+        """
+        contact_ids = list(contact_ids or [])
+        with self._lock:
+            if not self.ready:
+                self._pending_ids = (self._pending_ids or []) + contact_ids
+                return
+        
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = []
+                if contact_ids:
+                    placeholders = ", ".join("?" * len(contact_ids))
+                    rows = conn.execute(
+                        f"SELECT id, first_name, last_name FROM {ContactSchema.TABLE_NAME} "
+                        f"WHERE id IN ({placeholders})", contact_ids
+                    ).fetchall()
+                rows += conn.execute(
+                    f"SELECT id, first_name, last_name FROM {ContactSchema.TABLE_NAME} WHERE id > ?",
+                    (self._max_contact_id,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Error refreshing customer names: {e}")
+            return
+        
+        with self._lock:
+            for contact_id in contact_ids:
+                for entry in self._contact_entries.pop(contact_id, []):
+                    self.remove(*entry)
+            for contact_id, first_name, last_name in rows:
+                for entry in self._contact_entries.pop(contact_id, []):
+                    self.remove(*entry)
+                own = self._contact_entries_for(contact_id, first_name, last_name)
+                self._contact_entries[contact_id] = own
+                for entry in own:
+                    self.add(*entry)
+                self._max_contact_id = max(self._max_contact_id, contact_id)
+    
+    def add_customer_name(self, customer_name: str) -> None:
+        """Add a free-text customer name (e.g. from a saved project)."""
+        key = ContactSchema.normalize_name(customer_name)
+        if key:
+            self.add(key, " ".join(customer_name.split()), 0)
@@ -0,0 +1,251 @@
+# File: backup.py
+"""
+Online backup for the Architecture Project Manager database.
+Copies the live database with the SQLite backup API in small page steps on a
+background thread, verifies each copy and keeps a fixed number of generations.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+
+# Defaults for backup location, retention and scheduling
+DEFAULT_BACKUP_DIR = "backups"
+DEFAULT_GENERATIONS = 7
+DEFAULT_INTERVAL_HOURS = 24
+
+# Pages copied per step; the source is unlocked between steps so other
+# connections (the UI, other writers) keep working during a large backup
+PAGES_PER_STEP = 256
+STEP_PAUSE_SECONDS = 0.005
+
+# A write from another connection restarts an incremental backup from the
+# first page. After this many restarts the copy is finished in a single step
+# (holding the read lock for the whole copy) so busy databases still get backed up
+MAX_RESTARTS = 3
+
+
+class _BackupRestarted(Exception):
+    """Raised from the progress callback to abandon a repeatedly restarted backup."""
+
+
+class BackupManager:
+    """Runs verified online backups of a SQLite database in the background."""
+    
+    def __init__(self, db_path: str = "contacts.db", backup_dir: str = DEFAULT_BACKUP_DIR,
+                 generations: int = DEFAULT_GENERATIONS,
+                 on_progress: Optional[Callable[[int, int], None]] = None,
+                 on_complete: Optional[Callable[[bool, str], None]] = None):
+        """
+        Initialize the backup manager.
+        
+        Args:
+            db_path: Path to the live SQLite database file
+            backup_dir: Directory receiving the backup files
+            generations: Number of backup files to keep (oldest are deleted)
+            on_progress: Called with (pages_copied, total_pages) after each step
+            on_complete: Called with (success, message) when a backup finishes
+        
+        Callbacks run on the backup thread; GUI code must hand them over to
+        the Tk thread (see AppController).
+        """
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.generations = generations
+        self.on_progress = on_progress
+        self.on_complete = on_complete
+        
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._timer: Optional[threading.Timer] = None
+        self._interval_seconds: Optional[float] = None
+        self._restarts = 0
+        self._last_copied = 0
+    
+    def is_running(self) -> bool:
+        """Check whether a backup is currently in progress."""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start_backup(self) -> bool:
+        """
+        Start a backup on a background thread.
+        
+        Returns:
+            False if a backup is already running, True otherwise
+        """
+        with self._lock:
+            if self.is_running():
+                return False
+            self._thread = threading.Thread(target=self._run_backup, name="db-backup", daemon=True)
+            self._thread.start()
+            return True
+    
+    def backup_now(self) -> Tuple[bool, str]:
+        """
+        Run a backup synchronously on the calling thread.
+        
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        os.makedirs(self.backup_dir, exist_ok=True)
+        base_name = os.path.splitext(os.path.basename(self.db_path))[0]
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        backup_path = os.path.join(self.backup_dir, f"{base_name}-{timestamp}.db")
+        partial_path = backup_path + ".partial"
+        
+        try:
+            source = sqlite3.connect(self.db_path)
+            target = sqlite3.connect(partial_path)
+            try:
+                self._restarts = 0
+                self._last_copied = 0
+                try:
+                    source.backup(target, pages=PAGES_PER_STEP, progress=self._report_progress,
+                                  sleep=STEP_PAUSE_SECONDS)
+                except _BackupRestarted:
+                    source.backup(target, pages=-1, progress=self._report_progress)
+            finally:
+                target.close()
+                source.close()
+            
+            ok, message = self.verify(partial_path)
+            if not ok:
+                os.remove(partial_path)
+                return False, f"Backup verification failed: {message}"
+            
+            os.replace(partial_path, backup_path)
+            self._apply_retention()
+            return True, f"Backup saved to {backup_path}"
+        
+        except (sqlite3.Error, OSError) as e:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            return False, f"Backup failed: {e}"
+    
+    @staticmethod
+    def verify(backup_path: str) -> Tuple[bool, str]:
+        """
+        Run an integrity check on a backup file.
+        
+        Args:
+            backup_path: Path to the backup database
+        
+        Returns:
+            Tuple of (ok: bool, message: str)
+        """
+        try:
+            conn = sqlite3.connect(backup_path)
+            try:
+                results = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            return False, str(e)
+        
+        if results == ['ok']:
+            return True, "ok"
+        return False, "; ".join(results[:5])
+    
+    def list_backups(self) -> List[str]:
+        """
+        List the completed backup files, oldest first.
+        
+        Returns:
+            List of backup file paths
+        """
+        if not os.path.isdir(self.backup_dir):
+            return []
+        base_name = os.path.splitext(os.path.basename(self.db_path))[0]
+        names = sorted(name for name in os.listdir(self.backup_dir)
+                       if name.startswith(f"{base_name}-") and name.endswith(".db"))
+        return [os.path.join(self.backup_dir, name) for name in names]
+    
+    def schedule(self, interval_hours: float = DEFAULT_INTERVAL_HOURS) -> None:
+        """
+        Run a backup every interval_hours until stop() is called.
+        
+        The interval is counted from the newest backup file, not from this
+        call, so sessions shorter than the interval still get backed up: a
+        backup is started at once when the newest one is already older than
+        the interval (or there is none).
+        
+        Args:
+            interval_hours: Hours between backups
+        """
+        self.stop()
+        self._interval_seconds = interval_hours * 3600
+        self._schedule_next(self._seconds_until_due())
+    
+    def stop(self) -> None:
+        """Cancel scheduled backups (a backup already running is left to finish)."""
+        self._interval_seconds = None
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+    
+    def last_backup_time(self) -> Optional[float]:
+        """
+        Get the time the newest backup was written.
+        
+        Returns:
+            Modification time (seconds since the epoch), or None if there are no backups
+        """
+        backups = self.list_backups()
+        try:
+            return os.path.getmtime(backups[-1]) if backups else None
+        except OSError:
+            return None
+    
+    def _seconds_until_due(self) -> float:
+        """Seconds until the next scheduled backup is due (0 when it is overdue)."""
+        last = self.last_backup_time()
+        if last is None:
+            return 0.0
+        return max(0.0, self._interval_seconds - (time.time() - last))
+    
+    def _schedule_next(self, delay: Optional[float] = None) -> None:
+        """Arm the timer for the next scheduled backup (a full interval away by default)."""
+        if self._interval_seconds is None:
+            return
+        self._timer = threading.Timer(self._interval_seconds if delay is None else delay,
+                                      self._run_scheduled)
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def _run_scheduled(self) -> None:
+        """Timer callback: start a backup and schedule the next one."""
+        self.start_backup()
+        self._schedule_next()
+    
+    def _run_backup(self) -> None:
+        """Background thread body."""
+        success, message = self.backup_now()
+        if self.on_complete:
+            self.on_complete(success, message)
+    
+    def _report_progress(self, status: int, remaining: int, total: int) -> None:
+        """sqlite3 backup progress callback."""
+        copied = total - remaining
+        if copied < self._last_copied and remaining:
+            # Source changed under us and the copy started over
+            self._restarts += 1
+            if self._restarts > MAX_RESTARTS:
+                self._last_copied = 0
+                raise _BackupRestarted()
+        self._last_copied = copied
+        
+        if self.on_progress:
+            self.on_progress(copied, total)
+    
+    def _apply_retention(self) -> None:
+        """Delete the oldest backups beyond the configured number of generations."""
+        backups = self.list_backups()
+        for path in backups[:max(0, len(backups) - self.generations)]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Error removing old backup {path}: {e}")
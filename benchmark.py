@@ -0,0 +1,846 @@
+# File: benchmark.py
+"""
+Performance benchmarks for the Architecture Project Manager.
+Run `python benchmark.py <benchmark> --help` for the options of each benchmark.
+"""
+
+import argparse
+import asyncio
+import http.client
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+from urllib.parse import quote, urlsplit
+
+from async_models import AsyncContactModel, ModelExecutor
+from connection_pool import ConnectionPool
+from gazetteer import bounding_box, get_gazetteer
+from intervals import WEEK_DAYS
+from models import ContactModel
+from migrations import MigrationRunner, drop_column
+from performance import DEFAULT_PROFILE_NAME, PROFILES, connect
+from project_model import ProjectModel
+from project_schema import ProjectSchema
+from replica import ReadReplica
+from schema import ContactSchema
+from server import ApiServer
+from shards import ShardSet, ShardedContactModel, ShardedProjectModel
+from write_behind import WriteBehindQueue
+
+
+# A profile must beat the default by this fraction of its total time to be recommended
+RECOMMEND_MARGIN = 0.10
+
+# Projects table of schema version 6, which stored state labels
+LEGACY_PROJECTS_TABLE_SQL = (
+    "CREATE TABLE projects (id INTEGER PRIMARY KEY AUTOINCREMENT, customer_name TEXT NOT NULL, "
+    "location TEXT, start_date TEXT, end_date TEXT, is_active BOOLEAN, state TEXT, "
+    "customer_id INTEGER REFERENCES contacts(id) ON DELETE SET NULL, start_day INTEGER, end_day INTEGER)"
+)
+
+
+def create_sample_database(db_path: str, contact_count: int, project_count: int = 0) -> None:
+    """
+    Fill a database with generated contacts and projects.
+    
+    Args:
+        db_path: Path to the SQLite database file
+        contact_count: Number of contacts to create
+        project_count: Number of projects to create
+    """
+    model = ContactModel(db_path, profile="bulk-import")
+    batch = []
+    for index in range(contact_count):
+        batch.append(_sample_contact(index))
+        if len(batch) == 10000:
+            model.create_contacts(batch)
+            batch = []
+    if batch:
+        model.create_contacts(batch)
+    
+    project_model = ProjectModel(db_path, profile="bulk-import")
+    rng = random.Random(0)
+    first_day = date.today() - timedelta(days=5 * 365)
+    for index in range(project_count):
+        start = first_day + timedelta(days=rng.randrange(6 * 365))
+        project_model.create_project({
+            'customer_name': f"First{index % max(contact_count, 1)} Last{index % 5000}",
+            'location': f"Site {index}",
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=rng.randrange(30, 400))).isoformat(),
+            'is_active': 'כן',
+            'state': rng.choice(ProjectSchema.STATE_OPTIONS)
+        })
+
+
+def _sample_contact(index: int) -> Dict[str, str]:
+    """Generated contact number `index`."""
+    return {
+        'first_name': f"First{index}",
+        'last_name': f"Last{index % 5000}",
+        'phone': f"05{index % 10}-{index:07d}",
+        'email': f"contact{index}@example.com",
+        'address': f"{index} Sample Street"
+    }
+
+
+async def _run_async_reads(db_path: str, readers: int, operations: int, contact_count: int) -> float:
+    """Run concurrent contact lookups; returns operations per second."""
+    executor = ModelExecutor(readers=readers)
+    model = AsyncContactModel(db_path, executor=executor)
+    rng = random.Random(readers)
+    
+    async def lookup() -> None:
+        index = rng.randrange(contact_count)
+        await model.find_contacts_by_phone(f"05{index % 10}-{index:07d}")
+        await model.get_contact_by_id(index + 1)
+    
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(lookup() for _ in range(operations)))
+        elapsed = time.perf_counter() - started
+    finally:
+        executor.shutdown()
+    return operations * 2 / elapsed
+
+
+def benchmark_async_reads(args: argparse.Namespace) -> None:
+    """Measure concurrent-read throughput of the async models for several reader counts."""
+    db_path = args.db
+    if not db_path:
+        db_path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+        print(f"Creating {args.contacts} sample contacts in {db_path}")
+        create_sample_database(db_path, args.contacts)
+        contact_count = args.contacts
+    else:
+        with sqlite3.connect(db_path) as conn:
+            contact_count = conn.execute("SELECT COALESCE(MAX(id), 0) FROM contacts").fetchone()[0]
+    
+    print(f"{'readers':>8} {'reads/s':>10} {'speedup':>8}")
+    baseline = None
+    for readers in args.readers:
+        throughput = asyncio.run(_run_async_reads(db_path, readers, args.operations, contact_count))
+        baseline = baseline or throughput
+        print(f"{readers:>8} {throughput:>10.0f} {throughput / baseline:>7.2f}x")
+
+
+def _http_client(host: str, port: int, requests: int, contact_count: int, conditional: bool,
+                 seed: int, latencies: List[float], errors: List[str]) -> None:
+    """Send a mix of read requests over one keep-alive connection, recording latencies."""
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    etags = {}
+    for _ in range(requests):
+        index = rng.randrange(contact_count)
+        path = rng.choice([
+            f"/contacts/{index + 1}",
+            f"/contacts?after_id={index}&limit=50",
+            f"/contacts?phone={quote(f'05{index % 10}-{index:07d}')}",
+            f"/contacts/search?q=Last{index % 5000}&limit=20",
+            "/projects?limit=100",
+        ])
+        headers = {'If-None-Match': etags[path]} if conditional and path in etags else {}
+        started = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(f"{path}: {e}")
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - started)
+        if response.status >= 400:
+            errors.append(f"{path}: HTTP {response.status}")
+        elif response.getheader('ETag'):
+            etags[path] = response.getheader('ETag')
+    conn.close()
+
+
+def benchmark_http_load(args: argparse.Namespace) -> None:
+    """Measure requests/sec and latency of the HTTP service under concurrent clients."""
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+        contact_count = args.contacts
+    else:
+        db_path = args.db
+        if not db_path:
+            db_path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+            print(f"Creating {args.contacts} sample contacts in {db_path}")
+            create_sample_database(db_path, args.contacts)
+        server = ApiServer(("127.0.0.1", 0), db_path)
+        host, port = server.server_address
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        with sqlite3.connect(db_path) as conn:
+            contact_count = conn.execute("SELECT COALESCE(MAX(id), 0) FROM contacts").fetchone()[0]
+        print(f"Serving {db_path} in-process (clients and server share one interpreter; "
+              f"use --url against `python server.py` for separate processes)")
+    
+    try:
+        print(f"{'clients':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for clients in args.clients:
+            latencies: List[float] = []
+            errors: List[str] = []
+            threads = [threading.Thread(target=_http_client,
+                                        args=(host, port, args.requests, max(contact_count, 1),
+                                              args.conditional, seed, latencies, errors))
+                       for seed in range(clients)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            
+            if len(latencies) >= 2:
+                cuts = statistics.quantiles(latencies, n=100)
+                p50, p95, p99 = (cuts[49] * 1000, cuts[94] * 1000, cuts[98] * 1000)
+            else:
+                p50 = p95 = p99 = float('nan')
+            print(f"{clients:>8} {len(latencies) / elapsed:>8.0f} {p50:>8.1f} {p95:>8.1f} "
+                  f"{p99:>8.1f} {len(errors):>7}")
+            for error in errors[:3]:
+                print(f"    {error}")
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+
+
+def _copy_database(source_path: str, target_path: str, profile: str) -> int:
+    """
+    Copy a database with the page size of a profile.
+    
+    Returns:
+        Page size of the copy (unchanged from the source if it uses WAL)
+    """
+    source = sqlite3.connect(source_path)
+    target = connect(target_path, profile)
+    try:
+        source.backup(target)
+        # The backup takes the source page size; VACUUM rebuilds with the profile's
+        target.execute(f"PRAGMA page_size = {PROFILES[profile].page_size}")
+        target.execute("VACUUM")
+        return target.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        target.close()
+        source.close()
+
+
+def _run_workload(db_path: str, profile: str, seed: int = 0) -> Dict[str, float]:
+    """
+    Run the application's typical operations through the models.
+    
+    Returns:
+        Seconds taken per workload step
+    """
+    contacts = ContactModel(db_path, profile=profile)
+    projects = ProjectModel(db_path, profile=profile)
+    with sqlite3.connect(db_path) as conn:
+        contact_ids = [row[0] for row in conn.execute("SELECT id FROM contacts ORDER BY id")]
+    rng = random.Random(seed)
+    today = date.today()
+    timings = {}
+    
+    def step(name, func, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        timings[name] = time.perf_counter() - started
+    
+    step("list contacts", contacts.get_all_contacts, 3)
+    step("list projects", projects.get_all_projects, 3)
+    if contact_ids:
+        step("lookups", lambda: (contacts.get_contact_by_id(rng.choice(contact_ids)),
+                                 contacts.find_contacts_by_phone(f"05{rng.randrange(10)}-{rng.randrange(10 ** 6):07d}")),
+             300)
+    
+    def date_query():
+        start = today + timedelta(days=rng.randrange(-1500, 300))
+        projects.get_projects_active_between(start.isoformat(), (start + timedelta(days=30)).isoformat())
+    step("date queries", date_query, 50)
+    
+    if contact_ids:
+        def edit():
+            contact_id = rng.choice(contact_ids)
+            contact = contacts.get_contact_by_id(contact_id)
+            contact['address'] = f"{rng.randrange(1000)} Edited Street"
+            contacts.update_contact(contact_id, contact)
+        step("single edits", edit, 100)
+    
+    base = 10 ** 7 + seed * 10 ** 5
+    step("import 5000", lambda: contacts.create_contacts([_sample_contact(base + index)
+                                                           for index in range(5000)]), 1)
+    return timings
+
+
+def benchmark_profiles(args: argparse.Namespace) -> None:
+    """Run the application workload under each performance profile and recommend one."""
+    source_path = args.db
+    work_dir = tempfile.mkdtemp()
+    if not source_path:
+        source_path = os.path.join(work_dir, "sample.db")
+        print(f"Creating {args.contacts} sample contacts and {args.projects} projects in {source_path}")
+        create_sample_database(source_path, args.contacts, args.projects)
+    
+    results = {}
+    for name in args.profiles:
+        totals: Dict[str, float] = {}
+        for run in range(args.runs):
+            # A fresh copy per run, so edits and imports start from the same data
+            copy_path = os.path.join(work_dir, f"{name}-{run}.db")
+            page_size = _copy_database(source_path, copy_path, name)
+            for step_name, seconds in _run_workload(copy_path, name, seed=run).items():
+                totals[step_name] = totals.get(step_name, 0) + seconds / args.runs
+            os.remove(copy_path)
+        results[name] = totals
+        print(f"{name} (page size {page_size}):")
+        for step_name, seconds in totals.items():
+            print(f"    {step_name:<14} {seconds * 1000:>9.1f} ms")
+        print(f"    {'total':<14} {sum(totals.values()) * 1000:>9.1f} ms")
+    
+    # Profiles that skip fsync are only suitable for one-off imports
+    safe = [name for name in results if PROFILES[name].synchronous != "OFF"]
+    if safe:
+        best = min(safe, key=lambda name: sum(results[name].values()))
+        # Differences within measurement noise do not justify leaving the default
+        default = DEFAULT_PROFILE_NAME
+        if (default in safe and best != default and
+                sum(results[best].values()) > sum(results[default].values()) * (1 - RECOMMEND_MARGIN)):
+            best = default
+        print(f"Recommended profile: {best} (set APM_DB_PROFILE={best})")
+    for name in results:
+        if name not in safe:
+            print(f"{name} is not crash-safe; use it only for one-off imports")
+    print("Results on a local copy include the OS file cache; "
+          "run with --db on the shared drive to compare network profiles fairly.")
+
+
+def benchmark_replica(args: argparse.Namespace) -> None:
+    """Compare list loads from the database file with loads from the in-memory read replica."""
+    db_path = args.db
+    if not db_path:
+        db_path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+        print(f"Creating {args.contacts} sample contacts and {args.projects} projects in {db_path}")
+        create_sample_database(db_path, args.contacts, args.projects)
+    
+    replica = ReadReplica(db_path)
+    started = time.perf_counter()
+    replica.load()
+    print(f"Replica loaded in {(time.perf_counter() - started) * 1000:.0f} ms")
+    
+    print(f"{'source':>8} {'contacts ms':>12} {'projects ms':>12}")
+    try:
+        for source, model_replica in (("file", None), ("memory", replica)):
+            contacts = ContactModel(db_path, replica=model_replica)
+            projects = ProjectModel(db_path, replica=model_replica)
+            timings = []
+            for load in (contacts.get_all_contacts, projects.get_all_projects):
+                started = time.perf_counter()
+                for _ in range(args.repeat):
+                    load()
+                timings.append((time.perf_counter() - started) / args.repeat * 1000)
+            print(f"{source:>8} {timings[0]:>12.1f} {timings[1]:>12.1f}")
+    finally:
+        replica.close()
+
+
+def benchmark_write_behind(args: argparse.Namespace) -> None:
+    """Compare a data-entry burst written directly with the same burst through the write-behind queue."""
+    directory = tempfile.mkdtemp()
+    source_path = args.db
+    if not source_path:
+        source_path = os.path.join(directory, "source.db")
+        print(f"Creating {args.contacts} sample contacts in {source_path}")
+        create_sample_database(source_path, args.contacts)
+    
+    print(f"{'mode':>12} {'edits':>6} {'entry ms':>9} {'saved ms':>9} {'commits':>8}")
+    for mode in ("direct", "write-behind"):
+        # Each mode edits its own copy (--db is never written to)
+        db_path = os.path.join(directory, f"{mode}.db")
+        _copy_database(source_path, db_path, DEFAULT_PROFILE_NAME)
+        commits = []
+        queue = WriteBehindQueue(on_commit=commits.append) if mode == "write-behind" else None
+        model = ContactModel(db_path, write_behind=queue)
+        
+        started = time.perf_counter()
+        for index in range(args.edits):
+            success, message = model.create_contact(_sample_contact(args.contacts + index))
+            if not success:
+                raise RuntimeError(message)
+        entered = time.perf_counter()
+        if queue:
+            queue.close()
+        saved = time.perf_counter()
+        
+        print(f"{mode:>12} {args.edits:>6} {(entered - started) * 1000:>9.0f} "
+              f"{(saved - started) * 1000:>9.0f} {len(commits) if queue else args.edits:>8}")
+
+
+def _create_legacy_state_database(db_path: str, project_count: int) -> None:
+    """Fill a database of schema version 6 (state labels in projects.state) with generated projects."""
+    rng = random.Random(0)
+    first_day = (date.today() - timedelta(days=5 * 365)).toordinal()
+    
+    def rows():
+        for index in range(project_count):
+            start_day = first_day + rng.randrange(6 * 365)
+            end_day = start_day + rng.randrange(30, 400)
+            yield (f"First{index % 20000} Last{index % 5000}", f"Site {index}",
+                   date.fromordinal(start_day).isoformat(), date.fromordinal(end_day).isoformat(),
+                   1, rng.choice(ProjectSchema.STATE_OPTIONS), start_day, end_day)
+    
+    conn = connect(db_path, "bulk-import")
+    try:
+        with conn:
+            conn.execute(ContactSchema.get_create_table_sql())
+            conn.execute(LEGACY_PROJECTS_TABLE_SQL)
+            conn.execute(ProjectSchema.get_create_consultants_table_sql())
+            conn.execute(ProjectSchema.get_create_archive_table_sql())
+            conn.executemany(
+                "INSERT INTO projects (customer_name, location, start_date, end_date, is_active, state, "
+                "start_day, end_day) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows()
+            )
+            for sql in ContactSchema.get_create_index_sql() + ProjectSchema.get_create_index_sql(
+                    ['idx_projects_customer_id', 'idx_project_consultants_contact_id',
+                     'idx_projects_end_day_start_day', 'idx_projects_customer_name']):
+                conn.execute(sql)
+            conn.execute("CREATE INDEX idx_projects_state_end_day ON projects (state, end_day)")
+            conn.execute("PRAGMA user_version = 6")
+    finally:
+        conn.close()
+
+
+def _vacuumed_size(db_path: str) -> int:
+    """Size of a database file once free pages are released with VACUUM."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("VACUUM")
+    return os.path.getsize(db_path)
+
+
+def _time_state_queries(db_path: str, column: str, values: Dict[str, object], repeat: int) -> Dict[str, float]:
+    """
+    Time the state filters of the application against one state column.
+    
+    Args:
+        db_path: Database to query
+        column: 'state' (labels) or 'state_code'
+        values: Value stored in the column for each state label
+        repeat: Runs per query (the median is returned)
+    
+    Returns:
+        Median milliseconds per query
+    """
+    open_values = [values[state] for state in ProjectSchema.OPEN_STATES]
+    placeholders = ", ".join("?" * len(open_values))
+    today = date.today().toordinal()
+    queries = {
+        "page of one state": (f"SELECT * FROM projects WHERE {column} = ? ORDER BY id LIMIT 1000",
+                              [values[ProjectSchema.STATE_OPTIONS[1]]]),
+        "count of one state": (f"SELECT COUNT(*) FROM projects WHERE {column} = ?",
+                               [values[ProjectSchema.STATE_OPTIONS[1]]]),
+        "overdue open projects": (f"SELECT * FROM projects WHERE {column} IN ({placeholders}) "
+                                  f"AND end_day BETWEEN ? AND ? ORDER BY end_day",
+                                  open_values + [today - 30, today]),
+        "projects per state": (f"SELECT {column}, COUNT(*) FROM projects GROUP BY {column}", []),
+    }
+    
+    timings = {}
+    conn = connect(db_path)
+    try:
+        for label, (sql, params) in queries.items():
+            conn.execute(sql, params).fetchall()  # Warm-up: read the pages into the cache
+            runs = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.execute(sql, params).fetchall()
+                runs.append((time.perf_counter() - started) * 1000)
+            timings[label] = statistics.median(runs)
+    finally:
+        conn.close()
+    return timings
+
+
+def benchmark_state_codes(args: argparse.Namespace) -> None:
+    """Compare database size and state filter times with state labels and with lookup codes."""
+    db_path = os.path.join(tempfile.mkdtemp(), "states.db")
+    print(f"Creating {args.projects} projects with state labels (schema version 6) in {db_path}")
+    _create_legacy_state_database(db_path, args.projects)
+    size_before = _vacuumed_size(db_path)
+    labels = {state: state for state in ProjectSchema.STATE_OPTIONS}
+    before = _time_state_queries(db_path, "state", labels, args.repeat)
+    
+    # Only the state migrations: 7 converts the labels, 10 drops their column
+    started = time.perf_counter()
+    MigrationRunner(db_path).migrate(to_version=7)
+    conn = connect(db_path)
+    try:
+        with conn:
+            drop_column("projects", "state")(conn)
+    finally:
+        conn.close()
+    print(f"Migrated to state codes in {time.perf_counter() - started:.1f} s")
+    size_after = _vacuumed_size(db_path)
+    after = _time_state_queries(db_path, "state_code", ProjectSchema.STATE_CODES, args.repeat)
+    
+    print(f"{'':>24} {'labels':>10} {'codes':>10} {'change':>8}")
+    print(f"{'database size (MB)':>24} {size_before / 2 ** 20:>10.1f} {size_after / 2 ** 20:>10.1f} "
+          f"{(size_after - size_before) / size_before:>+8.0%}")
+    for label in before:
+        print(f"{label + ' (ms)':>24} {before[label]:>10.2f} {after[label]:>10.2f} "
+              f"{(after[label] - before[label]) / before[label]:>+8.0%}")
+
+
+def benchmark_locations(args: argparse.Namespace) -> None:
+    """Time geocoding projects to the location R*Tree, and area and nearest-project queries."""
+    db_path = os.path.join(tempfile.mkdtemp(), "locations.db")
+    print(f"Creating {args.projects} projects in {db_path}")
+    MigrationRunner(db_path).migrate()
+    rng = random.Random(0)
+    places = get_gazetteer().places
+    # One project in ten has a location the gazetteer does not know
+    conn = connect(db_path, "bulk-import")
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT INTO projects (customer_name, location, is_active, state_code) VALUES (?, ?, 1, 1)",
+                ((f"First{index % 20000} Last{index % 5000}",
+                  f"Site {index}" if index % 10 == 0 else f"רחוב {index % 300} {index % 90 + 1}, {rng.choice(places)[0]}")
+                 for index in range(args.projects))
+            )
+    finally:
+        conn.close()
+    
+    pool = ConnectionPool(db_path)
+    model = ProjectModel(db_path, pool=pool)
+    started = time.perf_counter()
+    located = model.locate_projects()
+    print(f"Geocoded {located} projects in {time.perf_counter() - started:.1f} s")
+    
+    # Query points: locality centers (many projects share the point) and random points in between
+    targets = [(place[1], place[2]) for place in rng.sample(places, min(args.repeat, len(places)))]
+    targets += [(rng.uniform(29.6, 33.2), rng.uniform(34.3, 35.8)) for _ in range(args.repeat)]
+    
+    def timed(label: str, run) -> None:
+        run(*targets[0])  # Warm-up: read the pages into the cache
+        timings = []
+        for latitude, longitude in targets:
+            started = time.perf_counter()
+            run(latitude, longitude)
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"{label:>32} {statistics.median(timings):>9.2f} {max(timings):>9.2f}")
+    
+    print(f"{'query':>32} {'median ms':>9} {'max ms':>9}")
+    timed("nearest project", lambda latitude, longitude: model.get_nearest_projects(latitude, longitude, 1))
+    timed(f"nearest {args.count} projects",
+          lambda latitude, longitude: model.get_nearest_projects(latitude, longitude, args.count))
+    timed(f"{args.count} projects within 2 km box",
+          lambda latitude, longitude: model.get_projects_in_area(*bounding_box(latitude, longitude, 1), args.count))
+    timed(f"{args.count} projects within 50 km box",
+          lambda latitude, longitude: model.get_projects_in_area(*bounding_box(latitude, longitude, 25), args.count))
+    pool.close()
+
+
+def benchmark_capacity(args: argparse.Namespace) -> None:
+    """Time the weekly load of a year with the sweep line and by comparing every project with every week."""
+    db_path = os.path.join(tempfile.mkdtemp(), "capacity.db")
+    print(f"Creating {args.projects} projects in {db_path}")
+    MigrationRunner(db_path).migrate()
+    rng = random.Random(0)
+    today = date.today().toordinal()
+    
+    def rows():
+        for index in range(args.projects):
+            start_day = today - 5 * 365 + rng.randrange(6 * 365)
+            end_day = start_day + rng.randrange(30, 400)
+            yield (f"First{index % 20000} Last{index % 5000}", date.fromordinal(start_day).isoformat(),
+                   date.fromordinal(end_day).isoformat(), rng.choice(list(ProjectSchema.STATE_CODES.values())),
+                   start_day, end_day)
+    
+    conn = connect(db_path, "bulk-import")
+    try:
+        with conn:
+            conn.executemany("INSERT INTO projects (customer_name, start_date, end_date, is_active, state_code, "
+                             "start_day, end_day) VALUES (?, ?, ?, 1, ?, ?, ?)", rows())
+    finally:
+        conn.close()
+    
+    model = ProjectModel(db_path)
+    start_date = date.fromordinal(today - 180).isoformat()
+    end_date = date.fromordinal(today - 180 + args.weeks * WEEK_DAYS - 1).isoformat()
+    
+    started = time.perf_counter()
+    weeks = model.get_weekly_load(start_date, end_date)
+    sweep_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    peak = model.get_peak_concurrency(start_date, end_date)
+    peak_seconds = time.perf_counter() - started
+    
+    # What the weekly load cost before: every project compared with every week
+    started = time.perf_counter()
+    conn = connect(db_path)
+    try:
+        spans = conn.execute("SELECT start_day, end_day FROM projects").fetchall()
+    finally:
+        conn.close()
+    naive = []
+    for week in weeks:
+        first_day = ProjectSchema.to_day_number(week['week_start'])
+        last_day = first_day + WEEK_DAYS - 1
+        naive.append(sum(1 for start_day, end_day in spans if start_day <= last_day and end_day >= first_day))
+    naive_seconds = time.perf_counter() - started
+    
+    print(f"{'':>28} {'seconds':>9}")
+    print(f"{f'{len(weeks)} weeks, sweep line':>28} {sweep_seconds:>9.2f}")
+    print(f"{f'{len(weeks)} weeks, compare all':>28} {naive_seconds:>9.2f}")
+    print(f"{'peak concurrency':>28} {peak_seconds:>9.2f}  ({peak['projects']} projects on {peak['date']})")
+    matches = naive == [int(week['projects']) for week in weeks]
+    print(f"Weekly project counts {'match' if matches else 'DIFFER'}")
+
+
+def _create_state_history_database(db_path: str, project_count: int, rng: random.Random) -> None:
+    """Create projects whose states changed over the last years, with their state history."""
+    MigrationRunner(db_path).migrate()
+    today = date.today().toordinal()
+    codes = list(ProjectSchema.STATE_CODES.values())
+    projects, history = [], []
+    for project_id in range(1, project_count + 1):
+        day = since_day = today - rng.randrange(4 * 365)
+        state_code, is_active = codes[0], 1
+        history.append((project_id, day, state_code, is_active, since_day, None, None))
+        while True:
+            day += rng.randrange(5, 200)
+            if day > today:
+                break
+            if rng.random() < 0.3:
+                # Only the active flag changes
+                is_active = 1 - is_active
+                history.append((project_id, day, state_code, is_active, since_day, None, None))
+                continue
+            left_code, left_days = state_code, day - since_day
+            state_code, since_day = rng.choice([code for code in codes if code != state_code]), day
+            history.append((project_id, day, state_code, is_active, since_day, left_code, left_days))
+        projects.append((project_id, f"First{project_id % 20000} Last{project_id % 5000}", is_active, state_code))
+    
+    conn = connect(db_path, "bulk-import")
+    try:
+        with conn:
+            conn.executemany("INSERT INTO projects (id, customer_name, is_active, state_code) VALUES (?, ?, ?, ?)",
+                             projects)
+            conn.executemany(f"INSERT INTO {ProjectSchema.STATE_HISTORY_TABLE_NAME} (project_id, changed_day, "
+                             f"state_code, is_active, state_since_day, left_state_code, left_state_days) "
+                             f"VALUES (?, ?, ?, ?, ?, ?, ?)", sorted(history, key=lambda row: row[1]))
+    finally:
+        conn.close()
+
+
+def benchmark_state_history(args: argparse.Namespace) -> None:
+    """Time states as of past days and average time per state against recomputing them from the whole history."""
+    db_path = os.path.join(tempfile.mkdtemp(), "history.db")
+    print(f"Creating {args.projects} projects with their state history in {db_path}")
+    rng = random.Random(0)
+    _create_state_history_database(db_path, args.projects, rng)
+    model = ProjectModel(db_path)
+    history = ProjectSchema.STATE_HISTORY_TABLE_NAME
+    today = date.today().toordinal()
+    
+    conn = connect(db_path)
+    try:
+        print(f"{conn.execute(f'SELECT COUNT(*) FROM {history}').fetchone()[0]} history rows")
+        print(f"{'':>34} {'indexed s':>10} {'rescan s':>10}")
+        for days_ago in args.days_ago:
+            as_of = date.fromordinal(today - days_ago).isoformat()
+            started = time.perf_counter()
+            states = model.get_states_as_of(as_of)
+            indexed_seconds = time.perf_counter() - started
+            
+            # The same from every history row up to the day, ranked per project
+            started = time.perf_counter()
+            expected = conn.execute(
+                f"SELECT project_id, state_code FROM (SELECT project_id, state_code, is_active, ROW_NUMBER() "
+                f"OVER (PARTITION BY project_id ORDER BY changed_day DESC, id DESC) AS rank FROM {history} "
+                f"WHERE changed_day <= ?) WHERE rank = 1 AND is_active IS NOT NULL ORDER BY project_id",
+                (today - days_ago,)
+            ).fetchall()
+            rescan_seconds = time.perf_counter() - started
+            matches = [(int(state['id']), ProjectSchema.STATE_CODES[state['state']]) for state in states] == expected
+            print(f"{f'states as of {as_of} ({len(states)})':>34} {indexed_seconds:>10.2f} {rescan_seconds:>10.2f}"
+                  f"  {'match' if matches else 'DIFFER'}")
+        
+        for label, first_day in (("average days per state", None), ("  stays ended last 90 days", today - 90)):
+            start_date = date.fromordinal(first_day).isoformat() if first_day else None
+            started = time.perf_counter()
+            averages = model.get_average_state_durations(start_date)
+            indexed_seconds = time.perf_counter() - started
+            
+            # The same by pairing each change with the project's previous changes
+            started = time.perf_counter()
+            stays: Dict[int, List[int]] = {}
+            previous_project, entered = None, None
+            for project_id, changed_day, state_code in conn.execute(
+                    f"SELECT project_id, changed_day, state_code FROM {history} ORDER BY project_id, changed_day, id"):
+                if project_id != previous_project:
+                    previous_project, entered = project_id, (state_code, changed_day)
+                elif state_code != entered[0]:
+                    if first_day is None or changed_day >= first_day:
+                        stays.setdefault(entered[0], []).append(changed_day - entered[1])
+                    entered = (state_code, changed_day)
+            rescan_seconds = time.perf_counter() - started
+            matches = {ProjectSchema.STATE_CODES[average['state']]: average['average_days'] for average in averages} \
+                == {code: f"{statistics.mean(days):.1f}" for code, days in stays.items()}
+            print(f"{label:>34} {indexed_seconds:>10.3f} {rescan_seconds:>10.2f}  {'match' if matches else 'DIFFER'}")
+    finally:
+        conn.close()
+    
+    # Cost of keeping the history on state changes
+    project_ids = rng.sample(range(1, args.projects + 1), args.updates)
+    started = time.perf_counter()
+    for index, project_id in enumerate(project_ids):
+        model.update_projects([project_id], {'state': ProjectSchema.STATE_OPTIONS[index % 2]})
+    print(f"{args.updates} state changes: {(time.perf_counter() - started) * 1000 / args.updates:.2f} ms each")
+
+
+def benchmark_shards(args: argparse.Namespace) -> None:
+    """Time combined paging, search and counts across attached office databases."""
+    directory = tempfile.mkdtemp()
+    first_path = os.path.join(directory, "office0.db")
+    print(f"Creating {args.shards} shards of {args.contacts} contacts and {args.projects} projects in {directory}")
+    create_sample_database(first_path, args.contacts, args.projects)
+    shards = {"office0": first_path}
+    for index in range(1, args.shards):
+        shards[f"office{index}"] = os.path.join(directory, f"office{index}.db")
+        shutil.copyfile(first_path, shards[f"office{index}"])
+    
+    shard_set = ShardSet(shards)
+    contacts = ShardedContactModel(shard_set)
+    projects = ShardedProjectModel(shard_set)
+    
+    def timed(label: str, run) -> None:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"{label:>28} {statistics.median(timings):>9.2f} ms")
+    
+    def page_through_contacts() -> None:
+        page = None
+        for _ in range(args.pages):
+            page = contacts.get_contacts_page(page[-1] if page else None, args.page_size)
+    
+    def page_through_projects() -> None:
+        page = None
+        for _ in range(args.pages):
+            page = projects.get_projects_page(page[-1] if page else None, args.page_size)
+    
+    print(f"{'query':>28} {'median':>12}")
+    timed("first contact page", lambda: contacts.get_contacts_page(limit=args.page_size))
+    timed(f"{args.pages} contact pages", page_through_contacts)
+    timed(f"{args.pages} project pages", page_through_projects)
+    timed("search by name prefix", lambda: contacts.search_contacts("Last42", args.page_size))
+    timed("search by phone", lambda: contacts.search_contacts("050-0000010"))
+    timed("contacts per shard", contacts.count_contacts)
+    timed("projects per state", projects.count_projects_by_state)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point: benchmark.py <benchmark> [options]."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    
+    async_reads = subparsers.add_parser("async-reads", help="concurrent reads through the async models")
+    async_reads.add_argument("--db", help="database to read (default: a generated sample database)")
+    async_reads.add_argument("--contacts", type=int, default=100000, help="sample contacts to generate")
+    async_reads.add_argument("--operations", type=int, default=5000, help="lookups per run")
+    async_reads.add_argument("--readers", type=int, nargs="+", default=[1, 2, 4, 8],
+                             help="reader thread counts to compare")
+    async_reads.set_defaults(func=benchmark_async_reads)
+    
+    http_load = subparsers.add_parser("http-load", help="requests/sec and latency of the HTTP service")
+    http_load.add_argument("--url", help="running service to test, e.g. http://127.0.0.1:8765 "
+                                         "(default: serve the database in-process)")
+    http_load.add_argument("--db", help="database to serve (default: a generated sample database)")
+    http_load.add_argument("--contacts", type=int, default=20000,
+                           help="sample contacts to generate (or the contact ID range used with --url)")
+    http_load.add_argument("--requests", type=int, default=500, help="requests per client")
+    http_load.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16],
+                           help="concurrent client counts to compare")
+    http_load.add_argument("--conditional", action="store_true",
+                           help="repeat requests with If-None-Match (measures 304 responses)")
+    http_load.set_defaults(func=benchmark_http_load)
+    
+    profiles = subparsers.add_parser("profiles", help="the application workload under each performance profile")
+    profiles.add_argument("--db", help="database to copy, e.g. contacts.db (default: a generated sample database)")
+    profiles.add_argument("--contacts", type=int, default=20000, help="sample contacts to generate")
+    profiles.add_argument("--projects", type=int, default=2000, help="sample projects to generate")
+    profiles.add_argument("--runs", type=int, default=3, help="runs per profile (results are averaged)")
+    profiles.add_argument("--profiles", nargs="+", choices=sorted(PROFILES), default=list(PROFILES),
+                          help="profiles to compare")
+    profiles.set_defaults(func=benchmark_profiles)
+    
+    replica = subparsers.add_parser("replica", help="list loads from the file vs the in-memory read replica")
+    replica.add_argument("--db", help="database to read, e.g. on the shared drive "
+                                      "(default: a generated sample database)")
+    replica.add_argument("--contacts", type=int, default=20000, help="sample contacts to generate")
+    replica.add_argument("--projects", type=int, default=2000, help="sample projects to generate")
+    replica.add_argument("--repeat", type=int, default=5, help="loads per measurement")
+    replica.set_defaults(func=benchmark_replica)
+    
+    write_behind = subparsers.add_parser("write-behind", help="creates written directly vs through the write-behind queue")
+    write_behind.add_argument("--db", help="database to copy, e.g. on the shared drive "
+                                           "(default: a generated sample database)")
+    write_behind.add_argument("--contacts", type=int, default=5000, help="sample contacts to generate")
+    write_behind.add_argument("--edits", type=int, default=500, help="contacts created per mode")
+    write_behind.set_defaults(func=benchmark_write_behind)
+    
+    state_codes = subparsers.add_parser("state-codes", help="size and state filters with labels vs lookup codes")
+    state_codes.add_argument("--projects", type=int, default=1000000, help="sample projects to generate")
+    state_codes.add_argument("--repeat", type=int, default=5, help="runs per query (the median is shown)")
+    state_codes.set_defaults(func=benchmark_state_codes)
+    
+    locations = subparsers.add_parser("locations", help="area and nearest-project queries on the location R*Tree")
+    locations.add_argument("--projects", type=int, default=1000000, help="sample projects to generate")
+    locations.add_argument("--count", type=int, default=10, help="projects returned per query")
+    locations.add_argument("--repeat", type=int, default=50,
+                           help="query points of each kind (locality centers, random points)")
+    locations.set_defaults(func=benchmark_locations)
+    
+    capacity = subparsers.add_parser("capacity", help="weekly load by sweep line vs comparing every project")
+    capacity.add_argument("--projects", type=int, default=1000000, help="sample projects to generate")
+    capacity.add_argument("--weeks", type=int, default=52, help="weeks in the load histogram")
+    capacity.set_defaults(func=benchmark_capacity)
+    
+    state_history = subparsers.add_parser("state-history",
+                                          help="states as of a day and time per state from the state history")
+    state_history.add_argument("--projects", type=int, default=200000, help="sample projects to generate")
+    state_history.add_argument("--days-ago", type=int, nargs="+", default=[0, 365, 1000],
+                               help="days to reconstruct, counted back from today")
+    state_history.add_argument("--updates", type=int, default=1000, help="state changes timed")
+    state_history.set_defaults(func=benchmark_state_history)
+    
+    shards = subparsers.add_parser("shards", help="combined queries across attached office databases")
+    shards.add_argument("--shards", type=int, default=5, help="office databases to generate")
+    shards.add_argument("--contacts", type=int, default=200000, help="sample contacts per shard")
+    shards.add_argument("--projects", type=int, default=2000, help="sample projects per shard")
+    shards.add_argument("--pages", type=int, default=20, help="pages read per paging run")
+    shards.add_argument("--page-size", type=int, default=100, help="records per page")
+    shards.add_argument("--repeat", type=int, default=5, help="runs per measurement (the median is shown)")
+    shards.set_defaults(func=benchmark_shards)
+    
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,102 @@
+# File: connection_pool.py
+"""
+Reusable SQLite connections for long-running processes (e.g. the HTTP service).
+The models open a connection per call; given a pool they reuse idle
+connections instead, skipping the open and schema-parsing cost of each call.
+"""
+
+import sqlite3
+import threading
+from typing import List, Optional
+from performance import ProfileArg, connect
+
+
+# Idle connections kept open by default
+DEFAULT_MAX_IDLE = 8
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Connection that returns itself to its pool when its `with` block ends.
+    
+    The block commits or rolls back as usual (see sqlite3.Connection), so model
+    code written as `with self._connect() as conn:` works unchanged.
+    """
+    
+    pool = None
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        result = super().__exit__(exc_type, exc_value, traceback)
+        if self.pool is not None:
+            self.pool.release(self)
+        return result
+
+
+class ConnectionPool:
+    """Thread-safe pool of connections to one database file."""
+    
+    def __init__(self, db_path: str, max_idle: int = DEFAULT_MAX_IDLE, timeout: float = 5.0,
+                 profile: ProfileArg = None):
+        """
+        Initialize the pool (connections are opened on demand).
+        
+        Args:
+            db_path: Path to SQLite database file
+            max_idle: Idle connections kept open; extra ones are closed on release
+            timeout: Seconds a connection waits for a lock held by another one
+            profile: Performance profile or profile name applied to each new
+                connection (default: the configured profile)
+        """
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.profile = profile
+        self._idle: List[PooledConnection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+    
+    def _open(self) -> PooledConnection:
+        """Open a new pooled connection."""
+        # Connections move between threads, but only one thread uses each at a time
+        conn = connect(self.db_path, self.profile, timeout=self.timeout,
+                       factory=PooledConnection, check_same_thread=False)
+        conn.pool = self
+        return conn
+    
+    def acquire(self) -> PooledConnection:
+        """Take an idle connection, or open one if none is idle."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._open()
+    
+    def release(self, conn: PooledConnection) -> None:
+        """
+        Return a connection to the pool, resetting the per-use state the models
+        change (row factory, foreign key enforcement, attached archive).
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+            conn.execute("PRAGMA foreign_keys = OFF")
+            for _, name, _ in conn.execute("PRAGMA database_list").fetchall():
+                if name not in ('main', 'temp'):
+                    conn.execute(f"DETACH DATABASE {name}")
+        except sqlite3.Error:
+            conn.close()
+            return
+        
+        with self._lock:
+            if not self._closed and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+    
+    def close(self) -> None:
+        """Close all idle connections; connections in use are closed on release."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
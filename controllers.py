@@ -4,20 +4,34 @@ Controller layer for the Contact Management System.
 Handles business logic and coordinates between models and views.
 """
 
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
 from tkinter import messagebox
 from models import ContactModel
+from replica import ReadReplica
+from write_behind import WriteBehindQueue
 from views import MainView, ContactListView, ContactFormView
 
 
 class ContactController:
     """Main controller for managing contact operations."""
     
-    def __init__(self):
-        """Initialize the contact controller."""
+    def __init__(self, on_contacts_changed: Optional[Callable] = None,
+                 replica: Optional[ReadReplica] = None, write_behind: Optional[WriteBehindQueue] = None):
+        """
+        Initialize the contact controller.
+        
+        Args:
+            on_contacts_changed: Optional callback after contacts were created,
+                updated or deleted (receives the IDs of updated/deleted contacts;
+                an empty list after a create)
+            replica: Optional in-memory read replica for the model
+            write_behind: Optional write-behind queue for the model
+        """
+        self.on_contacts_changed = on_contacts_changed
+        
         # Initialize model
         try:
-            self.model = ContactModel()
+            self.model = ContactModel(replica=replica, write_behind=write_behind)
         except Exception as e:
             messagebox.showerror("Database Error", f"Failed to initialize database: {e}")
             return
@@ -28,7 +42,7 @@ class ContactController:
             parent=self.main_view.get_root(),
             on_add=self.show_add_form,
             on_edit=self.show_edit_form,
-            on_delete=self.delete_contact,
+            on_delete=self.delete_contacts,
             on_refresh=self.refresh_contacts
         )
         
@@ -117,6 +131,9 @@ class ContactController:
                 )
             
             if success:
+                if self.on_contacts_changed:
+                    changed = [] if self.current_contact_id is None else [self.current_contact_id]
+                    self.on_contacts_changed(changed)
                 messagebox.showinfo("Success", message)
                 self.form_view.close()
                 self.form_view = None
@@ -133,19 +150,21 @@ class ContactController:
             self.form_view.close()
             self.form_view = None
     
-    def delete_contact(self, contact_id: int) -> None:
+    def delete_contacts(self, contact_ids: List[int]) -> None:
         """
-        Delete a contact from the database.
+        Delete one or more contacts from the database.
         
         Args:
-            contact_id: ID of the contact to delete
+            contact_ids: IDs of the contacts to delete
         """
         try:
-            success, message = self.model.delete_contact(contact_id)
+            success, message = self.model.delete_contacts(contact_ids)
             
             if success:
+                self.list_view.remove_contacts(contact_ids)
+                if self.on_contacts_changed:
+                    self.on_contacts_changed(contact_ids)
                 messagebox.showinfo("Success", message)
-                self.refresh_contacts()
             else:
                 messagebox.showerror("Error", message)
                 
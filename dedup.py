@@ -0,0 +1,364 @@
+# File: dedup.py
+"""
+Duplicate-contact detection for the Contact Management System.
+Groups contacts into blocks that share a normalized phone, email or phonetic
+name key, scores candidate pairs only within blocks, and merges confirmed
+duplicates into a single contact.
+"""
+
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Set, Tuple
+from schema import ContactSchema
+from project_schema import ProjectSchema
+
+
+# Hebrew final letters and their regular forms
+_HEBREW_FINALS = str.maketrans({'ך': 'כ', 'ם': 'מ', 'ן': 'נ', 'ף': 'פ', 'ץ': 'צ'})
+
+# Phonetic classes shared by Hebrew and Latin letters, so that "Cohen" and
+# "כהן" (or "Kohen") land in the same block. Vowels and silent letters map
+# to '' and are dropped.
+_PHONETIC_CODES = {
+    # Hebrew
+    'א': '', 'ה': '', 'ו': '', 'י': '', 'ע': '',
+    'ב': 'P', 'פ': 'P', 'ג': 'G', 'ד': 'T', 'ט': 'T', 'ת': 'T',
+    'ז': 'S', 'ס': 'S', 'ש': 'S', 'צ': 'C',
+    'כ': 'K', 'ק': 'K', 'ח': 'K',
+    'ל': 'L', 'מ': 'M', 'נ': 'N', 'ר': 'R',
+    # Latin
+    'a': '', 'e': '', 'i': '', 'o': '', 'u': '', 'y': '', 'h': '', 'w': '',
+    'b': 'P', 'p': 'P', 'f': 'P', 'v': 'P',
+    'c': 'K', 'k': 'K', 'q': 'K',
+    'g': 'G', 'j': 'G',
+    'd': 'T', 't': 'T',
+    's': 'S', 'z': 'S', 'x': 'S',
+    'l': 'L', 'm': 'M', 'n': 'N', 'r': 'R',
+}
+
+# Blocks larger than this are compared with a sliding window over the
+# name-sorted block instead of all pairs (sorted-neighbourhood method)
+MAX_BLOCK_SIZE = 50
+WINDOW_SIZE = 10
+
+# Windowed blocks are cut into overlapping segments of this size so that one
+# very common name cannot leave a single pool worker doing all the work
+SEGMENT_SIZE = 5000
+
+# Minimum score for a pair to be reported as a duplicate candidate
+DEFAULT_THRESHOLD = 0.6
+
+# A contact record used by the engine:
+# (id, normalized name, phone key, email key, name trigrams)
+ContactRecord = Tuple[int, str, str, str, frozenset]
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a name: lowercase, regular Hebrew letters, letters only, tokens sorted."""
+    name = (name or '').lower().translate(_HEBREW_FINALS)
+    tokens = [''.join(ch for ch in token if ch.isalpha()) for token in name.split()]
+    return ' '.join(sorted(token for token in tokens if token))
+
+
+def phonetic_key(token: str) -> str:
+    """
+    Build a phonetic key for one name token (Hebrew or Latin).
+
+    Letters are mapped to shared consonant classes, vowels dropped and
+    repeated classes collapsed, e.g. 'Cohen', 'Kohen' and 'כהן' all give 'KN'.
+    """
+    key = []
+    for ch in token.lower().translate(_HEBREW_FINALS):
+        code = _PHONETIC_CODES.get(ch)
+        if code and (not key or key[-1] != code):
+            key.append(code)
+    return ''.join(key)
+
+
+def trigrams(name: str) -> Set[str]:
+    """Get the set of character trigrams of a normalized name."""
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def make_record(contact_id: int, name: str, phone: str, email: str) -> ContactRecord:
+    """Build a normalized contact record from raw contact values."""
+    name = normalize_name(name)
+    return (contact_id, name, ContactSchema.normalize_phone(phone),
+            ContactSchema.normalize_email(email), frozenset(trigrams(name)))
+
+
+def blocking_keys(record: ContactRecord) -> List[str]:
+    """
+    Get the blocking keys of a contact record.
+
+    Contacts sharing any key are compared; everything else is never compared.
+    """
+    _, name, phone_key, email_key, _ = record
+    keys = []
+    if phone_key:
+        keys.append(f"p:{phone_key}")
+    if email_key:
+        keys.append(f"e:{email_key}")
+
+    # Phonetic key of every token plus the initial of the others, so that
+    # swapped first/last names still share a block
+    tokens = [phonetic_key(token) for token in name.split()]
+    tokens = [token for token in tokens if token]
+    for i, token in enumerate(tokens):
+        initials = ''.join(sorted(other[0] for j, other in enumerate(tokens) if j != i))
+        keys.append(f"n:{token}|{initials}")
+    return keys
+
+
+def score_pair(first: ContactRecord, second: ContactRecord) -> float:
+    """
+    Score how likely two contact records are the same person (0.0 - 1.0).
+
+    Name similarity (trigram Jaccard) carries most of the weight; matching
+    phone or email adds to it and conflicting values subtract from it.
+    """
+    common = len(first[4] & second[4])
+    union = len(first[4]) + len(second[4]) - common
+    name_similarity = common / union if union else 0.0
+
+    score = 0.6 * name_similarity
+    if first[2] and second[2]:
+        score += 0.4 if first[2] == second[2] else -0.2
+    if first[3] and second[3]:
+        score += 0.4 if first[3] == second[3] else -0.1
+    return max(0.0, min(1.0, score))
+
+
+def compare_blocks(blocks: List[List[int]], records: List[ContactRecord],
+                   threshold: float = DEFAULT_THRESHOLD) -> Dict[Tuple[int, int], float]:
+    """
+    Score candidate pairs within each block.
+
+    Args:
+        blocks: Lists of indexes into records that share a blocking key
+        records: Normalized contact records
+        threshold: Minimum score to report
+
+    Returns:
+        Mapping of (lower_id, higher_id) to score for pairs above the threshold
+    """
+    candidates: Dict[Tuple[int, int], float] = {}
+
+    for block in blocks:
+        if len(block) > MAX_BLOCK_SIZE:
+            block = sorted(block, key=lambda index: records[index][1])
+            window = WINDOW_SIZE
+        else:
+            window = len(block)
+
+        for i, first_index in enumerate(block):
+            first = records[first_index]
+            for second_index in block[i + 1:i + window]:
+                second = records[second_index]
+                # Pairs sharing several blocks are simply rescored; cheaper
+                # than remembering every compared pair
+                score = score_pair(first, second)
+                if score >= threshold:
+                    pair = (first[0], second[0]) if first[0] < second[0] else (second[0], first[0])
+                    candidates[pair] = score
+    return candidates
+
+
+# Records shared with pool workers once, instead of being pickled with every block
+_worker_records: List[ContactRecord] = []
+
+
+def _init_worker(records: List[ContactRecord]) -> None:
+    """Process pool initializer: keep the records in the worker process."""
+    global _worker_records
+    _worker_records = records
+
+
+def _compare_blocks_in_worker(blocks: List[List[int]], threshold: float) -> Dict[Tuple[int, int], float]:
+    """Process pool task: score a chunk of blocks against the worker's records."""
+    return compare_blocks(blocks, _worker_records, threshold)
+
+
+class ContactDeduplicator:
+    """Finds and merges duplicate contacts in the contacts database."""
+
+    def __init__(self, db_path: str = "contacts.db"):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            db_path: Path to SQLite database file
+        """
+        self.db_path = db_path
+
+    def _load_records(self) -> List[ContactRecord]:
+        """Load all contacts as normalized records."""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute(
+                f"SELECT id, first_name, last_name, phone, email FROM {ContactSchema.TABLE_NAME}"
+            )
+            return [make_record(contact_id, f"{first_name or ''} {last_name or ''}", phone, email)
+                    for contact_id, first_name, last_name, phone, email in cursor]
+
+    @staticmethod
+    def build_blocks(records: List[ContactRecord]) -> List[List[int]]:
+        """
+        Group records by blocking key, keeping only blocks with two or more records.
+
+        Args:
+            records: Normalized contact records
+
+        Returns:
+            List of blocks, each a list of indexes into records
+        """
+        blocks: Dict[str, List[int]] = {}
+        for index, record in enumerate(records):
+            for key in blocking_keys(record):
+                blocks.setdefault(key, []).append(index)
+        return [block for block in blocks.values() if len(block) > 1]
+
+    @staticmethod
+    def _segment_blocks(blocks: List[List[int]], records: List[ContactRecord]) -> List[List[int]]:
+        """Cut very large blocks into name-sorted segments overlapping by one window."""
+        segmented = []
+        for block in blocks:
+            if len(block) <= SEGMENT_SIZE:
+                segmented.append(block)
+                continue
+            block = sorted(block, key=lambda index: records[index][1])
+            for start in range(0, len(block) - WINDOW_SIZE + 1, SEGMENT_SIZE):
+                segmented.append(block[start:start + SEGMENT_SIZE + WINDOW_SIZE - 1])
+        return segmented
+
+    def find_candidates(self, threshold: float = DEFAULT_THRESHOLD,
+                        workers: int = 0) -> List[Tuple[int, int, float]]:
+        """
+        Find candidate duplicate pairs.
+
+        Args:
+            threshold: Minimum score (0.0 - 1.0) for a pair to be reported
+            workers: Number of worker processes for block comparison
+                (0 compares in the current process)
+
+        Returns:
+            List of (contact_id, other_contact_id, score), highest score first
+        """
+        try:
+            records = self._load_records()
+            blocks = self.build_blocks(records)
+        except sqlite3.Error as e:
+            print(f"Error loading contacts: {e}")
+            return []
+
+        candidates: Dict[Tuple[int, int], float] = {}
+        if workers and len(blocks) > 1:
+            blocks = self._segment_blocks(blocks, records)
+            # Spread blocks round-robin so each worker gets a similar mix of sizes
+            blocks.sort(key=len, reverse=True)
+            chunks = [blocks[i::workers * 4] for i in range(workers * 4)]
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(records,)) as executor:
+                futures = [executor.submit(_compare_blocks_in_worker, chunk, threshold)
+                           for chunk in chunks if chunk]
+                for future in futures:
+                    for pair, score in future.result().items():
+                        candidates[pair] = max(score, candidates.get(pair, 0.0))
+        else:
+            candidates = compare_blocks(blocks, records, threshold)
+
+        return sorted(((first, second, score) for (first, second), score in candidates.items()),
+                      key=lambda candidate: (-candidate[2], candidate[0], candidate[1]))
+
+    def merge(self, keep_id: int, duplicate_ids: List[int]) -> Tuple[bool, str]:
+        """
+        Merge duplicate contacts into one contact.
+
+        Empty fields of the kept contact are filled from the duplicates (in the
+        given order), project links are moved to the kept contact, and the
+        duplicates are deleted - all in one transaction.
+
+        Args:
+            keep_id: ID of the contact to keep
+            duplicate_ids: IDs of the contacts merged into it
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        duplicate_ids = [contact_id for contact_id in duplicate_ids if contact_id != keep_id]
+        if not duplicate_ids:
+            return False, "No duplicates to merge"
+
+        fields = ContactSchema.DISPLAY_ORDER
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.row_factory = sqlite3.Row
+                rows = {
+                    row['id']: row for row in conn.execute(
+                        f"SELECT * FROM {ContactSchema.TABLE_NAME} "
+                        f"WHERE id IN ({', '.join('?' * (len(duplicate_ids) + 1))})",
+                        [keep_id] + duplicate_ids
+                    )
+                }
+                if keep_id not in rows:
+                    return False, "Contact not found"
+
+                merged = {field: rows[keep_id][field] for field in fields}
+                for contact_id in duplicate_ids:
+                    if contact_id not in rows:
+                        continue
+                    for field in fields:
+                        if not (merged[field] or '').strip() and rows[contact_id][field]:
+                            merged[field] = rows[contact_id][field]
+
+                merged.update(ContactSchema.get_derived_values(merged))
+                set_clause = ", ".join(f"{field} = ?" for field in merged)
+                conn.execute(
+                    f"UPDATE {ContactSchema.TABLE_NAME} SET {set_clause} WHERE id = ?",
+                    list(merged.values()) + [keep_id]
+                )
+
+                # Move project links (if the projects module is in use) to the kept contact
+                tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+                moves = [(keep_id, contact_id) for contact_id in duplicate_ids]
+                if ProjectSchema.TABLE_NAME in tables:
+                    conn.executemany(
+                        f"UPDATE {ProjectSchema.TABLE_NAME} SET customer_id = ? WHERE customer_id = ?",
+                        moves
+                    )
+                if ProjectSchema.CONSULTANTS_TABLE_NAME in tables:
+                    conn.executemany(
+                        f"UPDATE OR IGNORE {ProjectSchema.CONSULTANTS_TABLE_NAME} "
+                        f"SET contact_id = ? WHERE contact_id = ?",
+                        moves
+                    )
+                    conn.executemany(
+                        f"DELETE FROM {ProjectSchema.CONSULTANTS_TABLE_NAME} WHERE contact_id = ?",
+                        [(contact_id,) for contact_id in duplicate_ids]
+                    )
+                conn.executemany(
+                    f"DELETE FROM {ContactSchema.TABLE_NAME} WHERE id = ?",
+                    [(contact_id,) for contact_id in duplicate_ids]
+                )
+                conn.commit()
+
+            count = len(duplicate_ids)
+            return True, f"{count} duplicate contact{'s' if count != 1 else ''} merged successfully"
+
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
+
+
+def main():
+    """Print duplicate candidates for a database: dedup.py [db_path] [workers]."""
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "contacts.db"
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+    deduplicator = ContactDeduplicator(db_path)
+    for first, second, score in deduplicator.find_candidates(workers=workers):
+        print(f"{first}\t{second}\t{score:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# File: gazetteer.py
+"""
+Offline geocoding of project locations for the Architecture Project Manager.
+The bundled gazetteer.csv lists Israeli localities with the approximate
+coordinates of their centers (Hebrew name, English name, alternative names).
+A location is geocoded to the locality whose name it contains: free text
+such as "רחוב הרצל 12, חיפה", "בחיפה" or "Haifa" all resolve to Haifa. No
+network service is used, so a project is located the moment it is saved and
+locations that name no known locality simply stay without coordinates.
+"""
+
+import csv
+import math
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+# Bundled gazetteer file (name, name_en, aliases separated by |, latitude, longitude)
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gazetteer.csv")
+
+# Hebrew one-letter prefixes (and, in, to, from) tried when a word matches no name
+HEBREW_PREFIXES = "ובלמ"
+
+# Spelling variants normalized to one form
+SPELLING_VARIANTS = {'קרית': 'קריית'}
+
+# Geocoded locations kept per gazetteer (many projects share a location text)
+CACHE_SIZE = 10000
+
+# Mean radius of the earth, in kilometers
+EARTH_RADIUS_KM = 6371.0
+
+_QUOTES = re.compile(r"[\"'`׳״]")
+_SEPARATORS = re.compile(r"[^\w]+")
+
+
+def normalize_place(text: str) -> str:
+    """Normalize a place name for matching: lower case, no quotes or punctuation, single spaces."""
+    words = _SEPARATORS.sub(" ", _QUOTES.sub("", (text or "").lower())).split()
+    return " ".join(SPELLING_VARIANTS.get(word, word) for word in words)
+
+
+def distance_km(latitude1: float, longitude1: float, latitude2: float, longitude2: float) -> float:
+    """Great-circle (haversine) distance between two points, in kilometers."""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(longitude2 - longitude1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    Box containing every point within a distance of a point.
+    
+    Returns:
+        (south, west, north, east) in degrees
+    """
+    d_latitude = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_latitude = math.cos(math.radians(min(abs(latitude) + d_latitude, 89.9)))
+    d_longitude = min(math.degrees(radius_km / (EARTH_RADIUS_KM * cos_latitude)), 180.0)
+    return latitude - d_latitude, longitude - d_longitude, latitude + d_latitude, longitude + d_longitude
+
+
+class Gazetteer:
+    """Place names and their coordinates, matched against free-text locations."""
+    
+    def __init__(self, path: str = DEFAULT_GAZETTEER_PATH):
+        """
+        Load a gazetteer file.
+        
+        Args:
+            path: CSV file with name, name_en, aliases, latitude and longitude columns
+        
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If a row has invalid coordinates
+        """
+        self.path = path
+        self.places: List[Tuple[str, float, float]] = []
+        # Normalized name (any of a place's names) -> index in places
+        self._names: Dict[str, int] = {}
+        self._max_words = 1
+        self._cache: Dict[str, Optional[Tuple[float, float]]] = {}
+        
+        with open(path, encoding='utf-8-sig', newline='') as file:
+            for line_number, row in enumerate(csv.DictReader(file), 2):
+                try:
+                    latitude, longitude = float(row['latitude']), float(row['longitude'])
+                except (TypeError, ValueError):
+                    raise ValueError(f"{path}:{line_number}: invalid coordinates")
+                index = len(self.places)
+                self.places.append((row['name'], latitude, longitude))
+                names = [row['name'], row.get('name_en') or ''] + (row.get('aliases') or '').split('|')
+                for name in filter(None, map(normalize_place, names)):
+                    self._names.setdefault(name, index)
+                    self._max_words = max(self._max_words, name.count(' ') + 1)
+    
+    def _match(self, words: List[str]) -> Optional[int]:
+        """Index of the place named by a sequence of words (with or without a Hebrew prefix)."""
+        name = " ".join(words)
+        if name in self._names:
+            return self._names[name]
+        first = words[0]
+        for length in (1, 2):
+            if len(first) - length >= 2 and all(letter in HEBREW_PREFIXES for letter in first[:length]):
+                name = " ".join([first[length:]] + words[1:])
+                if name in self._names:
+                    return self._names[name]
+        return None
+    
+    def _find(self, location: str) -> Optional[int]:
+        """
+        Index of the place a location names.
+        
+        The longest matching name wins; among names of the same length, the
+        last one in the text (addresses end with the locality, as in
+        "רחוב ירושלים 5, חיפה").
+        """
+        words = normalize_place(location).split()
+        for count in range(min(self._max_words, len(words)), 0, -1):
+            for start in range(len(words) - count, -1, -1):
+                index = self._match(words[start:start + count])
+                if index is not None:
+                    return index
+        return None
+    
+    def find(self, location: str) -> Optional[str]:
+        """
+        Find the locality a location names.
+        
+        Args:
+            location: Free-text location
+        
+        Returns:
+            Name of the locality, or None if the location names none
+        """
+        index = self._find(location)
+        return self.places[index][0] if index is not None else None
+    
+    def geocode(self, location: str) -> Optional[Tuple[float, float]]:
+        """
+        Coordinates of the locality a location names.
+        
+        Args:
+            location: Free-text location
+        
+        Returns:
+            (latitude, longitude), or None if the location names no known locality
+        """
+        key = (location or "").strip()
+        if key in self._cache:
+            return self._cache[key]
+        index = self._find(key)
+        coordinates = self.places[index][1:] if index is not None else None
+        if len(self._cache) >= CACHE_SIZE:
+            self._cache.clear()
+        self._cache[key] = coordinates
+        return coordinates
+
+
+_default_gazetteer: Optional[Gazetteer] = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """The bundled gazetteer (loaded on first use)."""
+    global _default_gazetteer
+    if _default_gazetteer is None:
+        _default_gazetteer = Gazetteer()
+    return _default_gazetteer
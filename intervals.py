@@ -0,0 +1,115 @@
+# File: intervals.py
+"""
+Sweep-line computations over project schedules for capacity planning.
+A schedule is a (start_day, end_day) pair of day numbers (date.toordinal),
+both days included. Each schedule becomes two events, +1 on its start day and
+-1 on the day after its end; sorting the events once and walking them in day
+order gives the number of concurrent projects on every day. Counting and
+peak queries over n schedules therefore cost O(n log n) for the sort plus
+O(n + buckets) for the walk, instead of comparing every pair of schedules.
+"""
+
+import itertools
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+
+# First day of the week (date.weekday(), Monday is 0): the work week starts on Sunday
+FIRST_WEEKDAY = 6
+
+# Days per bucket of the weekly load histogram
+WEEK_DAYS = 7
+
+
+def week_start(day: int) -> int:
+    """Day number of the first day of the week containing a day."""
+    return day - (date.fromordinal(day).weekday() - FIRST_WEEKDAY) % 7
+
+
+def _daily_changes(spans: Iterable[Tuple[int, int]], first_day: int,
+                   last_day: int) -> List[Tuple[int, int, int]]:
+    """
+    Changes in the number of running schedules, clipped to a day range.
+    
+    Schedules that end before they start are ignored.
+    
+    Returns:
+        (day, net change, schedules starting) for each day with a change, in day order
+    """
+    events = sorted(itertools.chain.from_iterable(
+        ((max(start_day, first_day), 1), (min(end_day, last_day) + 1, -1))
+        for start_day, end_day in spans
+        if start_day <= end_day and start_day <= last_day and end_day >= first_day
+    ))
+    changes = []
+    for day, group in itertools.groupby(events, key=lambda event: event[0]):
+        deltas = [delta for _, delta in group]
+        changes.append((day, sum(deltas), deltas.count(1)))
+    return changes
+
+
+def peak_concurrency(spans: Iterable[Tuple[int, int]], first_day: int,
+                     last_day: int) -> Tuple[int, Optional[int]]:
+    """
+    Largest number of schedules running on the same day of a range.
+    
+    Args:
+        spans: (start_day, end_day) of each schedule
+        first_day: First day of the range
+        last_day: Last day of the range
+    
+    Returns:
+        (peak, first day the peak is reached), or (0, None) if no schedule
+        overlaps the range
+    """
+    running = peak = 0
+    peak_day = None
+    for day, change, _ in _daily_changes(spans, first_day, last_day):
+        running += change
+        if running > peak:
+            peak, peak_day = running, day
+    return peak, peak_day
+
+
+def load_histogram(spans: Iterable[Tuple[int, int]], first_day: int, last_day: int,
+                   bucket_days: int = WEEK_DAYS) -> List[Tuple[int, int, int, int]]:
+    """
+    Load of a day range in consecutive buckets (weeks by default).
+    
+    Args:
+        spans: (start_day, end_day) of each schedule
+        first_day: First day of the first bucket
+        last_day: Last day of the range (the last bucket may be shorter)
+        bucket_days: Days per bucket
+    
+    Returns:
+        (first day, schedules overlapping the bucket, peak schedules running
+        on one day, schedule-days) for each bucket, in day order
+    """
+    changes = _daily_changes(spans, first_day, last_day)
+    buckets = []
+    index = 0
+    running = 0
+    for bucket_first in range(first_day, last_day + 1, bucket_days):
+        bucket_end = min(bucket_first + bucket_days, last_day + 1)
+        # Schedules running on the bucket's first day, then those starting later in it
+        if index < len(changes) and changes[index][0] == bucket_first:
+            running += changes[index][1]
+            index += 1
+        overlapping = running
+        
+        day = bucket_first
+        peak = load = 0
+        while index < len(changes) and changes[index][0] < bucket_end:
+            change_day, change, started = changes[index]
+            # `running` schedules ran from `day` up to the day before the change
+            peak = max(peak, running)
+            load += running * (change_day - day)
+            running += change
+            overlapping += started
+            day = change_day
+            index += 1
+        peak = max(peak, running)
+        load += running * (bucket_end - day)
+        buckets.append((bucket_first, overlapping, peak, load))
+    return buckets
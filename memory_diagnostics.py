@@ -0,0 +1,199 @@
+# File: memory_diagnostics.py
+"""
+Memory diagnostics for long sessions of the Architecture Project Manager.
+A MemoryTracker takes a baseline after the application has started and
+then, after each tab switch, measures what the session holds: memory
+allocated by Python (tracemalloc), objects tracked by the garbage collector,
+Tk widgets, Tcl commands (every Python callback bound to a widget is one) and
+pending after() callbacks. Each measurement is logged with its growth since
+the previous one and since the baseline; the report at the end lists the
+growth per switch and the source lines that allocated the memory that was
+not released. Anything that keeps growing with the number of switches is a
+leak.
+
+Enable it in the application by setting the APM_MEMORY_DIAGNOSTICS
+environment variable to 1; the log and report are written to the profiles
+folder. soak.py switches tabs thousands of times under a tracker and fails
+if memory grows.
+"""
+
+import gc
+import os
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional
+from profiler import DEFAULT_OUTPUT_DIR
+
+
+# Environment variable enabling memory diagnostics in the application
+MEMORY_ENV_VAR = "APM_MEMORY_DIAGNOSTICS"
+
+# Stack frames stored per allocation
+DEFAULT_TRACE_FRAMES = 10
+
+# Allocation sites listed in the report
+DEFAULT_TOP_SITES = 20
+
+# Counters measured after each switch, in report order
+MEASURES = ['traced_bytes', 'objects', 'widgets', 'tcl_commands', 'after_callbacks']
+
+
+def memory_diagnostics_enabled() -> bool:
+    """Whether memory diagnostics are enabled for the application."""
+    return os.environ.get(MEMORY_ENV_VAR, '').strip().lower() in ('1', 'true', 'yes')
+
+
+def count_widgets(widget) -> int:
+    """Number of widgets under a widget (including itself), also those not shown."""
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+class MemoryTracker:
+    """Measures the memory held by a Tk application between tab switches."""
+    
+    def __init__(self, root, output_dir: str = DEFAULT_OUTPUT_DIR, sample_every: int = 1,
+                 top: int = DEFAULT_TOP_SITES):
+        """
+        Initialize the tracker (call start once the application is up).
+        
+        Args:
+            root: Tk root window of the application
+            output_dir: Folder of the memory log and report
+            sample_every: Switches between measurements (each one runs a full
+                garbage collection)
+            top: Allocation sites listed in the report
+        """
+        self.root = root
+        self.output_dir = output_dir
+        self.sample_every = sample_every
+        self.top = top
+        self.log_path = os.path.join(output_dir, "memory.log")
+        
+        self.switches = 0
+        self.baseline: Dict[str, int] = {}
+        self.last: Dict[str, int] = {}
+        self._baseline_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._started_tracing = False
+        self._started_at = 0.0
+    
+    def measure(self) -> Dict[str, int]:
+        """
+        Collect garbage and measure the application.
+        
+        Returns:
+            Value of each of MEASURES
+        """
+        gc.collect()
+        tk = self.root.tk
+        return {
+            'traced_bytes': tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0,
+            'objects': len(gc.get_objects()),
+            'widgets': count_widgets(self.root),
+            'tcl_commands': len(tk.splitlist(tk.call('info', 'commands'))),
+            'after_callbacks': len(tk.splitlist(tk.call('after', 'info'))),
+        }
+    
+    def start(self) -> None:
+        """Start tracing allocations and take the baseline."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(DEFAULT_TRACE_FRAMES)
+            self._started_tracing = True
+        self._started_at = time.monotonic()
+        self.switches = 0
+        self.baseline = self.last = self.measure()
+        self._baseline_snapshot = self._snapshot()
+        self._log("baseline", self.baseline)
+    
+    def record(self, label: str) -> None:
+        """
+        Count a tab switch, and measure and log the growth every sample_every switches.
+        
+        Args:
+            label: View switched to
+        """
+        if not self.baseline:
+            return
+        self.switches += 1
+        if self.switches % self.sample_every:
+            return
+        values = self.measure()
+        self._log(label, values)
+        self.last = values
+    
+    def growth(self) -> Dict[str, int]:
+        """Growth of each measure from the baseline to the last measurement."""
+        return {name: self.last[name] - self.baseline[name] for name in MEASURES}
+    
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        """Snapshot of the traced allocations, without the tracker's own."""
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+    
+    def _log(self, label: str, values: Dict[str, int]) -> None:
+        """Append a measurement to the memory log."""
+        changes = " ".join(f"{name}={values[name]} ({values[name] - self.last.get(name, values[name]):+d}, "
+                           f"{values[name] - self.baseline.get(name, values[name]):+d} total)"
+                           for name in MEASURES)
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(self.log_path, 'a', encoding='utf-8') as file:
+                file.write(f"{datetime.now().isoformat(timespec='seconds')} "
+                           f"switch {self.switches} {label}: {changes}\n")
+        except OSError as e:
+            print(f"Error writing memory log: {e}")
+    
+    def report(self) -> str:
+        """
+        Summarize the memory growth of the session.
+        
+        Returns:
+            Report text with the growth of each measure and the allocation
+            sites holding the most memory not held at the baseline
+        """
+        elapsed = time.monotonic() - self._started_at
+        growth = self.growth()
+        lines = [f"{self.switches} tab switches over {elapsed:.0f} s", "",
+                 f"{'measure':<16} {'baseline':>12} {'last':>12} {'growth':>10} {'per switch':>12}"]
+        for name in MEASURES:
+            per_switch = growth[name] / self.switches if self.switches else 0.0
+            lines.append(f"{name:<16} {self.baseline[name]:>12} {self.last[name]:>12} "
+                         f"{growth[name]:>+10} {per_switch:>+12.2f}")
+        
+        if self._baseline_snapshot and tracemalloc.is_tracing():
+            lines += ["", "Largest growth by allocation site", ""]
+            differences: List[tracemalloc.StatisticDiff] = self._snapshot().compare_to(
+                self._baseline_snapshot, 'traceback')
+            for difference in [d for d in differences if d.size_diff > 0][:self.top]:
+                # Frames run from the outermost call to the allocating line
+                frames = [f"{os.path.basename(frame.filename)}:{frame.lineno}" for frame in difference.traceback]
+                lines.append(f"{difference.size_diff / 1024:+10.1f} KiB {difference.count_diff:+7d} blocks  "
+                             f"{frames[-1]}")
+                lines += [f"{'':>30}called from {frame}" for frame in reversed(frames[-4:-1])]
+        return "\n".join(lines) + "\n"
+    
+    def stop(self) -> Optional[str]:
+        """
+        Write the session report and stop tracing.
+        
+        Returns:
+            Path of the report, or None if nothing was measured or it could not be written
+        """
+        if not self.baseline:
+            return None
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir,
+                                f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-memory.txt")
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(self.report())
+        except OSError as e:
+            print(f"Error writing memory report: {e}")
+            return None
+        finally:
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+        return path
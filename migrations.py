@@ -0,0 +1,596 @@
+# File: migrations.py
+"""
+Versioned schema migrations for the Architecture Project Manager database.
+The schema version is tracked in PRAGMA user_version. Each migration runs its
+schema steps in one short transaction, backfills existing rows in bounded
+batches (one transaction per batch, progress recorded with the batch) and is
+stamped as applied only once its backfill has completed, so an interrupted
+migration resumes where it stopped on the next start.
+"""
+
+import sqlite3
+import sys
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+from schema import ContactSchema
+from project_schema import ProjectSchema
+from gazetteer import get_gazetteer
+from performance import ProfileArg, connect
+
+
+# Rows per backfill transaction; keeps each write lock short on large databases
+DEFAULT_BATCH_SIZE = 5000
+
+# Seconds to wait for a competing writer before a step fails
+BUSY_TIMEOUT_SECONDS = 30
+
+# Table holding the resume point of backfills that have not finished yet
+PROGRESS_TABLE_NAME = "migration_progress"
+
+# A schema step receives an open connection; a backfill step receives
+# (conn, last_id, batch_size, cache) and returns (new_last_id, rows_changed),
+# or None when there is nothing left to do
+SchemaStep = Callable[[sqlite3.Connection], None]
+BackfillStep = Callable[[sqlite3.Connection, int, int, Dict], Optional[Tuple[int, int]]]
+
+
+def add_column(table: str, column: str, definition: str) -> SchemaStep:
+    """Schema step adding a column unless it already exists."""
+    def step(conn: sqlite3.Connection) -> None:
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return step
+
+
+def execute(*statements: str) -> SchemaStep:
+    """Schema step running idempotent SQL statements (CREATE ... IF NOT EXISTS)."""
+    def step(conn: sqlite3.Connection) -> None:
+        for sql in statements:
+            conn.execute(sql)
+    return step
+
+
+def create_state_lookup(conn: sqlite3.Connection) -> None:
+    """Schema step creating the project state lookup table with the codes of the standard states."""
+    conn.execute("CREATE TABLE IF NOT EXISTS project_states (code INTEGER PRIMARY KEY, label TEXT NOT NULL UNIQUE)")
+    conn.executemany(
+        f"INSERT OR IGNORE INTO {ProjectSchema.STATES_TABLE_NAME} (code, label) VALUES (?, ?)",
+        [(code, state) for state, code in ProjectSchema.STATE_CODES.items()]
+    )
+
+
+def table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    """Whether a table (or virtual table) exists in the main database."""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (name,)).fetchone() is not None
+
+
+def create_location_index(conn: sqlite3.Connection) -> None:
+    """
+    Schema step creating the location R*Tree.
+    
+    Skipped (projects are then not located) if SQLite was built without the
+    R*Tree module.
+    """
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS project_locations USING rtree("
+                     "id, min_latitude, max_latitude, min_longitude, max_longitude, +latitude, +longitude)")
+    except sqlite3.OperationalError as e:
+        if 'rtree' not in str(e):
+            raise
+        print(f"Project locations not indexed: {e}")
+
+
+def _split_definitions(create_sql: str) -> List[str]:
+    """Column and constraint definitions of a CREATE TABLE statement (split on top-level commas)."""
+    body = create_sql[create_sql.index('(') + 1:create_sql.rindex(')')]
+    definitions, depth, start = [], 0, 0
+    for index, char in enumerate(body):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            definitions.append(body[start:index].strip())
+            start = index + 1
+    definitions.append(body[start:].strip())
+    return definitions
+
+
+def drop_column(table: str, column: str) -> SchemaStep:
+    """
+    Schema step dropping a column unless it is already gone (it must not be indexed).
+    
+    SQLite before 3.35 cannot drop columns; the table is then rebuilt
+    without it: created from its own definitions minus the column, copied,
+    swapped in and its indexes recreated. Needs foreign key enforcement off
+    (the migration connection's default).
+    """
+    def step(conn: sqlite3.Connection) -> None:
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        if column not in columns:
+            return
+        if sqlite3.sqlite_version_info >= (3, 35, 0):
+            conn.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+            return
+        
+        create_sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                  (table,)).fetchone()[0]
+        index_sql = [row[0] for row in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,))]
+        definitions = [definition for definition in _split_definitions(create_sql)
+                       if definition.split()[0].strip('"`[]') != column]
+        kept = ", ".join(name for name in columns if name != column)
+        conn.execute(f"CREATE TABLE {table}_rebuilt ({', '.join(definitions)})")
+        conn.execute(f"INSERT INTO {table}_rebuilt ({kept}) SELECT {kept} FROM {table}")
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_rebuilt RENAME TO {table}")
+        for sql in index_sql:
+            conn.execute(sql)
+    return step
+
+
+def backfill_contact_normalized(conn: sqlite3.Connection, last_id: int, batch_size: int,
+                                cache: Dict) -> Optional[Tuple[int, int]]:
+    """Backfill step computing normalized phone/email for one batch of contacts."""
+    rows = conn.execute(
+        f"SELECT id, phone, email FROM {ContactSchema.TABLE_NAME} "
+        f"WHERE id > ? AND (phone_normalized IS NULL OR email_normalized IS NULL) "
+        f"ORDER BY id LIMIT ?",
+        (last_id, batch_size)
+    ).fetchall()
+    if not rows:
+        return None
+    
+    conn.executemany(
+        f"UPDATE {ContactSchema.TABLE_NAME} SET phone_normalized = ?, email_normalized = ? WHERE id = ?",
+        [(ContactSchema.normalize_phone(phone), ContactSchema.normalize_email(email), contact_id)
+         for contact_id, phone, email in rows]
+    )
+    return rows[-1][0], len(rows)
+
+
+def backfill_customer_links(conn: sqlite3.Connection, last_id: int, batch_size: int,
+                            cache: Dict) -> Optional[Tuple[int, int]]:
+    """
+    Backfill step linking one batch of unlinked projects to contacts by customer_name.
+    
+    Contact names are indexed in memory once per run ("first last" and
+    "last first"); ambiguous names are skipped.
+    """
+    if 'contacts_by_name' not in cache:
+        contacts_by_name: Dict[str, set] = {}
+        for contact_id, first_name, last_name in conn.execute(
+                f"SELECT id, first_name, last_name FROM {ContactSchema.TABLE_NAME}"):
+            for name in (f"{first_name} {last_name}", f"{last_name} {first_name}"):
+                contacts_by_name.setdefault(ContactSchema.normalize_name(name), set()).add(contact_id)
+        cache['contacts_by_name'] = contacts_by_name
+    contacts_by_name = cache['contacts_by_name']
+    
+    rows = conn.execute(
+        f"SELECT id, customer_name FROM {ProjectSchema.TABLE_NAME} "
+        f"WHERE id > ? AND customer_id IS NULL ORDER BY id LIMIT ?",
+        (last_id, batch_size)
+    ).fetchall()
+    if not rows:
+        return None
+    
+    updates = []
+    for project_id, customer_name in rows:
+        matches = contacts_by_name.get(ContactSchema.normalize_name(customer_name))
+        if matches and len(matches) == 1:
+            updates.append((next(iter(matches)), project_id))
+    conn.executemany(f"UPDATE {ProjectSchema.TABLE_NAME} SET customer_id = ? WHERE id = ?", updates)
+    return rows[-1][0], len(updates)
+
+
+def backfill_project_days(conn: sqlite3.Connection, last_id: int, batch_size: int,
+                          cache: Dict) -> Optional[Tuple[int, int]]:
+    """Backfill step computing start_day/end_day for one batch of projects."""
+    rows = conn.execute(
+        f"SELECT id, start_date, end_date FROM {ProjectSchema.TABLE_NAME} "
+        f"WHERE id > ? ORDER BY id LIMIT ?",
+        (last_id, batch_size)
+    ).fetchall()
+    if not rows:
+        return None
+    
+    conn.executemany(
+        f"UPDATE {ProjectSchema.TABLE_NAME} SET start_day = ?, end_day = ? WHERE id = ?",
+        [(ProjectSchema.to_day_number(start_date), ProjectSchema.to_day_number(end_date), project_id)
+         for project_id, start_date, end_date in rows]
+    )
+    return rows[-1][0], len(rows)
+
+
+def backfill_project_state_codes(conn: sqlite3.Connection, last_id: int, batch_size: int,
+                                 cache: Dict) -> Optional[Tuple[int, int]]:
+    """
+    Backfill step replacing the state labels of one batch of projects with lookup codes.
+    
+    The label column is cleared as each row gets its code. Labels other than
+    the standard states are added to the lookup table as they are found.
+    """
+    if 'state_codes' not in cache:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({ProjectSchema.TABLE_NAME})")}
+        if 'state' not in columns:
+            return None  # Created with state codes
+        cache['state_codes'] = dict(conn.execute(f"SELECT label, code FROM {ProjectSchema.STATES_TABLE_NAME}"))
+    state_codes = cache['state_codes']
+    
+    rows = conn.execute(
+        f"SELECT id, state FROM {ProjectSchema.TABLE_NAME} "
+        f"WHERE id > ? AND state IS NOT NULL ORDER BY id LIMIT ?",
+        (last_id, batch_size)
+    ).fetchall()
+    if not rows:
+        return None
+    
+    updates = []
+    for project_id, state in rows:
+        state = str(state).strip()
+        if state and state not in state_codes:
+            state_codes[state] = conn.execute(
+                f"INSERT INTO {ProjectSchema.STATES_TABLE_NAME} (label) VALUES (?)", (state,)
+            ).lastrowid
+        updates.append((state_codes.get(state), project_id))
+    conn.executemany(
+        f"UPDATE {ProjectSchema.TABLE_NAME} SET state_code = ?, state = NULL WHERE id = ?", updates
+    )
+    return rows[-1][0], len(rows)
+
+
+def find_location_point(conn: sqlite3.Connection, latitude: float, longitude: float) -> int:
+    """
+    ID of the location R*Tree point at the given coordinates, added if there is none.
+    
+    The R*Tree stores boxes with single precision, rounded outwards, so the
+    point is found with a box query and matched on its exact coordinates.
+    """
+    row = conn.execute(
+        f"SELECT id FROM {ProjectSchema.LOCATIONS_TABLE_NAME} "
+        f"WHERE max_latitude >= ? AND min_latitude <= ? AND max_longitude >= ? AND min_longitude <= ? "
+        f"AND latitude = ? AND longitude = ?",
+        (latitude, latitude, longitude, longitude, latitude, longitude)
+    ).fetchone()
+    if row:
+        return row[0]
+    return conn.execute(
+        f"INSERT INTO {ProjectSchema.LOCATIONS_TABLE_NAME} VALUES (NULL, ?, ?, ?, ?, ?, ?)",
+        (latitude, latitude, longitude, longitude, latitude, longitude)
+    ).lastrowid
+
+
+def backfill_project_locations(conn: sqlite3.Connection, last_id: int, batch_size: int,
+                               cache: Dict) -> Optional[Tuple[int, int]]:
+    """
+    Backfill step geocoding the locations of one batch of projects to location R*Tree points.
+    
+    Every project of the batch is written (NULL if its location names no known
+    locality), so the step also refreshes the locations after the gazetteer
+    has changed.
+    """
+    if 'points' not in cache:
+        if not table_exists(conn, ProjectSchema.LOCATIONS_TABLE_NAME):
+            return None
+        cache['points'] = {}
+    points = cache['points']
+    
+    rows = conn.execute(
+        f"SELECT id, location FROM {ProjectSchema.TABLE_NAME} WHERE id > ? ORDER BY id LIMIT ?",
+        (last_id, batch_size)
+    ).fetchall()
+    if not rows:
+        return None
+    
+    gazetteer = get_gazetteer()
+    updates = []
+    for project_id, location in rows:
+        coordinates = gazetteer.geocode(location)
+        if coordinates and coordinates not in points:
+            points[coordinates] = find_location_point(conn, *coordinates)
+        updates.append((points.get(coordinates), project_id))
+    conn.executemany(f"UPDATE {ProjectSchema.TABLE_NAME} SET location_id = ? WHERE id = ?", updates)
+    return rows[-1][0], sum(1 for point_id, _ in updates if point_id is not None)
+
+
+def backfill_project_state_history(conn: sqlite3.Connection, last_id: int, batch_size: int,
+                                   cache: Dict) -> Optional[Tuple[int, int]]:
+    """
+    Backfill step starting the state history of one batch of projects.
+    
+    The current state is recorded as entered on the day of the migration
+    (earlier changes were not kept).
+    """
+    rows = conn.execute(
+        f"SELECT id, state_code, is_active FROM {ProjectSchema.TABLE_NAME} WHERE id > ? ORDER BY id LIMIT ?",
+        (last_id, batch_size)
+    ).fetchall()
+    if not rows:
+        return None
+    
+    today = cache.setdefault('today', date.today().toordinal())
+    conn.executemany(
+        f"INSERT INTO {ProjectSchema.STATE_HISTORY_TABLE_NAME} "
+        f"(project_id, changed_day, state_code, is_active, state_since_day) VALUES (?, ?, ?, ?, ?)",
+        [(project_id, today, state_code, 1 if is_active else 0, today) for project_id, state_code, is_active in rows]
+    )
+    return rows[-1][0], len(rows)
+
+
+def run_backfill(conn: sqlite3.Connection, backfill: BackfillStep,
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Run a backfill step to completion outside the migration runner.
+    
+    Args:
+        conn: Open database connection
+        backfill: Backfill step function
+        batch_size: Number of rows per transaction
+    
+    Returns:
+        Total number of rows changed
+    """
+    changed = 0
+    last_id = 0
+    cache: Dict = {}
+    while True:
+        with conn:
+            result = backfill(conn, last_id, batch_size, cache)
+        if result is None:
+            return changed
+        last_id, batch_changed = result
+        changed += batch_changed
+
+
+class Migration:
+    """One numbered schema migration."""
+    
+    def __init__(self, version: int, description: str,
+                 schema_steps: Optional[List[SchemaStep]] = None,
+                 backfill: Optional[BackfillStep] = None,
+                 final_steps: Optional[List[SchemaStep]] = None):
+        """
+        Initialize a migration.
+        
+        Args:
+            version: Schema version reached once this migration is applied
+            description: Human readable summary
+            schema_steps: Idempotent DDL steps, run in one short transaction
+            backfill: Optional batched data backfill, run after the schema steps
+            final_steps: Idempotent steps run after the backfill (e.g. creating
+                indexes, which is much cheaper than maintaining them row by row)
+        """
+        self.version = version
+        self.description = description
+        self.schema_steps = schema_steps or []
+        self.backfill = backfill
+        self.final_steps = final_steps or []
+
+
+# All migrations, in version order. Steps must be idempotent: databases created
+# before migrations existed (user_version 0) may already have some of the changes.
+# Never edit an applied migration; append a new one instead. Each migration's
+# DDL is spelled out as it was when the migration was added, so later changes
+# to the schema classes cannot change what it does.
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1, "Create contacts and projects tables",
+        schema_steps=[execute(
+            "CREATE TABLE IF NOT EXISTS contacts (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "first_name TEXT NOT NULL, last_name TEXT NOT NULL, phone TEXT, email TEXT, address TEXT)",
+            "CREATE TABLE IF NOT EXISTS projects (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "customer_name TEXT NOT NULL, location TEXT, start_date TEXT, end_date TEXT, "
+            "is_active BOOLEAN, state TEXT)"
+        )]
+    ),
+    Migration(
+        2, "Add normalized phone/email columns to contacts",
+        schema_steps=[add_column("contacts", "phone_normalized", "TEXT"),
+                      add_column("contacts", "email_normalized", "TEXT")],
+        backfill=backfill_contact_normalized,
+        final_steps=[execute(
+            "CREATE INDEX IF NOT EXISTS idx_contacts_phone_normalized ON contacts (phone_normalized)",
+            "CREATE INDEX IF NOT EXISTS idx_contacts_email_normalized ON contacts (email_normalized)"
+        )]
+    ),
+    Migration(
+        3, "Link projects to customer and consultant contacts",
+        schema_steps=[add_column("projects", "customer_id", "INTEGER REFERENCES contacts(id) ON DELETE SET NULL"),
+                      execute("CREATE TABLE IF NOT EXISTS project_consultants ("
+                              "project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE, "
+                              "contact_id INTEGER NOT NULL REFERENCES contacts(id) ON DELETE CASCADE, "
+                              "PRIMARY KEY (project_id, contact_id)) WITHOUT ROWID")],
+        backfill=backfill_customer_links,
+        final_steps=[execute(
+            "CREATE INDEX IF NOT EXISTS idx_projects_customer_id ON projects (customer_id)",
+            "CREATE INDEX IF NOT EXISTS idx_project_consultants_contact_id "
+            "ON project_consultants (contact_id, project_id)",
+            "CREATE INDEX IF NOT EXISTS idx_projects_state_end_date ON projects (state, end_date)"
+        )]
+    ),
+    Migration(
+        4, "Create projects archive table",
+        schema_steps=[execute("CREATE TABLE IF NOT EXISTS main.projects_archive (id INTEGER PRIMARY KEY, "
+                              "customer_name TEXT NOT NULL, location TEXT, start_date TEXT, end_date TEXT, "
+                              "is_active BOOLEAN, state TEXT, customer_id INTEGER, archived_at TEXT NOT NULL)")]
+    ),
+    Migration(
+        5, "Add indexed day-number date columns to projects",
+        schema_steps=[add_column("projects", "start_day", "INTEGER"),
+                      add_column("projects", "end_day", "INTEGER")],
+        backfill=backfill_project_days,
+        final_steps=[execute(
+            "DROP INDEX IF EXISTS idx_projects_state_end_date",
+            "CREATE INDEX IF NOT EXISTS idx_projects_end_day_start_day ON projects (end_day, start_day)",
+            "CREATE INDEX IF NOT EXISTS idx_projects_state_end_day ON projects (state, end_day)"
+        )]
+    ),
+    Migration(
+        6, "Index contact and customer names for name-ordered paging",
+        schema_steps=[execute(
+            "CREATE INDEX IF NOT EXISTS idx_contacts_last_name_first_name ON contacts (last_name, first_name)",
+            "CREATE INDEX IF NOT EXISTS idx_projects_customer_name ON projects (customer_name)"
+        )]
+    ),
+    Migration(
+        7, "Store project states as codes of a lookup table",
+        # The label index is dropped first so the backfill does not maintain it
+        schema_steps=[create_state_lookup,
+                      add_column("projects", "state_code", "INTEGER REFERENCES project_states(code)"),
+                      execute("DROP INDEX IF EXISTS idx_projects_state_end_day")],
+        backfill=backfill_project_state_codes,
+        final_steps=[execute(
+            "CREATE INDEX IF NOT EXISTS idx_projects_state_code_end_day ON projects (state_code, end_day)"
+        )]
+    ),
+    Migration(
+        8, "Geocode project locations to points of an R*Tree",
+        schema_steps=[create_location_index, add_column("projects", "location_id", "INTEGER")],
+        backfill=backfill_project_locations,
+        final_steps=[execute("CREATE INDEX IF NOT EXISTS idx_projects_location_id ON projects (location_id)")]
+    ),
+    Migration(
+        9, "Keep an append-only history of project states",
+        schema_steps=[execute(
+            "CREATE TABLE IF NOT EXISTS project_state_history (id INTEGER PRIMARY KEY, "
+            "project_id INTEGER NOT NULL, changed_day INTEGER NOT NULL, state_code INTEGER, is_active INTEGER, "
+            "state_since_day INTEGER NOT NULL, left_state_code INTEGER, left_state_days INTEGER)"
+        )],
+        backfill=backfill_project_state_history,
+        final_steps=[execute(
+            "CREATE INDEX IF NOT EXISTS idx_project_state_history_project_day "
+            "ON project_state_history (project_id, changed_day)",
+            "CREATE INDEX IF NOT EXISTS idx_project_state_history_left_state "
+            "ON project_state_history (left_state_code, changed_day, left_state_days)"
+        )]
+    ),
+    Migration(
+        10, "Drop the state label column cleared by migration 7",
+        schema_steps=[drop_column("projects", "state")]
+    ),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+class MigrationRunner:
+    """Applies pending migrations to a database."""
+    
+    def __init__(self, db_path: str = "contacts.db", batch_size: int = DEFAULT_BATCH_SIZE,
+                 on_progress: Optional[Callable[[Migration, int], None]] = None,
+                 profile: ProfileArg = None):
+        """
+        Initialize the migration runner.
+        
+        Args:
+            db_path: Path to SQLite database file
+            batch_size: Number of rows per backfill transaction
+            on_progress: Called with (migration, rows_changed_so_far) after each batch
+            profile: Performance profile or profile name; its page size is used
+                when the migrations create a new database
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.on_progress = on_progress
+        self.profile = profile
+    
+    def get_version(self) -> int:
+        """Get the schema version of the database."""
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+    
+    def get_pending(self) -> List[Migration]:
+        """Get the migrations not applied to the database yet."""
+        version = self.get_version()
+        return [migration for migration in MIGRATIONS if migration.version > version]
+    
+    def migrate(self, to_version: Optional[int] = None) -> List[int]:
+        """
+        Apply all pending migrations.
+        
+        Args:
+            to_version: Stop after this version (default: LATEST_VERSION)
+        
+        Returns:
+            Versions of the migrations applied
+        
+        Raises:
+            sqlite3.Error: If a migration step fails (applied batches are kept
+                and the migration resumes from them on the next run)
+        """
+        applied = []
+        conn = connect(self.db_path, self.profile, timeout=BUSY_TIMEOUT_SECONDS)
+        try:
+            with conn:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {PROGRESS_TABLE_NAME} "
+                             f"(version INTEGER PRIMARY KEY, last_id INTEGER NOT NULL)")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            
+            for migration in MIGRATIONS:
+                if migration.version <= version:
+                    continue
+                if to_version is not None and migration.version > to_version:
+                    break
+                self._apply(conn, migration)
+                applied.append(migration.version)
+        finally:
+            conn.close()
+        return applied
+    
+    def _apply(self, conn: sqlite3.Connection, migration: Migration) -> None:
+        """Apply one migration: schema steps, batched backfill, final steps, version stamp."""
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for step in migration.schema_steps:
+                step(conn)
+        
+        if migration.backfill:
+            row = conn.execute(f"SELECT last_id FROM {PROGRESS_TABLE_NAME} WHERE version = ?",
+                               (migration.version,)).fetchone()
+            last_id = row[0] if row else 0
+            changed = 0
+            cache: Dict = {}
+            while True:
+                with conn:
+                    result = migration.backfill(conn, last_id, self.batch_size, cache)
+                    if result is None:
+                        break
+                    last_id, batch_changed = result
+                    # Saved in the same transaction as the batch itself
+                    conn.execute(f"INSERT OR REPLACE INTO {PROGRESS_TABLE_NAME} (version, last_id) "
+                                 f"VALUES (?, ?)", (migration.version, last_id))
+                changed += batch_changed
+                if self.on_progress:
+                    self.on_progress(migration, changed)
+        
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for step in migration.final_steps:
+                step(conn)
+            conn.execute(f"DELETE FROM {PROGRESS_TABLE_NAME} WHERE version = ?", (migration.version,))
+            conn.execute(f"PRAGMA user_version = {migration.version}")
+
+
+def main():
+    """Report the schema version and apply pending migrations: migrations.py [db_path]."""
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "contacts.db"
+    runner = MigrationRunner(
+        db_path,
+        on_progress=lambda migration, changed: print(f"  migration {migration.version}: {changed} rows")
+    )
+    
+    version = runner.get_version()
+    pending = runner.get_pending()
+    print(f"Schema version {version} (latest {LATEST_VERSION}), {len(pending)} pending")
+    for migration in pending:
+        print(f"  {migration.version}: {migration.description}")
+    
+    applied = runner.migrate()
+    if applied:
+        print(f"Migrated to version {applied[-1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,34 +4,142 @@ Model layer for the Contact Management System.
 Handles all database operations and data persistence.
 """
 
+import contextlib
 import sqlite3
 import os
 from typing import List, Dict, Optional, Tuple
 from schema import ContactSchema
+from connection_pool import ConnectionPool
+from performance import ProfileArg, connect
+from replica import ReadReplica
+from write_behind import PendingWrite, WriteBehindQueue
+from migrations import MigrationRunner, DEFAULT_BATCH_SIZE, backfill_contact_normalized, run_backfill
 
 
 class ContactModel:
     """Model class for managing contact data in SQLite database."""
     
-    def __init__(self, db_path: str = "contacts.db"):
+    def __init__(self, db_path: str = "contacts.db", pool: Optional[ConnectionPool] = None,
+                 profile: ProfileArg = None, replica: Optional[ReadReplica] = None,
+                 write_behind: Optional[WriteBehindQueue] = None):
         """
         Initialize the contact model with database connection.
         
         Args:
             db_path: Path to SQLite database file
+            pool: Optional connection pool to reuse connections from (by default
+                every call opens its own connection)
+            profile: Performance profile or profile name for the connections the
+                model opens (default: the configured profile, see performance.py)
+            replica: Optional in-memory read replica to serve reads from (writes
+                still go to db_path)
+            write_behind: Optional queue that creates, updates and deletes are
+                handed to, to be written in groups on a background thread
         """
         self.db_path = db_path
+        self.pool = pool
+        self.profile = profile
+        self.replica = replica
+        self.write_behind = write_behind
         self._init_database()
     
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open a connection to the database file (or take one from the pool)."""
+        if self.pool:
+            return self.pool.acquire()
+        if self.replica:
+            return self.replica.connect_for_write()
+        return connect(self.db_path, self.profile)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Get a connection for one call (use it as a `with` block)."""
+        if self.write_behind:
+            group = self.write_behind.group_connection()
+            if group:
+                return group
+            # Queued writes go first
+            self.write_behind.flush()
+        return self._open_connection()
+    
+    def _read_connect(self, flush_pending: bool = True) -> sqlite3.Connection:
+        """
+        Get a connection for a read-only call (from the read replica, if any).
+        
+        Args:
+            flush_pending: Wait for queued writes first (False for reads that
+                show queued writes themselves)
+        """
+        if self.write_behind and flush_pending:
+            self.write_behind.flush()
+        if self.replica:
+            return self.replica.connect_for_read()
+        return self._open_connection()
+    
+    def _queues_writes(self) -> bool:
+        """Whether writes go to the write-behind queue instead of the database."""
+        return self.write_behind is not None and self.write_behind.accepts_writes()
+    
+    def _queue_write(self, description: str, apply, action: str, record_ids: List[int],
+                     record: Optional[Dict[str, str]] = None) -> None:
+        """Hand a write to the write-behind queue (see PendingWrite)."""
+        self.write_behind.submit(PendingWrite(description, apply, self._open_connection, self.db_path,
+                                              ContactSchema.TABLE_NAME, action, record_ids, record))
+    
+    def _resolve_id(self, contact_id: int) -> int:
+        """Map the temporary ID of a queued create to the real ID, once it is written."""
+        contact_id = int(contact_id)
+        return self.write_behind.resolve_id(contact_id) if self.write_behind else contact_id
+    
+    def _pending_view(self):
+        """Context for reads that show queued writes (see WriteBehindQueue.consistent_view)."""
+        return self.write_behind.consistent_view() if self.write_behind else contextlib.nullcontext()
+    
+    def _show_pending(self, contacts: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Apply queued writes to contacts read from the database, keeping the list order."""
+        if not self.write_behind:
+            return contacts
+        shown = self.write_behind.apply_pending(ContactSchema.TABLE_NAME, contacts)
+        if shown is not contacts:
+            shown.sort(key=lambda contact: (contact['last_name'], contact['first_name']))
+        return shown
+    
+    @staticmethod
+    def _display_record(contact_data: Dict[str, str]) -> Dict[str, str]:
+        """Contact fields as the read methods return them."""
+        return {field: (contact_data.get(field) or '').strip() for field in ContactSchema.DISPLAY_ORDER}
+    
+    @staticmethod
+    def _describe(contact_data: Dict[str, str]) -> str:
+        """Contact name for messages about queued writes."""
+        return f"{contact_data.get('first_name', '')} {contact_data.get('last_name', '')}".strip()
+    
     def _init_database(self) -> None:
-        """Initialize database and create contacts table if it doesn't exist."""
+        """Initialize database and apply pending schema migrations."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute(ContactSchema.get_create_table_sql())
-                conn.commit()
+            MigrationRunner(self.db_path, profile=self.profile).migrate()
         except sqlite3.Error as e:
             raise Exception(f"Database initialization failed: {e}")
     
+    def backfill_normalized_columns(self, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Compute normalized phone/email for rows that do not have them yet.
+        
+        Rows are processed in id order, one short transaction per batch, so the
+        database stays writable for other connections while this runs.
+        
+        Args:
+            batch_size: Number of rows per transaction
+            
+        Returns:
+            Number of rows updated
+        """
+        try:
+            with self._connect() as conn:
+                return run_backfill(conn, backfill_contact_normalized, batch_size)
+        except sqlite3.Error as e:
+            print(f"Error backfilling normalized contact columns: {e}")
+            return 0
+    
     def create_contact(self, contact_data: Dict[str, str]) -> Tuple[bool, str]:
         """
         Create a new contact in the database.
@@ -47,25 +155,81 @@ class ContactModel:
         if validation_errors:
             return False, "; ".join(validation_errors)
         
+        if self._queues_writes():
+            self._queue_write(f"Creating contact {self._describe(contact_data)}",
+                              lambda: self.create_contact(contact_data), 'create',
+                              [self.write_behind.new_temp_id()], self._display_record(contact_data))
+            return True, "Contact created successfully"
+        
         try:
             # Prepare data for insertion (exclude id)
             fields = [field for field in ContactSchema.DISPLAY_ORDER]
             values = [contact_data.get(field, '').strip() for field in fields]
             
+            # Add derived columns
+            derived = ContactSchema.get_derived_values(contact_data)
+            fields += list(derived.keys())
+            values += list(derived.values())
+            
             placeholders = ", ".join(["?"] * len(fields))
             field_names = ", ".join(fields)
             
             sql = f"INSERT INTO {ContactSchema.TABLE_NAME} ({field_names}) VALUES ({placeholders})"
             
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute(sql, values)
+            with self._connect() as conn:
+                cursor = conn.execute(sql, values)
                 conn.commit()
                 
+            if self.write_behind:
+                self.write_behind.record_created(cursor.lastrowid)
             return True, "Contact created successfully"
             
         except sqlite3.Error as e:
             return False, f"Database error: {e}"
     
+    def create_contacts(self, contacts: List[Dict[str, str]]) -> Tuple[bool, str]:
+        """
+        Create several contacts in a single transaction.
+        
+        The whole batch is validated first; nothing is written if any record
+        is invalid.
+        
+        Args:
+            contacts: List of dictionaries containing contact information
+            
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if not contacts:
+            return False, "No contacts to create"
+        
+        errors = ContactSchema.validate_contact_batch(contacts)
+        if errors:
+            index = min(errors)
+            return False, f"Row {index + 1}: " + "; ".join(errors[index])
+        
+        try:
+            derived_fields = list(ContactSchema.DERIVED_COLUMNS.keys())
+            fields = ContactSchema.DISPLAY_ORDER + derived_fields
+            placeholders = ", ".join(["?"] * len(fields))
+            sql = f"INSERT INTO {ContactSchema.TABLE_NAME} ({', '.join(fields)}) VALUES ({placeholders})"
+            
+            rows = []
+            for contact_data in contacts:
+                derived = ContactSchema.get_derived_values(contact_data)
+                rows.append([(contact_data.get(field) or '').strip() for field in ContactSchema.DISPLAY_ORDER]
+                            + [derived[field] for field in derived_fields])
+            
+            with self._connect() as conn:
+                conn.executemany(sql, rows)
+                conn.commit()
+            
+            count = len(rows)
+            return True, f"{count} contact{'s' if count != 1 else ''} created successfully"
+            
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
+    
     def get_all_contacts(self) -> List[Dict[str, str]]:
         """
         Retrieve all contacts from the database.
@@ -74,10 +238,42 @@ class ContactModel:
             List of contact dictionaries
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pending_view(), self._read_connect(flush_pending=False) as conn:
                 conn.row_factory = sqlite3.Row  # Enable column access by name
                 cursor = conn.execute(f"SELECT * FROM {ContactSchema.TABLE_NAME} ORDER BY last_name, first_name")
                 
+                contacts = []
+                for row in cursor:
+                    contact = {}
+                    for column in ContactSchema.COLUMNS.keys():
+                        contact[column] = str(row[column]) if row[column] is not None else ""
+                    contacts.append(contact)
+                
+                return self._show_pending(contacts)
+                
+        except sqlite3.Error as e:
+            print(f"Error retrieving contacts: {e}")
+            return []
+    
+    def get_contacts_page(self, after_id: int = 0, limit: int = 1000) -> List[Dict[str, str]]:
+        """
+        Retrieve one page of contacts in ID order (keyset pagination).
+        
+        Args:
+            after_id: Return contacts with an ID greater than this (0 for the first page)
+            limit: Maximum number of contacts to return
+            
+        Returns:
+            List of contact dictionaries
+        """
+        try:
+            with self._read_connect() as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute(
+                    f"SELECT * FROM {ContactSchema.TABLE_NAME} WHERE id > ? ORDER BY id LIMIT ?",
+                    (after_id, limit)
+                )
+                
                 contacts = []
                 for row in cursor:
                     contact = {}
@@ -102,26 +298,132 @@ class ContactModel:
             Contact dictionary or None if not found
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pending_view(), self._read_connect(flush_pending=False) as conn:
+                contact_id = self._resolve_id(contact_id)
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     f"SELECT * FROM {ContactSchema.TABLE_NAME} WHERE id = ?", 
                     (contact_id,)
                 )
                 
+                contacts = []
                 row = cursor.fetchone()
                 if row:
                     contact = {}
                     for column in ContactSchema.COLUMNS.keys():
                         contact[column] = str(row[column]) if row[column] is not None else ""
-                    return contact
+                    contacts.append(contact)
                 
+                # A queued create or update of the contact is shown too
+                for contact in self._show_pending(contacts):
+                    if contact['id'] == str(contact_id):
+                        return contact
                 return None
                 
         except sqlite3.Error as e:
             print(f"Error retrieving contact: {e}")
             return None
     
+    def _find_contacts_by(self, column: str, value: str) -> List[Dict[str, str]]:
+        """
+        Retrieve contacts by exact match on an indexed derived column.
+        
+        Args:
+            column: Derived column name
+            value: Normalized value to match
+            
+        Returns:
+            List of contact dictionaries
+        """
+        if not value:
+            return []
+        
+        try:
+            with self._read_connect() as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute(
+                    f"SELECT * FROM {ContactSchema.TABLE_NAME} WHERE {column} = ?", 
+                    (value,)
+                )
+                
+                contacts = []
+                for row in cursor:
+                    contact = {}
+                    for col in ContactSchema.COLUMNS.keys():
+                        contact[col] = str(row[col]) if row[col] is not None else ""
+                    contacts.append(contact)
+                
+                return contacts
+                
+        except sqlite3.Error as e:
+            print(f"Error looking up contacts: {e}")
+            return []
+    
+    def find_contacts_by_phone(self, phone: str) -> List[Dict[str, str]]:
+        """
+        Find contacts with a given phone number ("who is this number").
+        
+        Args:
+            phone: Phone number in any format ('054-5262331', '+972545262331', ...)
+            
+        Returns:
+            List of matching contact dictionaries
+        """
+        return self._find_contacts_by('phone_normalized', ContactSchema.normalize_phone(phone))
+    
+    def find_contacts_by_email(self, email: str) -> List[Dict[str, str]]:
+        """
+        Find contacts with a given email address (case-insensitive).
+        
+        Args:
+            email: Email address
+            
+        Returns:
+            List of matching contact dictionaries
+        """
+        return self._find_contacts_by('email_normalized', ContactSchema.normalize_email(email))
+    
+    def search_contacts(self, text: str, limit: int = 50) -> List[Dict[str, str]]:
+        """
+        Search contacts by name prefix, phone number or email address.
+        
+        Args:
+            text: First or last name prefix, phone number or email address
+            limit: Maximum number of contacts to return
+        
+        Returns:
+            List of matching contact dictionaries, in ID order
+        """
+        text = " ".join((text or '').split())
+        if not text:
+            return []
+        
+        pattern = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        try:
+            with self._read_connect() as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute(
+                    f"SELECT * FROM {ContactSchema.TABLE_NAME} "
+                    f"WHERE first_name LIKE ? ESCAPE '\\' OR last_name LIKE ? ESCAPE '\\' "
+                    f"OR phone_normalized = ? OR email_normalized = ? "
+                    f"ORDER BY id LIMIT ?",
+                    (pattern, pattern, ContactSchema.normalize_phone(text) or None,
+                     ContactSchema.normalize_email(text), limit)
+                )
+                
+                contacts = []
+                for row in cursor:
+                    contact = {}
+                    for column in ContactSchema.COLUMNS.keys():
+                        contact[column] = str(row[column]) if row[column] is not None else ""
+                    contacts.append(contact)
+                
+                return contacts
+                
+        except sqlite3.Error as e:
+            print(f"Error searching contacts: {e}")
+            return []
+    
     def update_contact(self, contact_id: int, contact_data: Dict[str, str]) -> Tuple[bool, str]:
         """
         Update an existing contact.
@@ -138,16 +440,25 @@ class ContactModel:
         if validation_errors:
             return False, "; ".join(validation_errors)
         
+        if self._queues_writes():
+            self._queue_write(f"Updating contact {self._describe(contact_data)}",
+                              lambda: self.update_contact(contact_id, contact_data), 'update',
+                              [int(contact_id)], self._display_record(contact_data))
+            return True, "Contact updated successfully"
+        
+        contact_id = self._resolve_id(contact_id)
         try:
             # Prepare update statement
-            fields = ContactSchema.DISPLAY_ORDER
+            derived = ContactSchema.get_derived_values(contact_data)
+            fields = ContactSchema.DISPLAY_ORDER + list(derived.keys())
             set_clause = ", ".join([f"{field} = ?" for field in fields])
-            values = [contact_data.get(field, '').strip() for field in fields]
+            values = [contact_data.get(field, '').strip() for field in ContactSchema.DISPLAY_ORDER]
+            values += list(derived.values())
             values.append(contact_id)  # Add ID for WHERE clause
             
             sql = f"UPDATE {ContactSchema.TABLE_NAME} SET {set_clause} WHERE id = ?"
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.execute(sql, values)
                 conn.commit()
                 
@@ -169,8 +480,15 @@ class ContactModel:
         Returns:
             Tuple of (success: bool, message: str)
         """
+        if self._queues_writes():
+            self._queue_write(f"Deleting contact {contact_id}", lambda: self.delete_contact(contact_id),
+                              'delete', [int(contact_id)])
+            return True, "Contact deleted successfully"
+        
+        contact_id = self._resolve_id(contact_id)
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
+                conn.execute("PRAGMA foreign_keys = ON")  # Unlink dependent rows
                 cursor = conn.execute(
                     f"DELETE FROM {ContactSchema.TABLE_NAME} WHERE id = ?", 
                     (contact_id,)
@@ -184,3 +502,42 @@ class ContactModel:
                 
         except sqlite3.Error as e:
             return False, f"Database error: {e}"
+    
+    def delete_contacts(self, contact_ids: List[int]) -> Tuple[bool, str]:
+        """
+        Delete several contacts in a single transaction.
+        
+        Args:
+            contact_ids: IDs of the contacts to delete
+            
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if not contact_ids:
+            return False, "No contacts selected"
+        
+        if self._queues_writes():
+            count = len(contact_ids)
+            self._queue_write(f"Deleting {count} contact{'s' if count != 1 else ''}",
+                              lambda: self.delete_contacts(contact_ids), 'delete',
+                              [int(contact_id) for contact_id in contact_ids])
+            return True, f"{count} contact{'s' if count != 1 else ''} deleted successfully"
+        
+        contact_ids = [self._resolve_id(contact_id) for contact_id in contact_ids]
+        try:
+            with self._connect() as conn:
+                conn.execute("PRAGMA foreign_keys = ON")  # Unlink dependent rows
+                cursor = conn.executemany(
+                    f"DELETE FROM {ContactSchema.TABLE_NAME} WHERE id = ?",
+                    [(contact_id,) for contact_id in contact_ids]
+                )
+                conn.commit()
+                
+                if cursor.rowcount == 0:
+                    return False, "Contacts not found"
+                
+                count = cursor.rowcount
+                return True, f"{count} contact{'s' if count != 1 else ''} deleted successfully"
+                
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
@@ -0,0 +1,136 @@
+# File: performance.py
+"""
+SQLite performance profiles for the Architecture Project Manager.
+A profile is a set of connection PRAGMAs (memory-mapped I/O, page cache,
+temporary storage, sync mode and the page size of new databases) applied by
+connect() to every connection the models open. The profile used by default
+is chosen with the APM_DB_PROFILE environment variable.
+"""
+
+import os
+import sqlite3
+from typing import Dict, Union
+
+
+# Environment variable naming the default profile
+PROFILE_ENV_VAR = "APM_DB_PROFILE"
+
+# Profile used when none is configured
+DEFAULT_PROFILE_NAME = "laptop"
+
+
+class PerformanceProfile:
+    """Connection settings applied to every SQLite connection."""
+    
+    def __init__(self, name: str, description: str, mmap_size: int, cache_size: int,
+                 temp_store: str, synchronous: str, page_size: int):
+        """
+        Initialize a profile.
+        
+        Args:
+            name: Profile name (as used in APM_DB_PROFILE)
+            description: When to use the profile
+            mmap_size: Bytes of the database file read through memory mapping (0 disables it)
+            cache_size: Page cache per connection (negative: KiB, positive: pages)
+            temp_store: Where temporary tables and sort files live (DEFAULT, FILE, MEMORY)
+            synchronous: Sync mode (OFF, NORMAL, FULL)
+            page_size: Page size in bytes; only takes effect on a database with no tables yet
+        """
+        self.name = name
+        self.description = description
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+        self.temp_store = temp_store
+        self.synchronous = synchronous
+        self.page_size = page_size
+    
+    def get_pragmas(self) -> Dict[str, Union[int, str]]:
+        """Get the PRAGMA settings of the profile, in the order they are applied."""
+        return {
+            'page_size': self.page_size,  # First: ignored once the database has content
+            'mmap_size': self.mmap_size,
+            'cache_size': self.cache_size,
+            'temp_store': self.temp_store,
+            'synchronous': self.synchronous
+        }
+    
+    def apply(self, conn: sqlite3.Connection, schema: str = "main") -> None:
+        """
+        Apply the profile to an open connection.
+        
+        Args:
+            conn: Open connection
+            schema: Database of the connection to apply it to (e.g. an attached one)
+        """
+        for pragma, value in self.get_pragmas().items():
+            conn.execute(f"PRAGMA {schema}.{pragma} = {value}")
+
+
+# A profile, a profile name, or None for the configured default
+ProfileArg = Union[str, PerformanceProfile, None]
+
+
+PROFILES = {
+    profile.name: profile for profile in [
+        PerformanceProfile(
+            "laptop", "Database on a local disk (the default)",
+            mmap_size=256 * 1024 * 1024, cache_size=-32000, temp_store="MEMORY",
+            synchronous="FULL", page_size=4096
+        ),
+        # Memory-mapping a file on a network share is unsafe, and every page
+        # read is a network round trip: no mmap, a larger cache and larger pages
+        PerformanceProfile(
+            "shared-drive", "Database on a network share used by several workstations",
+            mmap_size=0, cache_size=-64000, temp_store="MEMORY",
+            synchronous="FULL", page_size=8192
+        ),
+        # Commits skip fsync: a crash or power loss mid-import can corrupt the
+        # database, so use only for one-off imports into a file you can recreate
+        PerformanceProfile(
+            "bulk-import", "One-off bulk imports (no fsync; not crash-safe)",
+            mmap_size=256 * 1024 * 1024, cache_size=-200000, temp_store="MEMORY",
+            synchronous="OFF", page_size=4096
+        ),
+    ]
+}
+
+
+def get_profile(profile: ProfileArg = None) -> PerformanceProfile:
+    """
+    Resolve a profile.
+    
+    Args:
+        profile: Profile or profile name; None for the configured default
+            (APM_DB_PROFILE, or "laptop")
+    
+    Returns:
+        The performance profile
+    
+    Raises:
+        ValueError: If the name is not a known profile
+    """
+    if isinstance(profile, PerformanceProfile):
+        return profile
+    name = profile or os.environ.get(PROFILE_ENV_VAR) or DEFAULT_PROFILE_NAME
+    if name not in PROFILES:
+        raise ValueError(f"Unknown performance profile '{name}' "
+                         f"(choose from: {', '.join(PROFILES)})")
+    return PROFILES[name]
+
+
+def connect(db_path: str, profile: ProfileArg = None,
+            **kwargs) -> sqlite3.Connection:
+    """
+    Open a connection with a performance profile applied.
+    
+    Args:
+        db_path: Path to SQLite database file
+        profile: Profile or profile name (None for the configured default)
+        **kwargs: Passed on to sqlite3.connect
+    
+    Returns:
+        The open connection
+    """
+    conn = sqlite3.connect(db_path, **kwargs)
+    get_profile(profile).apply(conn)
+    return conn
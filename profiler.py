@@ -0,0 +1,254 @@
+# File: profiler.py
+"""
+On-demand profiling of UI actions for diagnosing slowness reported from the field.
+An ActionProfiler wraps controller methods (refresh_projects, show_projects,
+save_contact, ...). Once armed, the next N actions run under cProfile and
+each one writes a .pstats file (for pstats/snakeviz) and a text summary of
+the top functions into the profiles folder. Disarmed, a wrapped action costs
+one attribute check.
+
+For long sessions, the SamplingProfiler instead records the main thread's
+stack every few milliseconds from a background thread, which adds almost no
+overhead, and writes the most frequent functions and stacks when stopped.
+
+In the application, press Ctrl+Shift+P to profile the next actions, or start
+it with APM_PROFILE_ACTIONS=<count> and/or APM_PROFILE_SAMPLE=1.
+"""
+
+import cProfile
+import collections
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Counter, List, Optional
+
+
+# Environment variable: number of actions to profile from startup
+ACTIONS_ENV_VAR = "APM_PROFILE_ACTIONS"
+
+# Environment variable enabling the sampling profiler for the whole session
+SAMPLE_ENV_VAR = "APM_PROFILE_SAMPLE"
+
+# Folder profiles are written to
+DEFAULT_OUTPUT_DIR = "profiles"
+
+# Actions profiled per press of the hotkey
+DEFAULT_ACTION_COUNT = 5
+
+# Functions listed in each summary
+DEFAULT_TOP_FUNCTIONS = 30
+
+# Seconds between stack samples
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+
+def _timestamp() -> str:
+    return datetime.now().strftime("%Y%m%d-%H%M%S")
+
+
+def profile_actions_from_env() -> int:
+    """Number of actions to profile from startup (APM_PROFILE_ACTIONS, 0 if unset or invalid)."""
+    try:
+        return max(int(os.environ.get(ACTIONS_ENV_VAR, '0')), 0)
+    except ValueError:
+        return 0
+
+
+def sampling_enabled() -> bool:
+    """Whether the sampling profiler is enabled for the session."""
+    return os.environ.get(SAMPLE_ENV_VAR, '').strip().lower() in ('1', 'true', 'yes')
+
+
+class ActionProfiler:
+    """Profiles the next N wrapped actions with cProfile."""
+    
+    def __init__(self, output_dir: str = DEFAULT_OUTPUT_DIR, top: int = DEFAULT_TOP_FUNCTIONS,
+                 on_saved: Optional[Callable[[str, str, float], None]] = None):
+        """
+        Initialize the profiler (disarmed).
+        
+        Args:
+            output_dir: Folder to write profiles to (created when needed)
+            top: Functions listed in each summary
+            on_saved: Called with (action, pstats_path, seconds) after each profiled action
+        """
+        self.output_dir = output_dir
+        self.top = top
+        self.on_saved = on_saved
+        self.remaining = 0
+        self._lock = threading.Lock()
+        self._active = False  # An action is being profiled (nested actions run inside it)
+        self._sequence = 0
+    
+    def arm(self, count: int = DEFAULT_ACTION_COUNT) -> None:
+        """Profile the next `count` actions."""
+        with self._lock:
+            self.remaining = count
+    
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """
+        Wrap a function so that it is profiled while the profiler is armed.
+        
+        Args:
+            name: Action name used in file names and summaries
+            func: Function to wrap
+        
+        Returns:
+            The wrapper
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.remaining or not self._start():
+                return func(*args, **kwargs)
+            profile = cProfile.Profile()
+            started = time.perf_counter()
+            try:
+                return profile.runcall(func, *args, **kwargs)
+            finally:
+                self._save(name, profile, time.perf_counter() - started)
+        
+        wrapper.profiled_action = name
+        return wrapper
+    
+    def instrument(self, cls: type, method_names: List[str]) -> None:
+        """
+        Wrap methods of a class (before instances bind them as UI callbacks).
+        
+        Args:
+            cls: Class whose methods to wrap (wrapping twice has no effect)
+            method_names: Names of the methods to wrap
+        """
+        for method_name in method_names:
+            method = getattr(cls, method_name)
+            if not hasattr(method, 'profiled_action'):
+                setattr(cls, method_name, self.wrap(f"{cls.__name__}.{method_name}", method))
+    
+    def _start(self) -> bool:
+        """Claim one of the remaining profiled actions (False if nested or none left)."""
+        with self._lock:
+            if self._active or not self.remaining:
+                return False
+            self._active = True
+            self.remaining -= 1
+            self._sequence += 1
+            return True
+    
+    def _save(self, name: str, profile: cProfile.Profile, seconds: float) -> None:
+        """Write an action's .pstats file and its top-functions summary."""
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            base = os.path.join(self.output_dir, f"{_timestamp()}-{self._sequence:03d}-{name}")
+            profile.dump_stats(base + ".pstats")
+            
+            summary = io.StringIO()
+            summary.write(f"{name}: {seconds * 1000:.1f} ms\n\n")
+            stats = pstats.Stats(profile, stream=summary)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top)
+            with open(base + ".txt", 'w', encoding='utf-8') as file:
+                file.write(summary.getvalue())
+        except OSError as e:
+            print(f"Error saving profile of {name}: {e}")
+            return
+        finally:
+            with self._lock:
+                self._active = False
+        
+        if self.on_saved:
+            self.on_saved(name, base + ".pstats", seconds)
+
+
+class SamplingProfiler:
+    """Samples one thread's stack periodically from a background thread."""
+    
+    def __init__(self, thread: Optional[threading.Thread] = None,
+                 interval: float = DEFAULT_SAMPLE_INTERVAL, output_dir: str = DEFAULT_OUTPUT_DIR,
+                 top: int = DEFAULT_TOP_FUNCTIONS):
+        """
+        Initialize the sampler.
+        
+        Args:
+            thread: Thread to sample (default: the main thread)
+            interval: Seconds between samples
+            output_dir: Folder to write the summary to
+            top: Functions and stacks listed in the summary
+        """
+        self.thread = thread or threading.main_thread()
+        self.interval = interval
+        self.output_dir = output_dir
+        self.top = top
+        self.samples = 0
+        # Collapsed stacks ("outer;...;inner") and functions seen in any frame
+        self.stacks: Counter[str] = collections.Counter()
+        self.inclusive: Counter[str] = collections.Counter()
+        self._started_at = 0.0
+        self._stopped = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """Start sampling."""
+        self._started_at = time.perf_counter()
+        self._sampler = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._sampler.start()
+    
+    def _run(self) -> None:
+        """Sampler thread: record the sampled thread's stack every interval."""
+        thread_id = self.thread.ident
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            functions = []
+            while frame is not None:
+                code = frame.f_code
+                functions.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            functions.reverse()
+            self.samples += 1
+            self.stacks[";".join(functions)] += 1
+            self.inclusive.update(set(functions))
+    
+    def stop(self) -> Optional[str]:
+        """
+        Stop sampling and write the summary.
+        
+        Returns:
+            Path of the summary file, or None if nothing was sampled or it could not be written
+        """
+        self._stopped.set()
+        if self._sampler:
+            self._sampler.join(timeout=5)
+        if not self.samples:
+            return None
+        
+        self_counts: Counter[str] = collections.Counter()
+        for stack, count in self.stacks.items():
+            self_counts[stack.rsplit(";", 1)[-1]] += count
+        
+        elapsed = time.perf_counter() - self._started_at
+        lines = [f"{self.samples} samples over {elapsed:.1f} s (every {self.interval * 1000:.0f} ms)", ""]
+        for title, counts in (("Most time including callees", self.inclusive),
+                              ("Most time in the function itself", self_counts)):
+            lines += [title, ""]
+            lines += [f"{count * 100 / self.samples:6.1f}%  {function}"
+                      for function, count in counts.most_common(self.top)]
+            lines.append("")
+        
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, f"{_timestamp()}-sampling.txt")
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write("\n".join(lines))
+            # Collapsed stacks, the input format of flame graph tools
+            with open(path[:-len(".txt")] + ".collapsed", 'w', encoding='utf-8') as file:
+                for stack, count in self.stacks.most_common():
+                    file.write(f"{stack} {count}\n")
+        except OSError as e:
+            print(f"Error saving sampling profile: {e}")
+            return None
+        return path
@@ -4,27 +4,35 @@ Controller layer for the Project Management System.
 Handles business logic and coordinates between project models and views.
 """
 
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from tkinter import messagebox
 from project_model import ProjectModel
-from project_view import ProjectListView, ProjectFormView
+from project_view import ProjectListView, ProjectFormView, ProjectTimelineView
+from autocomplete import CustomerNameIndex
+from replica import ReadReplica
+from write_behind import WriteBehindQueue
 
 
 class ProjectController:
     """Controller for managing project operations."""
     
-    def __init__(self, parent_window):
+    def __init__(self, parent_window, customer_index: Optional[CustomerNameIndex] = None,
+                 replica: Optional[ReadReplica] = None, write_behind: Optional[WriteBehindQueue] = None):
         """
         Initialize the project controller.
         
         Args:
             parent_window: Parent tkinter window
+            customer_index: Optional customer name index used for autocomplete
+            replica: Optional in-memory read replica for the model
+            write_behind: Optional write-behind queue for the model
         """
         self.parent_window = parent_window
+        self.customer_index = customer_index
         
         # Initialize model
         try:
-            self.model = ProjectModel()
+            self.model = ProjectModel(replica=replica, write_behind=write_behind)
         except Exception as e:
             messagebox.showerror("Database Error", f"Failed to initialize project database: {e}")
             return
@@ -34,12 +42,16 @@ class ProjectController:
             parent=self.parent_window,
             on_add=self.show_add_form,
             on_edit=self.show_edit_form,
-            on_delete=self.delete_project,
-            on_refresh=self.refresh_projects
+            on_delete=self.delete_projects,
+            on_refresh=self.refresh_projects,
+            on_batch_update=self.update_projects,
+            on_archive=self.archive_projects,
+            on_timeline=self.show_timeline
         )
         
-        # Form view (created on demand)
+        # Form and timeline views (created on demand)
         self.form_view: Optional[ProjectFormView] = None
+        self.timeline_view: Optional[ProjectTimelineView] = None
         self.current_project_id: Optional[int] = None
         
         # Load initial data
@@ -48,12 +60,47 @@ class ProjectController:
     def refresh_projects(self) -> None:
         """Refresh the project list from the database."""
         try:
-            projects = self.model.get_all_projects()
+            projects = self.model.get_all_projects(
+                include_archived=self.list_view.get_include_archived()
+            )
             self.list_view.update_project_list(projects)
+            self._refresh_timeline()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load projects: {e}")
             self.list_view.set_status("Error loading projects")
     
+    def _refresh_timeline(self) -> None:
+        """Reload the timeline view (if open) after projects changed."""
+        if self.timeline_view and self.timeline_view.is_open():
+            self.timeline_view.invalidate()
+    
+    def show_timeline(self) -> None:
+        """Show the project timeline window (or raise it if already open)."""
+        if self.timeline_view and self.timeline_view.is_open():
+            self.timeline_view.window.lift()
+            return
+        
+        self.timeline_view = ProjectTimelineView(
+            parent=self.parent_window,
+            on_range_change=self.load_timeline_range,
+            on_edit=self.show_edit_form
+        )
+    
+    def load_timeline_range(self, first_day: int, last_day: int) -> None:
+        """
+        Load the project spans of a day range into the timeline view.
+        
+        Args:
+            first_day: First day of the range (day number)
+            last_day: Last day of the range (day number)
+        """
+        try:
+            spans = self.model.get_project_spans(first_day, last_day)
+            self.timeline_view.set_spans(first_day, last_day, spans)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load timeline: {e}")
+            self.timeline_view.set_status("Error loading timeline")
+    
     def show_add_form(self) -> None:
         """Show the form for adding a new project."""
         self.current_project_id = None
@@ -91,7 +138,8 @@ class ProjectController:
         self.form_view = ProjectFormView(
             parent=self.parent_window,
             on_save=self.save_project,
-            on_cancel=self.cancel_form
+            on_cancel=self.cancel_form,
+            on_suggest=self.customer_index.search if self.customer_index else None
         )
         
         # Set window title
@@ -119,6 +167,9 @@ class ProjectController:
                 )
             
             if success:
+                # New free-text customer names become suggestions too
+                if self.customer_index and 'customer_id' not in project_data:
+                    self.customer_index.add_customer_name(project_data.get('customer_name', ''))
                 messagebox.showinfo("Success", message)
                 self.form_view.close()
                 self.form_view = None
@@ -135,25 +186,57 @@ class ProjectController:
             self.form_view.close()
             self.form_view = None
     
-    def delete_project(self, project_id: int) -> None:
+    def delete_projects(self, project_ids: List[int]) -> None:
         """
-        Delete a project from the database.
+        Delete one or more projects from the database.
         
         Args:
-            project_id: ID of the project to delete
+            project_ids: IDs of the projects to delete
         """
         try:
-            success, message = self.model.delete_project(project_id)
+            success, message = self.model.delete_projects(project_ids)
             
             if success:
+                self.list_view.remove_projects(project_ids)
+                self._refresh_timeline()
                 messagebox.showinfo("Success", message)
-                self.refresh_projects()
             else:
                 messagebox.showerror("Error", message)
                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to delete project: {e}")
     
+    def update_projects(self, project_ids: List[int], changes: Dict[str, str]) -> None:
+        """
+        Apply the same field changes to one or more projects.
+        
+        Args:
+            project_ids: IDs of the projects to update
+            changes: Dictionary of field -> new value
+        """
+        try:
+            success, message = self.model.update_projects(project_ids, changes)
+            
+            if success:
+                self.list_view.update_project_fields(project_ids, changes)
+                self._refresh_timeline()
+            else:
+                messagebox.showerror("Error", message)
+                
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to update projects: {e}")
+    
+    def archive_projects(self) -> None:
+        """Move finished projects past the archive age into the archive table."""
+        try:
+            count = self.model.archive_finished_projects()
+            messagebox.showinfo("Archive", f"{count} project{'s' if count != 1 else ''} archived")
+            if count:
+                self.refresh_projects()
+                
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to archive projects: {e}")
+    
     def hide_view(self) -> None:
         """Hide the project view."""
         # Hide all widgets in the parent window
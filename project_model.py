@@ -4,34 +4,332 @@ Model layer for the Project Management System.
 Handles all database operations and data persistence for projects.
 """
 
+import contextlib
 import sqlite3
 import os
+from datetime import date, timedelta
 from typing import List, Dict, Optional, Tuple
 from project_schema import ProjectSchema
+from schema import ContactSchema
+from connection_pool import ConnectionPool
+from performance import ProfileArg, connect
+from replica import ReadReplica
+from write_behind import PendingWrite, WriteBehindQueue
+from gazetteer import bounding_box, distance_km, get_gazetteer
+from intervals import WEEK_DAYS, load_histogram, peak_concurrency, week_start
+from migrations import (MigrationRunner, backfill_customer_links, backfill_project_locations,
+                        find_location_point, run_backfill, table_exists)
 
 
 class ProjectModel:
     """Model class for managing project data in SQLite database."""
     
-    def __init__(self, db_path: str = "contacts.db"):
+    def __init__(self, db_path: str = "contacts.db", archive_db_path: Optional[str] = None,
+                 pool: Optional[ConnectionPool] = None, profile: ProfileArg = None,
+                 replica: Optional[ReadReplica] = None, write_behind: Optional[WriteBehindQueue] = None):
         """
         Initialize the project model with database connection.
         
         Args:
             db_path: Path to SQLite database file
+            archive_db_path: Optional separate database file for archived projects
+                (attached on demand); by default the archive table lives in db_path
+            pool: Optional connection pool to reuse connections from (by default
+                every call opens its own connection)
+            profile: Performance profile or profile name for the connections the
+                model opens (default: the configured profile, see performance.py)
+            replica: Optional in-memory read replica to serve reads from (writes
+                still go to db_path)
+            write_behind: Optional queue that creates, updates and deletes are
+                handed to, to be written in groups on a background thread
         """
         self.db_path = db_path
+        self.archive_db_path = archive_db_path
+        self.pool = pool
+        self.profile = profile
+        self.replica = replica
+        self.write_behind = write_behind
+        # State lookup codes and labels (the standard states, plus other labels
+        # once read from the lookup table)
+        self._state_codes: Dict[str, int] = dict(ProjectSchema.STATE_CODES)
+        self._state_labels: Dict[int, str] = {code: state for state, code in self._state_codes.items()}
+        # Whether the location R*Tree exists (SQLite may lack the module)
+        self.locations_indexed = False
         self._init_database()
     
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open a connection to the database file (or take one from the pool)."""
+        if self.pool:
+            return self.pool.acquire()
+        if self.replica:
+            return self.replica.connect_for_write()
+        return connect(self.db_path, self.profile)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Get a connection for one call (use it as a `with` block)."""
+        if self.write_behind:
+            group = self.write_behind.group_connection()
+            if group:
+                return group
+            # Queued writes go first
+            self.write_behind.flush()
+        return self._open_connection()
+    
+    def _read_connect(self, flush_pending: bool = True) -> sqlite3.Connection:
+        """
+        Get a connection for a read-only call (from the read replica, if any).
+        
+        Args:
+            flush_pending: Wait for queued writes first (False for reads that
+                show queued writes themselves)
+        """
+        if self.write_behind and flush_pending:
+            self.write_behind.flush()
+        if self.replica:
+            return self.replica.connect_for_read()
+        return self._open_connection()
+    
+    def _queues_writes(self) -> bool:
+        """Whether writes go to the write-behind queue instead of the database."""
+        return self.write_behind is not None and self.write_behind.accepts_writes()
+    
+    def _queue_write(self, description: str, apply, action: str, record_ids: List[int],
+                     record: Optional[Dict[str, str]] = None) -> None:
+        """Hand a write to the write-behind queue (see PendingWrite)."""
+        self.write_behind.submit(PendingWrite(description, apply, self._open_connection, self.db_path,
+                                              ProjectSchema.TABLE_NAME, action, record_ids, record))
+    
+    def _resolve_id(self, record_id: int) -> int:
+        """Map the temporary ID of a queued create to the real ID, once it is written."""
+        record_id = int(record_id)
+        return self.write_behind.resolve_id(record_id) if self.write_behind else record_id
+    
+    def _pending_view(self):
+        """Context for reads that show queued writes (see WriteBehindQueue.consistent_view)."""
+        return self.write_behind.consistent_view() if self.write_behind else contextlib.nullcontext()
+    
+    def _show_pending(self, projects: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Apply queued writes to projects read from the database, keeping the list order."""
+        if not self.write_behind:
+            return projects
+        shown = self.write_behind.apply_pending(ProjectSchema.TABLE_NAME, projects)
+        if shown is not projects:
+            shown.sort(key=lambda project: project['customer_name'])
+        return shown
+    
+    @staticmethod
+    def _display_record(project_data: Dict[str, str]) -> Dict[str, str]:
+        """Project fields as the read methods return them."""
+        record = {}
+        for field, value in project_data.items():
+            if field not in ProjectSchema.DISPLAY_ORDER:
+                continue
+            value = (value or '').strip()
+            # Convert boolean field for display
+            if field == 'is_active':
+                value = 'כן' if value.lower() in ['true', '1', 'yes', 'כן'] else 'לא'
+            record[field] = value
+        return record
+    
+    def _load_states(self, conn: sqlite3.Connection) -> None:
+        """Read the state lookup table (labels added by other users included)."""
+        states = conn.execute(f"SELECT label, code FROM {ProjectSchema.STATES_TABLE_NAME}").fetchall()
+        self._state_codes = dict(states)
+        self._state_labels = {code: state for state, code in states}
+    
+    def _state_label(self, conn: sqlite3.Connection, code: Optional[int]) -> str:
+        """Translate a state code read from the database to its label."""
+        if code is None:
+            return ""
+        if code not in self._state_labels:
+            self._load_states(conn)
+        return self._state_labels.get(code, "")
+    
+    def _state_filter_code(self, conn: sqlite3.Connection, state: str) -> Optional[int]:
+        """Translate a state label to filter by to its code (None if no project can have it)."""
+        if state not in self._state_codes:
+            self._load_states(conn)
+        return self._state_codes.get(state)
+    
+    @staticmethod
+    def _state_code(conn: sqlite3.Connection, state: str) -> Optional[int]:
+        """
+        Translate a state label being written to its code, adding the label
+        to the lookup table (in the write's transaction) if it is new.
+        """
+        if not state:
+            return None
+        code = ProjectSchema.STATE_CODES.get(state)
+        if code is None:
+            conn.execute(f"INSERT OR IGNORE INTO {ProjectSchema.STATES_TABLE_NAME} (label) VALUES (?)", (state,))
+            code = conn.execute(f"SELECT code FROM {ProjectSchema.STATES_TABLE_NAME} WHERE label = ?",
+                                (state,)).fetchone()[0]
+        return code
+    
+    def _stored_values(self, conn: sqlite3.Connection, project_data: Dict[str, str],
+                       fields: List[str]) -> List:
+        """Values of project fields as they are stored (is_active as 0/1, state as its code)."""
+        values = []
+        for field in fields:
+            value = project_data.get(field, '').strip()
+            # Convert boolean field
+            if field == 'is_active':
+                value = 1 if value.lower() in ['true', '1', 'yes', 'כן'] else 0
+            elif field == 'state':
+                value = self._state_code(conn, value)
+            values.append(value)
+        return values
+    
+    def _project_from_row(self, conn: sqlite3.Connection, row: sqlite3.Row,
+                          prefix: str = "") -> Dict[str, str]:
+        """
+        Convert a projects row to a project dictionary (display values).
+        
+        Args:
+            conn: Connection the row was read from (for state labels)
+            row: Row with the project's columns
+            prefix: Prefix of the project's column names in the row
+        """
+        project = {}
+        for column in ProjectSchema.COLUMNS.keys():
+            value = row[prefix + ProjectSchema.column_name(column)]
+            # Convert boolean and coded fields for display
+            if column == 'is_active':
+                value = 'כן' if value else 'לא'
+            elif column == 'state':
+                value = self._state_label(conn, value)
+            project[column] = str(value) if value is not None else ""
+        return project
+    
+    def _location_id(self, conn: sqlite3.Connection, location: str) -> Optional[int]:
+        """Geocode a location to its location R*Tree point (None if it names no known locality)."""
+        if not self.locations_indexed:
+            return None
+        coordinates = get_gazetteer().geocode(location)
+        return find_location_point(conn, *coordinates) if coordinates else None
+    
+    def _record_states(self, conn: sqlite3.Connection, project_ids: List[int],
+                       deleted: bool = False) -> None:
+        """
+        Append state history rows for written projects whose state or active flag changed.
+        
+        Called after the write, in its transaction. Each project is compared
+        with its last history row (one seek of the project/day index).
+        
+        Args:
+            conn: Connection of the write
+            project_ids: IDs of the written projects
+            deleted: Whether the projects were deleted (recorded as is_active NULL)
+        """
+        today = date.today().toordinal()
+        rows = []
+        for project_id in project_ids:
+            last = conn.execute(
+                f"SELECT state_code, is_active, state_since_day FROM {ProjectSchema.STATE_HISTORY_TABLE_NAME} "
+                f"WHERE project_id = ? ORDER BY changed_day DESC, id DESC LIMIT 1", (project_id,)
+            ).fetchone()
+            if deleted:
+                current = (None, None)
+            else:
+                current = conn.execute(
+                    f"SELECT state_code, is_active FROM {ProjectSchema.TABLE_NAME} WHERE id = ?", (project_id,)
+                ).fetchone()
+                if current is None:
+                    continue
+                current = (current[0], 1 if current[1] else 0)
+            
+            if last is None or last[1] is None:
+                # First row of the project (or of a new project reusing a deleted one's ID)
+                if not deleted:
+                    rows.append((project_id, today, *current, today, None, None))
+            elif deleted or current[0] != last[0]:
+                # Leaving a state: record the stay it ends
+                rows.append((project_id, today, *current, today, last[0], today - last[2]))
+            elif current[1] != last[1]:
+                rows.append((project_id, today, *current, last[2], None, None))
+        
+        conn.executemany(
+            f"INSERT INTO {ProjectSchema.STATE_HISTORY_TABLE_NAME} (project_id, changed_day, state_code, "
+            f"is_active, state_since_day, left_state_code, left_state_days) VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+        )
+    
+    @property
+    def archive_table(self) -> str:
+        """Qualified name of the archive table."""
+        schema_name = 'archive' if self.archive_db_path else 'main'
+        return f"{schema_name}.{ProjectSchema.ARCHIVE_TABLE_NAME}"
+    
+    def _connect_with_archive(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a connection with the archive database attached (if it is a separate file)."""
+        # Read-only callers show queued writes themselves
+        conn = self._read_connect(flush_pending=False) if read_only else self._connect()
+        if self.archive_db_path:
+            conn.execute("ATTACH DATABASE ? AS archive", (self.archive_db_path,))
+        return conn
+    
     def _init_database(self) -> None:
-        """Initialize database and create projects table if it doesn't exist."""
+        """Initialize database, apply pending schema migrations and create the archive table."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute(ProjectSchema.get_create_table_sql())
-                conn.commit()
+            MigrationRunner(self.db_path, profile=self.profile).migrate()
+            with contextlib.closing(connect(self.db_path, self.profile)) as conn:
+                self.locations_indexed = table_exists(conn, ProjectSchema.LOCATIONS_TABLE_NAME)
+            
+            # A separate archive file is not covered by the main database's migrations
+            if self.archive_db_path:
+                with self._connect_with_archive() as conn:
+                    conn.execute(ProjectSchema.get_create_archive_table_sql('archive'))
+                    conn.commit()
         except sqlite3.Error as e:
             raise Exception(f"Database initialization failed: {e}")
     
+    def _resolve_customer_id(self, conn: sqlite3.Connection, customer_name: str) -> Optional[int]:
+        """
+        Find the contact matching a customer name ("first last" or "last first").
+        
+        Args:
+            conn: Open database connection
+            customer_name: Free-text customer name
+            
+        Returns:
+            Contact ID if exactly one contact matches, otherwise None
+        """
+        key = ContactSchema.normalize_name(customer_name)
+        if not key:
+            return None
+        
+        rows = conn.execute(
+            f"SELECT id FROM {ContactSchema.TABLE_NAME} "
+            f"WHERE lower(trim(first_name) || ' ' || trim(last_name)) = ? "
+            f"OR lower(trim(last_name) || ' ' || trim(first_name)) = ? LIMIT 2",
+            (key, key)
+        ).fetchall()
+        return rows[0][0] if len(rows) == 1 else None
+    
+    def _get_customer_id(self, conn: sqlite3.Connection, project_data: Dict[str, str],
+                         project_id: Optional[int] = None) -> Optional[int]:
+        """
+        Get the explicit customer_id from project data, or resolve it from the customer name.
+        
+        Args:
+            conn: Open database connection
+            project_data: Project fields (customer_id is optional)
+            project_id: ID of the project being updated; its stored link is
+                kept while the customer name is unchanged
+        """
+        customer_id = str(project_data.get('customer_id', '')).strip()
+        if customer_id:
+            return self._resolve_id(customer_id)
+        
+        customer_name = project_data.get('customer_name', '')
+        if project_id is not None:
+            # An ambiguous name would resolve to no contact and drop the link
+            row = conn.execute(
+                f"SELECT customer_name, customer_id FROM {ProjectSchema.TABLE_NAME} WHERE id = ?", (project_id,)
+            ).fetchone()
+            if row and ContactSchema.normalize_name(row[0] or '') == ContactSchema.normalize_name(customer_name):
+                return row[1]
+        return self._resolve_customer_id(conn, customer_name)
+    
     def create_project(self, project_data: Dict[str, str]) -> Tuple[bool, str]:
         """
         Create a new project in the database.
@@ -47,61 +345,124 @@ class ProjectModel:
         if validation_errors:
             return False, "; ".join(validation_errors)
         
+        if self._queues_writes():
+            self._queue_write(f"Creating project for {project_data.get('customer_name', '').strip()}",
+                              lambda: self.create_project(project_data), 'create',
+                              [self.write_behind.new_temp_id()], self._display_record(project_data))
+            return True, "Project created successfully"
+        
         try:
             # Prepare data for insertion (exclude id)
-            fields = [field for field in ProjectSchema.DISPLAY_ORDER]
-            values = []
+            fields = [ProjectSchema.column_name(field) for field in ProjectSchema.DISPLAY_ORDER]
             
-            for field in fields:
-                value = project_data.get(field, '').strip()
-                # Convert boolean field
-                if field == 'is_active':
-                    value = 1 if value.lower() in ['true', '1', 'yes', 'כן'] else 0
-                values.append(value)
+            # Add derived columns
+            derived = ProjectSchema.get_derived_values(project_data)
+            fields += list(derived.keys())
             
+            fields += ['customer_id', 'location_id']
             placeholders = ", ".join(["?"] * len(fields))
             field_names = ", ".join(fields)
             
             sql = f"INSERT INTO {ProjectSchema.TABLE_NAME} ({field_names}) VALUES ({placeholders})"
             
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute(sql, values)
+            with self._connect() as conn:
+                values = self._stored_values(conn, project_data, ProjectSchema.DISPLAY_ORDER)
+                values += list(derived.values())
+                values.append(self._get_customer_id(conn, project_data))
+                values.append(self._location_id(conn, project_data.get('location', '')))
+                cursor = conn.execute(sql, values)
+                self._record_states(conn, [cursor.lastrowid])
                 conn.commit()
                 
+            if self.write_behind:
+                self.write_behind.record_created(cursor.lastrowid)
             return True, "Project created successfully"
             
         except sqlite3.Error as e:
             return False, f"Database error: {e}"
     
-    def get_all_projects(self) -> List[Dict[str, str]]:
+    def get_all_projects(self, include_archived: bool = False) -> List[Dict[str, str]]:
         """
         Retrieve all projects from the database.
         
+        Args:
+            include_archived: Also return archived projects (each project then
+                carries an 'archived' flag of 'כן' or 'לא')
+        
         Returns:
             List of project dictionaries
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            if include_archived:
+                # Archived projects keep their state label instead of a code
+                columns = ", ".join(ProjectSchema.column_name(column) for column in ProjectSchema.COLUMNS)
+                archive_columns = ", ".join("NULL" if column in ProjectSchema.CODED_COLUMNS else column
+                                            for column in ProjectSchema.COLUMNS)
+                conn = self._connect_with_archive(read_only=True)
+                sql = (f"SELECT {columns}, NULL AS archived_state, 0 AS archived "
+                       f"FROM {ProjectSchema.TABLE_NAME} "
+                       f"UNION ALL "
+                       f"SELECT {archive_columns}, state, 1 AS archived FROM {self.archive_table} "
+                       f"ORDER BY customer_name")
+            else:
+                conn = self._read_connect(flush_pending=False)
+                sql = f"SELECT * FROM {ProjectSchema.TABLE_NAME} ORDER BY customer_name"
+            
+            with self._pending_view(), conn:
                 conn.row_factory = sqlite3.Row  # Enable column access by name
-                cursor = conn.execute(f"SELECT * FROM {ProjectSchema.TABLE_NAME} ORDER BY customer_name")
+                cursor = conn.execute(sql)
                 
                 projects = []
                 for row in cursor:
-                    project = {}
-                    for column in ProjectSchema.COLUMNS.keys():
-                        value = row[column]
-                        # Convert boolean field for display
-                        if column == 'is_active':
-                            value = 'כן' if value else 'לא'
-                        project[column] = str(value) if value is not None else ""
+                    project = self._project_from_row(conn, row)
+                    if include_archived:
+                        project['archived'] = 'כן' if row['archived'] else 'לא'
+                        if row['archived']:
+                            project['state'] = row['archived_state'] or ""
                     projects.append(project)
                 
+                projects = self._show_pending(projects)
+                if include_archived:
+                    for project in projects:
+                        project.setdefault('archived', 'לא')
                 return projects
                 
         except sqlite3.Error as e:
             print(f"Error retrieving projects: {e}")
             return []
     
+    def get_projects_page(self, after_id: int = 0, limit: int = 1000,
+                          state: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Retrieve one page of (non-archived) projects in ID order (keyset pagination).
+        
+        Args:
+            after_id: Return projects with an ID greater than this (0 for the first page)
+            limit: Maximum number of projects to return
+            state: Only return projects in this state
+            
+        Returns:
+            List of project dictionaries
+        """
+        where, params = "id > ?", [after_id]
+        
+        try:
+            with self._read_connect() as conn:
+                if state:
+                    where += " AND state_code = ?"
+                    params.append(self._state_filter_code(conn, state))
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute(
+                    f"SELECT * FROM {ProjectSchema.TABLE_NAME} WHERE {where} ORDER BY id LIMIT ?",
+                    params + [limit]
+                )
+                
+                return [self._project_from_row(conn, row) for row in cursor]
+                
+        except sqlite3.Error as e:
+            print(f"Error retrieving projects: {e}")
+            return []
+    
     def get_project_by_id(self, project_id: int) -> Optional[Dict[str, str]]:
         """
         Retrieve a specific project by ID.
@@ -113,24 +474,26 @@ class ProjectModel:
             Project dictionary or None if not found
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pending_view(), self._read_connect(flush_pending=False) as conn:
+                project_id = self._resolve_id(project_id)
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     f"SELECT * FROM {ProjectSchema.TABLE_NAME} WHERE id = ?", 
                     (project_id,)
                 )
                 
+                projects = []
                 row = cursor.fetchone()
                 if row:
-                    project = {}
-                    for column in ProjectSchema.COLUMNS.keys():
-                        value = row[column]
-                        # Convert boolean field for editing
-                        if column == 'is_active':
-                            value = 'כן' if value else 'לא'
-                        project[column] = str(value) if value is not None else ""
-                    return project
+                    project = self._project_from_row(conn, row)
+                    # Linked contact, so an edit form can keep the link
+                    project['customer_id'] = str(row['customer_id']) if row['customer_id'] is not None else ""
+                    projects.append(project)
                 
+                # A queued create or update of the project is shown too
+                for project in self._show_pending(projects):
+                    if project['id'] == str(project_id):
+                        return project
                 return None
                 
         except sqlite3.Error as e:
@@ -153,25 +516,30 @@ class ProjectModel:
         if validation_errors:
             return False, "; ".join(validation_errors)
         
+        if self._queues_writes():
+            self._queue_write(f"Updating project for {project_data.get('customer_name', '').strip()}",
+                              lambda: self.update_project(project_id, project_data), 'update',
+                              [int(project_id)], self._display_record(project_data))
+            return True, "Project updated successfully"
+        
+        project_id = self._resolve_id(project_id)
         try:
             # Prepare update statement
-            fields = ProjectSchema.DISPLAY_ORDER
+            derived = ProjectSchema.get_derived_values(project_data)
+            fields = ([ProjectSchema.column_name(field) for field in ProjectSchema.DISPLAY_ORDER]
+                      + list(derived.keys()) + ['customer_id', 'location_id'])
             set_clause = ", ".join([f"{field} = ?" for field in fields])
-            values = []
-            
-            for field in fields:
-                value = project_data.get(field, '').strip()
-                # Convert boolean field
-                if field == 'is_active':
-                    value = 1 if value.lower() in ['true', '1', 'yes', 'כן'] else 0
-                values.append(value)
-            
-            values.append(project_id)  # Add ID for WHERE clause
             
             sql = f"UPDATE {ProjectSchema.TABLE_NAME} SET {set_clause} WHERE id = ?"
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
+                values = self._stored_values(conn, project_data, ProjectSchema.DISPLAY_ORDER)
+                values += list(derived.values())
+                values.append(self._get_customer_id(conn, project_data, project_id))
+                values.append(self._location_id(conn, project_data.get('location', '')))
+                values.append(project_id)  # Add ID for WHERE clause
                 cursor = conn.execute(sql, values)
+                self._record_states(conn, [project_id])
                 conn.commit()
                 
                 if cursor.rowcount == 0:
@@ -192,12 +560,21 @@ class ProjectModel:
         Returns:
             Tuple of (success: bool, message: str)
         """
+        if self._queues_writes():
+            self._queue_write(f"Deleting project {project_id}", lambda: self.delete_project(project_id),
+                              'delete', [int(project_id)])
+            return True, "Project deleted successfully"
+        
+        project_id = self._resolve_id(project_id)
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
+                conn.execute("PRAGMA foreign_keys = ON")  # Cascade to consultant links
                 cursor = conn.execute(
                     f"DELETE FROM {ProjectSchema.TABLE_NAME} WHERE id = ?", 
                     (project_id,)
                 )
+                if cursor.rowcount:
+                    self._record_states(conn, [project_id], deleted=True)
                 conn.commit()
                 
                 if cursor.rowcount == 0:
@@ -207,3 +584,893 @@ class ProjectModel:
                 
         except sqlite3.Error as e:
             return False, f"Database error: {e}"
+    
+    def delete_projects(self, project_ids: List[int]) -> Tuple[bool, str]:
+        """
+        Delete several projects in a single transaction.
+        
+        Args:
+            project_ids: IDs of the projects to delete
+            
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if not project_ids:
+            return False, "No projects selected"
+        
+        # A separate archive file cannot be attached inside a queued group
+        if self._queues_writes() and not self.archive_db_path:
+            count = len(project_ids)
+            self._queue_write(f"Deleting {count} project{'s' if count != 1 else ''}",
+                              lambda: self.delete_projects(project_ids), 'delete',
+                              [int(project_id) for project_id in project_ids])
+            return True, f"{count} project{'s' if count != 1 else ''} deleted successfully"
+        
+        try:
+            with self._connect_with_archive() as conn:
+                conn.execute("PRAGMA foreign_keys = ON")  # Cascade to consultant links
+                # Resolved once the connection has flushed queued creates
+                params = [(self._resolve_id(project_id),) for project_id in project_ids]
+                count = conn.executemany(
+                    f"DELETE FROM {ProjectSchema.TABLE_NAME} WHERE id = ?", params
+                ).rowcount
+                
+                # Selected projects may also be archived ones (no cascade there)
+                archived_count = conn.executemany(
+                    f"DELETE FROM {self.archive_table} WHERE id = ?", params
+                ).rowcount
+                if archived_count:
+                    conn.executemany(
+                        f"DELETE FROM {ProjectSchema.CONSULTANTS_TABLE_NAME} WHERE project_id = ?", params
+                    )
+                self._record_states(conn, [project_id for project_id, in params], deleted=True)
+                conn.commit()
+                
+                count += archived_count
+                if count == 0:
+                    return False, "Projects not found"
+                
+                return True, f"{count} project{'s' if count != 1 else ''} deleted successfully"
+                
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
+    
+    def update_projects(self, project_ids: List[int], changes: Dict[str, str]) -> Tuple[bool, str]:
+        """
+        Apply the same field changes to several projects in a single transaction.
+        
+        Args:
+            project_ids: IDs of the projects to update
+            changes: Dictionary of field -> new value (fields from
+                ProjectSchema.BATCH_UPDATE_FIELDS only)
+            
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if not project_ids:
+            return False, "No projects selected"
+        
+        invalid_fields = [field for field in changes if field not in ProjectSchema.BATCH_UPDATE_FIELDS]
+        if invalid_fields or not changes:
+            return False, f"Fields cannot be batch updated: {', '.join(invalid_fields)}"
+        
+        if self._queues_writes():
+            count = len(project_ids)
+            self._queue_write(f"Updating {count} project{'s' if count != 1 else ''}",
+                              lambda: self.update_projects(project_ids, changes), 'update',
+                              [int(project_id) for project_id in project_ids], self._display_record(changes))
+            return True, f"{count} project{'s' if count != 1 else ''} updated successfully"
+        
+        project_ids = [self._resolve_id(project_id) for project_id in project_ids]
+        try:
+            fields = list(changes.keys())
+            set_clause = ", ".join([f"{ProjectSchema.column_name(field)} = ?" for field in fields])
+            
+            sql = f"UPDATE {ProjectSchema.TABLE_NAME} SET {set_clause} WHERE id = ?"
+            
+            with self._connect() as conn:
+                values = self._stored_values(conn, changes, fields)
+                cursor = conn.executemany(
+                    sql, [values + [project_id] for project_id in project_ids]
+                )
+                if {'state', 'is_active'} & set(fields):
+                    self._record_states(conn, project_ids)
+                conn.commit()
+                
+                if cursor.rowcount == 0:
+                    return False, "Projects not found"
+                
+                count = cursor.rowcount
+                return True, f"{count} project{'s' if count != 1 else ''} updated successfully"
+                
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
+    
+    def _query_projects(self, where: str, params: Tuple, order_by: str) -> List[Dict[str, str]]:
+        """
+        Retrieve projects matching a WHERE clause over the day-number columns.
+        
+        Each project also carries 'duration_days' (end date minus start date,
+        empty if either date is missing).
+        
+        Args:
+            where: SQL condition
+            params: Query parameters
+            order_by: SQL ORDER BY expression
+            
+        Returns:
+            List of project dictionaries
+        """
+        try:
+            with self._read_connect() as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute(
+                    f"SELECT *, end_day - start_day AS duration_days FROM {ProjectSchema.TABLE_NAME} "
+                    f"WHERE {where} ORDER BY {order_by}",
+                    params
+                )
+                
+                projects = []
+                for row in cursor:
+                    project = self._project_from_row(conn, row)
+                    duration_days = row['duration_days']
+                    project['duration_days'] = str(duration_days) if duration_days is not None else ""
+                    projects.append(project)
+                
+                return projects
+                
+        except sqlite3.Error as e:
+            print(f"Error querying projects: {e}")
+            return []
+    
+    def get_projects_active_between(self, start_date: str, end_date: str) -> List[Dict[str, str]]:
+        """
+        Retrieve projects whose schedule overlaps a date range.
+        
+        Only projects with both a start and an end date are considered. The
+        (end_day, start_day) index answers the overlap test without reading
+        non-matching rows.
+        
+        Args:
+            start_date: First day of the range (YYYY-MM-DD)
+            end_date: Last day of the range (YYYY-MM-DD)
+            
+        Returns:
+            List of project dictionaries, ordered by end date
+        """
+        first_day = ProjectSchema.to_day_number(start_date)
+        last_day = ProjectSchema.to_day_number(end_date)
+        if first_day is None or last_day is None:
+            return []
+        return self._query_projects("start_day <= ? AND end_day >= ?", (last_day, first_day), "end_day")
+    
+    def _schedule_spans(self, first_day: int, last_day: int, open_only: bool) -> List[Tuple[int, int]]:
+        """
+        (start_day, end_day) of the projects overlapping a day range.
+        
+        Reads only the (end_day, start_day) index unless open_only also needs
+        the state of each project.
+        """
+        where, params = "end_day >= ? AND start_day <= ?", [first_day, last_day]
+        if open_only:
+            codes = [ProjectSchema.STATE_CODES[state] for state in ProjectSchema.OPEN_STATES]
+            where += f" AND state_code IN ({', '.join('?' * len(codes))})"
+            params += codes
+        with self._read_connect() as conn:
+            return conn.execute(
+                f"SELECT start_day, end_day FROM {ProjectSchema.TABLE_NAME} WHERE {where}", params
+            ).fetchall()
+    
+    def get_weekly_load(self, start_date: str, end_date: str, open_only: bool = False) -> List[Dict[str, str]]:
+        """
+        Compute the project load of each week of a date range, for capacity planning.
+        
+        Weeks run from Sunday to Saturday; the first and last weeks are the
+        ones containing the range's first and last days. The schedules of the
+        overlapping projects are read once and swept in day order (see
+        intervals.py), so the cost grows with n log n, not with the number of
+        project pairs or weeks times projects.
+        
+        Args:
+            start_date: First day of the range (YYYY-MM-DD)
+            end_date: Last day of the range (YYYY-MM-DD)
+            open_only: Only count open projects (ProjectSchema.OPEN_STATES)
+            
+        Returns:
+            List of dictionaries with 'week_start', 'week_end' (YYYY-MM-DD),
+            'projects' (projects overlapping the week), 'peak_concurrent' (most
+            projects running on one day of the week) and 'project_days'
+        """
+        first_day = ProjectSchema.to_day_number(start_date)
+        last_day = ProjectSchema.to_day_number(end_date)
+        if first_day is None or last_day is None or first_day > last_day:
+            return []
+        first_day = week_start(first_day)
+        last_day = week_start(last_day) + WEEK_DAYS - 1
+        
+        try:
+            spans = self._schedule_spans(first_day, last_day, open_only)
+        except sqlite3.Error as e:
+            print(f"Error computing weekly load: {e}")
+            return []
+        
+        return [{
+            'week_start': ProjectSchema.from_day_number(week_first),
+            'week_end': ProjectSchema.from_day_number(week_first + WEEK_DAYS - 1),
+            'projects': str(projects),
+            'peak_concurrent': str(peak),
+            'project_days': str(project_days)
+        } for week_first, projects, peak, project_days in load_histogram(spans, first_day, last_day)]
+    
+    def get_peak_concurrency(self, start_date: str, end_date: str,
+                             open_only: bool = False) -> Dict[str, str]:
+        """
+        Find the largest number of projects running on the same day of a date range.
+        
+        Args:
+            start_date: First day of the range (YYYY-MM-DD)
+            end_date: Last day of the range (YYYY-MM-DD)
+            open_only: Only count open projects (ProjectSchema.OPEN_STATES)
+            
+        Returns:
+            Dictionary with 'projects' (the peak, "0" if no project overlaps the
+            range) and 'date' (first day the peak is reached, YYYY-MM-DD, or empty)
+        """
+        first_day = ProjectSchema.to_day_number(start_date)
+        last_day = ProjectSchema.to_day_number(end_date)
+        if first_day is None or last_day is None:
+            return {'projects': "0", 'date': ""}
+        
+        try:
+            spans = self._schedule_spans(first_day, last_day, open_only)
+        except sqlite3.Error as e:
+            print(f"Error computing peak concurrency: {e}")
+            return {'projects': "0", 'date': ""}
+        
+        peak, peak_day = peak_concurrency(spans, first_day, last_day)
+        return {'projects': str(peak), 'date': ProjectSchema.from_day_number(peak_day) if peak_day else ""}
+    
+    def get_projects_ending_within(self, days: int, from_date: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Retrieve open projects (ProjectSchema.OPEN_STATES) ending in the next N days.
+        
+        Args:
+            days: Number of days ahead to look
+            from_date: First day to look from (YYYY-MM-DD, defaults to today)
+            
+        Returns:
+            List of project dictionaries, ordered by end date
+        """
+        first_day = ProjectSchema.to_day_number(from_date) if from_date else date.today().toordinal()
+        if first_day is None:
+            return []
+        codes = [ProjectSchema.STATE_CODES[state] for state in ProjectSchema.OPEN_STATES]
+        return self._query_projects(
+            f"state_code IN ({', '.join('?' * len(codes))}) AND end_day BETWEEN ? AND ?",
+            (*codes, first_day, first_day + days), "end_day"
+        )
+    
+    def get_overdue_projects(self, as_of: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Retrieve open projects (ProjectSchema.OPEN_STATES) whose end date has passed.
+        
+        Args:
+            as_of: Reference date (YYYY-MM-DD, defaults to today)
+            
+        Returns:
+            List of project dictionaries, ordered by end date
+        """
+        today = ProjectSchema.to_day_number(as_of) if as_of else date.today().toordinal()
+        if today is None:
+            return []
+        codes = [ProjectSchema.STATE_CODES[state] for state in ProjectSchema.OPEN_STATES]
+        return self._query_projects(
+            f"state_code IN ({', '.join('?' * len(codes))}) AND end_day < ?",
+            (*codes, today), "end_day"
+        )
+    
+    def get_state_summary(self) -> List[Dict[str, str]]:
+        """
+        Count the (non-archived) projects in each state.
+        
+        Returns:
+            List of dictionaries with 'state', 'projects' and 'active_projects'
+            (projects marked active), in ProjectSchema.STATE_OPTIONS order;
+            projects without a state come last
+        """
+        try:
+            with self._read_connect() as conn:
+                counts = {
+                    self._state_label(conn, code): (total, active) for code, total, active in conn.execute(
+                        f"SELECT state_code, COUNT(*), COALESCE(SUM(is_active), 0) "
+                        f"FROM {ProjectSchema.TABLE_NAME} GROUP BY state_code"
+                    )
+                }
+                
+        except sqlite3.Error as e:
+            print(f"Error summarizing projects: {e}")
+            return []
+        
+        order = ProjectSchema.STATE_OPTIONS + sorted(set(counts) - set(ProjectSchema.STATE_OPTIONS))
+        return [{'state': state, 'projects': str(counts[state][0]), 'active_projects': str(counts[state][1])}
+                for state in order if state in counts]
+    
+    def get_state_history(self, project_id: int) -> List[Dict[str, str]]:
+        """
+        Retrieve the state changes of a project, oldest first.
+        
+        Args:
+            project_id: ID of the project
+            
+        Returns:
+            List of dictionaries with 'date' (YYYY-MM-DD), 'state', 'is_active'
+            ('כן'/'לא', empty for the project's deletion) and 'days_in_previous_state'
+            (empty unless the change left a state)
+        """
+        try:
+            with self._read_connect() as conn:
+                return [{
+                    'date': ProjectSchema.from_day_number(changed_day),
+                    'state': self._state_label(conn, state_code),
+                    'is_active': ('כן' if is_active else 'לא') if is_active is not None else "",
+                    'days_in_previous_state': str(left_state_days) if left_state_days is not None else ""
+                } for changed_day, state_code, is_active, left_state_days in conn.execute(
+                    f"SELECT changed_day, state_code, is_active, left_state_days "
+                    f"FROM {ProjectSchema.STATE_HISTORY_TABLE_NAME} WHERE project_id = ? ORDER BY changed_day, id",
+                    (self._resolve_id(project_id),)
+                )]
+                
+        except sqlite3.Error as e:
+            print(f"Error retrieving state history: {e}")
+            return []
+    
+    def get_states_as_of(self, as_of_date: str) -> List[Dict[str, str]]:
+        """
+        Reconstruct the state of every project at the end of a past day.
+        
+        The distinct projects of the history are walked with one seek of the
+        (project_id, changed_day) index each, and each project's last change
+        up to the day is one more seek, so the cost grows with the number of
+        projects and not with the length of the history. Projects deleted by
+        the day, or whose history starts after it, are left out.
+        
+        Args:
+            as_of_date: Day to reconstruct (YYYY-MM-DD)
+            
+        Returns:
+            List of dictionaries with 'id', 'customer_name' (empty if the project
+            was deleted since), 'state', 'is_active' ('כן'/'לא') and 'since' (day
+            the project entered the state, YYYY-MM-DD), ordered by project ID
+        """
+        as_of_day = ProjectSchema.to_day_number(as_of_date)
+        if as_of_day is None:
+            return []
+        
+        history = ProjectSchema.STATE_HISTORY_TABLE_NAME
+        try:
+            with self._connect_with_archive(read_only=True) as conn:
+                rows = conn.execute(
+                    f"WITH RECURSIVE history_projects(project_id) AS ("
+                    f"SELECT MIN(project_id) FROM {history} "
+                    f"UNION ALL SELECT (SELECT MIN(project_id) FROM {history} "
+                    f"WHERE project_id > history_projects.project_id) "
+                    f"FROM history_projects WHERE project_id IS NOT NULL) "
+                    f"SELECT changed.project_id, changed.state_code, changed.is_active, changed.state_since_day, "
+                    f"COALESCE(p.customer_name, a.customer_name, '') "
+                    f"FROM history_projects JOIN {history} changed ON changed.id = ("
+                    f"SELECT id FROM {history} WHERE project_id = history_projects.project_id "
+                    f"AND changed_day <= ? ORDER BY changed_day DESC, id DESC LIMIT 1) "
+                    f"LEFT JOIN {ProjectSchema.TABLE_NAME} p ON p.id = changed.project_id "
+                    f"LEFT JOIN {self.archive_table} a ON a.id = changed.project_id "
+                    f"WHERE changed.is_active IS NOT NULL",
+                    (as_of_day,)
+                ).fetchall()
+                return [{
+                    'id': str(project_id),
+                    'customer_name': customer_name,
+                    'state': self._state_label(conn, state_code),
+                    'is_active': 'כן' if is_active else 'לא',
+                    'since': ProjectSchema.from_day_number(since_day)
+                } for project_id, state_code, is_active, since_day, customer_name in rows]
+                
+        except sqlite3.Error as e:
+            print(f"Error reconstructing project states: {e}")
+            return []
+    
+    def get_average_state_durations(self, start_date: Optional[str] = None,
+                                    end_date: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Average the days projects spent in each state before leaving it.
+        
+        Each history row that ends a stay carries the state left and the days
+        spent in it, so every state is one range of the (left_state_code,
+        changed_day, left_state_days) index, read without touching the table.
+        Stays still running are not counted.
+        
+        Args:
+            start_date: Only stays that ended on or after this day (YYYY-MM-DD)
+            end_date: Only stays that ended on or before this day (YYYY-MM-DD)
+            
+        Returns:
+            List of dictionaries with 'state', 'stays' and 'average_days' (one
+            decimal), in ProjectSchema.STATE_OPTIONS order; states no project
+            has left are omitted
+        """
+        first_day = ProjectSchema.to_day_number(start_date) if start_date else 1
+        last_day = ProjectSchema.to_day_number(end_date) if end_date else date.max.toordinal()
+        if first_day is None or last_day is None:
+            return []
+        
+        try:
+            with self._read_connect() as conn:
+                averages = {
+                    self._state_label(conn, code): (stays, average) for code, stays, average in conn.execute(
+                        f"SELECT left_state_code, COUNT(*), AVG(left_state_days) "
+                        f"FROM {ProjectSchema.STATE_HISTORY_TABLE_NAME} "
+                        f"WHERE left_state_code IN (SELECT code FROM {ProjectSchema.STATES_TABLE_NAME}) "
+                        f"AND changed_day BETWEEN ? AND ? GROUP BY left_state_code",
+                        (first_day, last_day)
+                    )
+                }
+                
+        except sqlite3.Error as e:
+            print(f"Error averaging state durations: {e}")
+            return []
+        
+        order = ProjectSchema.STATE_OPTIONS + sorted(set(averages) - set(ProjectSchema.STATE_OPTIONS))
+        return [{'state': state, 'stays': str(averages[state][0]), 'average_days': f"{averages[state][1]:.1f}"}
+                for state in order if state in averages]
+    
+    def get_customer_summary_page(self, after_customer: str = "", limit: int = 1000) -> List[Dict[str, str]]:
+        """
+        Retrieve one page of per-customer totals of active projects, in
+        customer name order (keyset pagination over the customer name index).
+        
+        Args:
+            after_customer: Return customers whose name sorts after this ("" for the first page)
+            limit: Maximum number of customers to return
+            
+        Returns:
+            List of dictionaries with 'customer_name', 'active_projects',
+            'first_start_date' and 'last_end_date' (YYYY-MM-DD, empty if no
+            project has the date)
+        """
+        try:
+            with self._read_connect() as conn:
+                cursor = conn.execute(
+                    f"SELECT customer_name, COUNT(*), MIN(start_day), MAX(end_day) "
+                    f"FROM {ProjectSchema.TABLE_NAME} "
+                    f"WHERE customer_name > ? AND is_active = 1 "
+                    f"GROUP BY customer_name ORDER BY customer_name LIMIT ?",
+                    (after_customer, limit)
+                )
+                
+                customers = []
+                for customer_name, active_projects, first_day, last_day in cursor:
+                    customers.append({
+                        'customer_name': customer_name,
+                        'active_projects': str(active_projects),
+                        'first_start_date': date.fromordinal(first_day).isoformat() if first_day else "",
+                        'last_end_date': date.fromordinal(last_day).isoformat() if last_day else ""
+                    })
+                
+                return customers
+                
+        except sqlite3.Error as e:
+            print(f"Error summarizing customers: {e}")
+            return []
+    
+    def get_project_spans(self, first_day: int, last_day: int) -> List[Tuple[int, str, str, int, int]]:
+        """
+        Retrieve lightweight schedule spans of the projects overlapping a day range.
+        
+        Used by the timeline view, which may load tens of thousands of spans at
+        a time, so rows are returned as tuples instead of display dictionaries.
+        
+        Args:
+            first_day: First day of the range (day number, date.toordinal)
+            last_day: Last day of the range (day number)
+            
+        Returns:
+            List of (id, customer_name, state, start_day, end_day) tuples
+        """
+        try:
+            with self._read_connect() as conn:
+                return [(project_id, customer_name, self._state_label(conn, code), start_day, end_day)
+                        for project_id, customer_name, code, start_day, end_day in conn.execute(
+                            f"SELECT id, customer_name, state_code, start_day, end_day "
+                            f"FROM {ProjectSchema.TABLE_NAME} WHERE end_day >= ? AND start_day <= ?",
+                            (first_day, last_day)
+                        )]
+                
+        except sqlite3.Error as e:
+            print(f"Error retrieving project spans: {e}")
+            return []
+    
+    def _location_points(self, conn: sqlite3.Connection, south: float, west: float,
+                         north: float, east: float) -> List[Tuple[int, float, float]]:
+        """(id, latitude, longitude) of the location R*Tree points within a bounding box."""
+        return conn.execute(
+            f"SELECT id, latitude, longitude FROM {ProjectSchema.LOCATIONS_TABLE_NAME} "
+            f"WHERE max_latitude >= ? AND min_latitude <= ? AND max_longitude >= ? AND min_longitude <= ?",
+            (south, north, west, east)
+        ).fetchall()
+    
+    def _located_project(self, conn: sqlite3.Connection, row: sqlite3.Row,
+                         point: Tuple[int, float, float]) -> Dict[str, str]:
+        """Convert a projects row to a project dictionary carrying the coordinates of its point."""
+        project = self._project_from_row(conn, row)
+        project['latitude'] = f"{point[1]:.6f}"
+        project['longitude'] = f"{point[2]:.6f}"
+        return project
+    
+    def get_projects_in_area(self, south: float, west: float, north: float, east: float,
+                             limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        Retrieve the (non-archived) projects located within a bounding box.
+        
+        The location R*Tree finds the points within the box, and the
+        location_id index their projects, without reading any other project.
+        
+        Args:
+            south: Southern edge (latitude, degrees)
+            west: Western edge (longitude, degrees)
+            north: Northern edge (latitude, degrees)
+            east: Eastern edge (longitude, degrees)
+            limit: Maximum number of projects to return (default: all)
+            
+        Returns:
+            List of project dictionaries, each also carrying 'latitude' and
+            'longitude', grouped by point
+        """
+        if not self.locations_indexed:
+            return []
+        try:
+            with self._read_connect() as conn:
+                points = {point[0]: point for point in self._location_points(conn, south, west, north, east)}
+                if not points:
+                    return []
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute(
+                    f"SELECT * FROM {ProjectSchema.TABLE_NAME} "
+                    f"WHERE location_id IN ({', '.join('?' * len(points))}) LIMIT ?",
+                    (*points, -1 if limit is None else limit)
+                )
+                return [self._located_project(conn, row, points[row['location_id']]) for row in cursor]
+                
+        except sqlite3.Error as e:
+            print(f"Error querying projects by area: {e}")
+            return []
+    
+    def get_nearest_projects(self, latitude: float, longitude: float, count: int = 10,
+                             max_distance_km: Optional[float] = None) -> List[Dict[str, str]]:
+        """
+        Retrieve the (non-archived) projects located nearest to a point.
+        
+        Searches the location R*Tree with a box around the point, doubling its
+        size until the points within the circle it encloses hold `count`
+        projects (no point outside the box can be nearer). Points are visited
+        nearest first by great-circle distance, and their projects read
+        through the location_id index in ID order.
+        
+        Args:
+            latitude: Latitude of the point (degrees)
+            longitude: Longitude of the point (degrees)
+            count: Maximum number of projects to return
+            max_distance_km: Only return projects within this distance
+            
+        Returns:
+            List of project dictionaries, nearest first, each also carrying
+            'latitude', 'longitude' and 'distance_km'
+        """
+        if not self.locations_indexed or count <= 0:
+            return []
+        # Half the earth's circumference: a box of this radius covers every point
+        limit_km = max_distance_km if max_distance_km is not None else 20038.0
+        radius = min(ProjectSchema.NEAREST_SEARCH_RADIUS_KM, limit_km)
+        try:
+            with self._read_connect() as conn:
+                conn.row_factory = sqlite3.Row
+                while True:
+                    points = sorted(
+                        (distance_km(latitude, longitude, point[1], point[2]), point)
+                        for point in self._location_points(conn, *bounding_box(latitude, longitude, radius))
+                    )
+                    projects = []
+                    for distance, point in points:
+                        if distance > radius or len(projects) == count:
+                            break
+                        for row in conn.execute(
+                            f"SELECT * FROM {ProjectSchema.TABLE_NAME} WHERE location_id = ? ORDER BY id LIMIT ?",
+                            (point[0], count - len(projects))
+                        ):
+                            project = self._located_project(conn, row, point)
+                            project['distance_km'] = f"{distance:.2f}"
+                            projects.append(project)
+                    if len(projects) == count or radius >= limit_km:
+                        return projects
+                    radius = min(radius * 2, limit_km)
+                
+        except sqlite3.Error as e:
+            print(f"Error querying nearest projects: {e}")
+            return []
+    
+    def locate_projects(self) -> int:
+        """
+        Geocode the locations of all projects to location R*Tree points again
+        (after the gazetteer has changed), in short batches.
+        
+        Returns:
+            Number of projects located
+        """
+        if self.write_behind:
+            self.write_behind.flush()
+        try:
+            # A connection of its own: run_backfill ends a `with` block per
+            # batch, which would hand a pooled connection back each time
+            with contextlib.closing(connect(self.db_path, self.profile)) as conn:
+                return run_backfill(conn, backfill_project_locations)
+        except sqlite3.Error as e:
+            print(f"Error locating projects: {e}")
+            return 0
+    
+    def link_customers_to_contacts(self) -> int:
+        """
+        Link unlinked projects to contacts by matching customer_name in bulk.
+        
+        Contact names are indexed in memory once ("first last" and "last first"),
+        ambiguous names are skipped, and matches are written in short batches.
+        
+        Returns:
+            Number of projects linked
+        """
+        try:
+            with self._connect() as conn:
+                return run_backfill(conn, backfill_customer_links)
+        except sqlite3.Error as e:
+            print(f"Error linking customers to contacts: {e}")
+            return 0
+    
+    def get_contact_with_projects(self, contact_id: int) -> Optional[Dict]:
+        """
+        Retrieve a contact together with all of their projects in one query.
+        
+        Args:
+            contact_id: ID of the contact
+            
+        Returns:
+            Contact dictionary with a 'projects' list (each project carries a
+            'role' of 'customer' or 'consultant'), or None if not found
+        """
+        contact_columns = list(ContactSchema.COLUMNS.keys())
+        project_columns = [ProjectSchema.column_name(column) for column in ProjectSchema.COLUMNS]
+        select_list = ", ".join(
+            [f"c.{col} AS contact_{col}" for col in contact_columns] +
+            [f"p.{col} AS project_{col}" for col in project_columns] +
+            ["links.role AS role"]
+        )
+        sql = (
+            f"SELECT {select_list} FROM {ContactSchema.TABLE_NAME} c "
+            f"LEFT JOIN ("
+            f"SELECT id AS project_id, 'customer' AS role FROM {ProjectSchema.TABLE_NAME} "
+            f"WHERE customer_id = :contact_id "
+            f"UNION ALL "
+            f"SELECT project_id, 'consultant' AS role FROM {ProjectSchema.CONSULTANTS_TABLE_NAME} "
+            f"WHERE contact_id = :contact_id"
+            f") links ON 1 = 1 "
+            f"LEFT JOIN {ProjectSchema.TABLE_NAME} p ON p.id = links.project_id "
+            f"WHERE c.id = :contact_id ORDER BY p.customer_name, p.id"
+        )
+        
+        try:
+            with self._read_connect() as conn:
+                conn.row_factory = sqlite3.Row
+                rows = conn.execute(sql, {'contact_id': self._resolve_id(contact_id)}).fetchall()
+                if not rows:
+                    return None
+                
+                contact = {}
+                for column in contact_columns:
+                    value = rows[0][f"contact_{column}"]
+                    contact[column] = str(value) if value is not None else ""
+                
+                contact['projects'] = []
+                for row in rows:
+                    if row['project_id'] is None:
+                        continue
+                    project = self._project_from_row(conn, row, prefix="project_")
+                    project['role'] = row['role']
+                    contact['projects'].append(project)
+                
+                return contact
+                
+        except sqlite3.Error as e:
+            print(f"Error retrieving contact projects: {e}")
+            return None
+    
+    def get_project_consultants(self, project_id: int) -> List[Dict[str, str]]:
+        """
+        Retrieve the consultant contacts linked to a project.
+        
+        Args:
+            project_id: ID of the project
+            
+        Returns:
+            List of contact dictionaries
+        """
+        select_list = ", ".join(f"c.{col}" for col in ContactSchema.COLUMNS.keys())
+        try:
+            with self._read_connect() as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute(
+                    f"SELECT {select_list} FROM {ProjectSchema.CONSULTANTS_TABLE_NAME} pc "
+                    f"JOIN {ContactSchema.TABLE_NAME} c ON c.id = pc.contact_id "
+                    f"WHERE pc.project_id = ? ORDER BY c.last_name, c.first_name",
+                    (self._resolve_id(project_id),)
+                )
+                
+                consultants = []
+                for row in cursor:
+                    consultant = {}
+                    for column in ContactSchema.COLUMNS.keys():
+                        consultant[column] = str(row[column]) if row[column] is not None else ""
+                    consultants.append(consultant)
+                
+                return consultants
+                
+        except sqlite3.Error as e:
+            print(f"Error retrieving project consultants: {e}")
+            return []
+    
+    def set_project_consultants(self, project_id: int, contact_ids: List[int]) -> Tuple[bool, str]:
+        """
+        Replace the set of consultant contacts linked to a project.
+        
+        Args:
+            project_id: ID of the project
+            contact_ids: IDs of the consultant contacts
+            
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        try:
+            with self._connect() as conn:
+                # Queued creates have been written now
+                project_id = self._resolve_id(project_id)
+                contact_ids = [self._resolve_id(contact_id) for contact_id in contact_ids]
+                conn.execute("PRAGMA foreign_keys = ON")  # Reject unknown project/contact IDs
+                conn.execute(
+                    f"DELETE FROM {ProjectSchema.CONSULTANTS_TABLE_NAME} WHERE project_id = ?",
+                    (project_id,)
+                )
+                conn.executemany(
+                    f"INSERT INTO {ProjectSchema.CONSULTANTS_TABLE_NAME} (project_id, contact_id) "
+                    f"VALUES (?, ?)",
+                    [(project_id, contact_id) for contact_id in set(contact_ids)]
+                )
+                conn.commit()
+                
+            return True, "Project consultants updated successfully"
+            
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
+    
+    def archive_finished_projects(self, max_age_days: Optional[int] = None,
+                                  batch_size: int = 1000) -> int:
+        """
+        Move finished projects that ended long enough ago into the archive table.
+        
+        A project is archived when its state is one of ProjectSchema.ARCHIVED_STATES
+        and its end date is older than max_age_days. Rows are moved
+        in batches, one short transaction each, so other writers are never
+        blocked for long. Consultant links are kept for restore.
+        
+        Args:
+            max_age_days: Minimum age in days since end_date
+                (defaults to ProjectSchema.ARCHIVE_AFTER_DAYS)
+            batch_size: Number of projects moved per transaction
+            
+        Returns:
+            Number of projects archived
+        """
+        if max_age_days is None:
+            max_age_days = ProjectSchema.ARCHIVE_AFTER_DAYS
+        cutoff = (date.today() - timedelta(days=max_age_days)).toordinal()
+        
+        codes = [ProjectSchema.STATE_CODES[state] for state in ProjectSchema.ARCHIVED_STATES]
+        state_placeholders = ", ".join("?" * len(codes))
+        column_names = list(ProjectSchema.COLUMNS.keys()) + list(ProjectSchema.RELATION_COLUMNS.keys())
+        columns = ", ".join(column_names)
+        # The archive keeps state labels
+        select_list = ", ".join(
+            f"(SELECT label FROM {ProjectSchema.STATES_TABLE_NAME} WHERE code = state_code)"
+            if column == 'state' else column for column in column_names
+        )
+        archived_at = date.today().isoformat()
+        
+        archived = 0
+        try:
+            with self._connect_with_archive() as conn:
+                while True:
+                    ids = [row[0] for row in conn.execute(
+                        f"SELECT id FROM {ProjectSchema.TABLE_NAME} "
+                        f"WHERE state_code IN ({state_placeholders}) AND end_day < ? LIMIT ?",
+                        (*codes, cutoff, batch_size)
+                    )]
+                    if not ids:
+                        break
+                    
+                    id_placeholders = ", ".join("?" * len(ids))
+                    conn.execute(
+                        f"INSERT INTO {self.archive_table} ({columns}, archived_at) "
+                        f"SELECT {select_list}, ? FROM {ProjectSchema.TABLE_NAME} WHERE id IN ({id_placeholders})",
+                        (archived_at, *ids)
+                    )
+                    conn.execute(
+                        f"DELETE FROM {ProjectSchema.TABLE_NAME} WHERE id IN ({id_placeholders})", ids
+                    )
+                    conn.commit()
+                    archived += len(ids)
+                    
+        except sqlite3.Error as e:
+            print(f"Error archiving projects: {e}")
+        
+        return archived
+    
+    def restore_projects(self, project_ids: List[int]) -> Tuple[bool, str]:
+        """
+        Move archived projects back into the projects table.
+        
+        Args:
+            project_ids: IDs of the archived projects to restore
+            
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if not project_ids:
+            return False, "No projects selected"
+        
+        column_names = list(ProjectSchema.COLUMNS.keys()) + list(ProjectSchema.RELATION_COLUMNS.keys())
+        columns = ", ".join(ProjectSchema.column_name(column) for column in column_names)
+        # Archived state labels are translated back to codes (new labels are
+        # added to the lookup table first)
+        select_list = ", ".join(
+            f"(SELECT code FROM {ProjectSchema.STATES_TABLE_NAME} WHERE label = archived.state)"
+            if column == 'state' else f"archived.{column}" for column in column_names
+        )
+        try:
+            with self._connect_with_archive() as conn:
+                params = [(project_id,) for project_id in project_ids]
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO {ProjectSchema.STATES_TABLE_NAME} (label) "
+                    f"SELECT state FROM {self.archive_table} WHERE id = ? AND state <> ''", params
+                )
+                count = conn.executemany(
+                    f"INSERT INTO {ProjectSchema.TABLE_NAME} ({columns}) "
+                    f"SELECT {select_list} FROM {self.archive_table} archived WHERE id = ?", params
+                ).rowcount
+                conn.executemany(f"DELETE FROM {self.archive_table} WHERE id = ?", params)
+                
+                # The archive does not keep derived columns or locations; recompute them
+                id_placeholders = ", ".join("?" * len(project_ids))
+                rows = conn.execute(
+                    f"SELECT id, start_date, end_date, location FROM {ProjectSchema.TABLE_NAME} "
+                    f"WHERE id IN ({id_placeholders})", project_ids
+                ).fetchall()
+                conn.executemany(
+                    f"UPDATE {ProjectSchema.TABLE_NAME} SET start_day = ?, end_day = ?, location_id = ? WHERE id = ?",
+                    [(ProjectSchema.to_day_number(start_date), ProjectSchema.to_day_number(end_date),
+                      self._location_id(conn, location), project_id)
+                     for project_id, start_date, end_date, location in rows]
+                )
+                # Projects archived before their history was kept start one
+                self._record_states(conn, [row[0] for row in rows])
+                conn.commit()
+                
+                if count == 0:
+                    return False, "Archived projects not found"
+                
+                return True, f"{count} project{'s' if count != 1 else ''} restored successfully"
+                
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
@@ -5,6 +5,10 @@ This module defines the database schema and validation rules for projects
 to ensure consistency across models and views.
 """
 
+from datetime import date, datetime
+from typing import Optional
+from validation import ValidationEngine, parse_iso_date
+
 class ProjectSchema:
     """Central schema definition for project data structure."""
     
@@ -19,7 +23,87 @@ class ProjectSchema:
         'start_date': 'TEXT',
         'end_date': 'TEXT',
         'is_active': 'BOOLEAN',
-        'state': 'TEXT'
+        'state': 'INTEGER REFERENCES project_states(code)'
+    }
+
+    # Fields stored as the code of a lookup table row instead of their text,
+    # under a column of their own: field -> code column. The model translates
+    # between codes and labels, so records carry the labels as before
+    CODED_COLUMNS = {
+        'state': 'state_code'
+    }
+
+    # Relation columns linking a project to the contacts table (not displayed)
+    RELATION_COLUMNS = {
+        'customer_id': 'INTEGER REFERENCES contacts(id) ON DELETE SET NULL'
+    }
+
+    # Integer day numbers (date.toordinal) derived from the date fields on every
+    # write (not displayed): sortable and indexable, NULL when a date is empty
+    # or cannot be parsed
+    DERIVED_COLUMNS = {
+        'start_day': 'INTEGER',
+        'end_day': 'INTEGER'
+    }
+
+    # Date format of rows written before dates were validated, still accepted
+    # when deriving day numbers
+    LEGACY_DATE_FORMAT = '%d-%m-%Y'
+
+    # Many-to-many link table between projects and consultant contacts
+    CONSULTANTS_TABLE_NAME = "project_consultants"
+    CONSULTANTS_COLUMNS = {
+        'project_id': 'INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE',
+        'contact_id': 'INTEGER NOT NULL REFERENCES contacts(id) ON DELETE CASCADE'
+    }
+
+    # Spatial index of project locations (SQLite R*Tree): one row per point
+    # that project locations were geocoded to (see gazetteer.py), stored as a
+    # zero-size box with its exact coordinates as auxiliary columns. Projects
+    # reference their point, so the many projects of one locality share a row
+    LOCATIONS_TABLE_NAME = "project_locations"
+
+    # Point of the location R*Tree a project's location was geocoded to, set on
+    # every write (not displayed); NULL when the location names no known locality
+    LOCATION_COLUMNS = {
+        'location_id': 'INTEGER'
+    }
+
+    # Nearest-project search: radius of the first box searched, in kilometers
+    # (doubled until the box holds enough projects)
+    NEAREST_SEARCH_RADIUS_KM = 0.5
+
+    # Append-only history of project states: a row is added in the same
+    # transaction as each write that changes a project's state or active flag
+    # (and when it is deleted). state_since_day carries the day the project
+    # entered its state across changes of the active flag only; a row changing
+    # the state also records the state left and the days spent in it, so time
+    # per state is summed without pairing rows. Days are day numbers
+    STATE_HISTORY_TABLE_NAME = "project_state_history"
+    STATE_HISTORY_COLUMNS = {
+        'id': 'INTEGER PRIMARY KEY',
+        'project_id': 'INTEGER NOT NULL',
+        'changed_day': 'INTEGER NOT NULL',
+        'state_code': 'INTEGER',
+        'is_active': 'INTEGER',             # NULL: the project was deleted
+        'state_since_day': 'INTEGER NOT NULL',
+        'left_state_code': 'INTEGER',
+        'left_state_days': 'INTEGER'
+    }
+
+    # Indexes (relation joins, date ranges, archive/overdue selection by state
+    # code, name-ordered paging, projects of a location point, state of a
+    # project as of a day, time per state of the stays ended in a period)
+    INDEXES = {
+        'idx_projects_customer_id': ('projects', ['customer_id']),
+        'idx_project_consultants_contact_id': ('project_consultants', ['contact_id', 'project_id']),
+        'idx_projects_end_day_start_day': ('projects', ['end_day', 'start_day']),
+        'idx_projects_state_code_end_day': ('projects', ['state_code', 'end_day']),
+        'idx_projects_customer_name': ('projects', ['customer_name']),
+        'idx_projects_location_id': ('projects', ['location_id']),
+        'idx_project_state_history_project_day': ('project_state_history', ['project_id', 'changed_day']),
+        'idx_project_state_history_left_state': ('project_state_history',
+                                                 ['left_state_code', 'changed_day', 'left_state_days'])
     }
 
     # Field labels for GUI (Hebrew)
@@ -35,6 +119,9 @@ class ProjectSchema:
     # Required fields
     REQUIRED_FIELDS = ['customer_name']
     
+    # Fields validated as YYYY-MM-DD calendar dates
+    DATE_FIELDS = ['start_date', 'end_date']
+    
     # Field order for display
     DISPLAY_ORDER = ['customer_name', 'location', 'start_date', 'end_date', 'is_active', 'state']
     
@@ -52,35 +139,147 @@ class ProjectSchema:
     # State options
     STATE_OPTIONS = ['תכנון', 'בביצוע', 'הושלם', 'מושהה', 'בוטל']
 
+    # State lookup table. The standard states have fixed codes; a label typed
+    # into the form that is not one of them gets the next free code when first
+    # saved
+    STATES_TABLE_NAME = "project_states"
+    STATE_CODES = {state: code for code, state in enumerate(STATE_OPTIONS, 1)}
+
+    # Timeline bar colors per state
+    STATE_COLORS = {
+        'תכנון': '#9fc5e8',
+        'בביצוע': '#93c47d',
+        'הושלם': '#b7b7b7',
+        'מושהה': '#ffd966',
+        'בוטל': '#ea9999'
+    }
+
+    # States of projects that are still open (deadline and overdue queries)
+    OPEN_STATES = ['תכנון', 'בביצוע', 'מושהה']
+
+    # Fields that can be set on many selected projects at once
+    BATCH_UPDATE_FIELDS = ['state', 'is_active']
+
+    # Archive (cold storage) for finished projects
+    ARCHIVE_TABLE_NAME = "projects_archive"
+    ARCHIVED_STATES = ['הושלם', 'בוטל']
+    ARCHIVE_AFTER_DAYS = 365
+
+    @classmethod
+    def column_name(cls, field):
+        """Name of the column a field is stored in (its code column for coded fields)."""
+        return cls.CODED_COLUMNS.get(field, field)
+    
     @classmethod
     def get_create_table_sql(cls):
         """Generate CREATE TABLE SQL statement."""
-        columns = [f"{col} {definition}" for col, definition in cls.COLUMNS.items()]
+        all_columns = {**cls.COLUMNS, **cls.RELATION_COLUMNS, **cls.DERIVED_COLUMNS, **cls.LOCATION_COLUMNS}
+        columns = [f"{cls.column_name(col)} {definition}" for col, definition in all_columns.items()]
         return f"CREATE TABLE IF NOT EXISTS {cls.TABLE_NAME} ({', '.join(columns)})"
     
+    @classmethod
+    def get_create_states_table_sql(cls):
+        """Generate CREATE TABLE SQL statement for the state lookup table."""
+        return (f"CREATE TABLE IF NOT EXISTS {cls.STATES_TABLE_NAME} "
+                f"(code INTEGER PRIMARY KEY, label TEXT NOT NULL UNIQUE)")
+    
+    @classmethod
+    def get_create_locations_table_sql(cls):
+        """Generate CREATE VIRTUAL TABLE SQL statement for the location R*Tree."""
+        return (f"CREATE VIRTUAL TABLE IF NOT EXISTS {cls.LOCATIONS_TABLE_NAME} USING rtree("
+                f"id, min_latitude, max_latitude, min_longitude, max_longitude, +latitude, +longitude)")
+    
+    @classmethod
+    def get_create_state_history_table_sql(cls):
+        """Generate CREATE TABLE SQL statement for the state history table."""
+        columns = [f"{col} {definition}" for col, definition in cls.STATE_HISTORY_COLUMNS.items()]
+        return f"CREATE TABLE IF NOT EXISTS {cls.STATE_HISTORY_TABLE_NAME} ({', '.join(columns)})"
+    
+    @classmethod
+    def get_create_archive_table_sql(cls, schema_name: str = 'main'):
+        """
+        Generate CREATE TABLE SQL statement for the archive table.
+        
+        Archived rows keep their original IDs (AUTOINCREMENT never reuses them,
+        so IDs stay unique across the hot and archive tables). The archive
+        keeps state labels: it may be a separate file without the lookup table.
+        """
+        all_columns = {**cls.COLUMNS, **cls.RELATION_COLUMNS}
+        all_columns['id'] = 'INTEGER PRIMARY KEY'
+        all_columns['customer_id'] = 'INTEGER'
+        all_columns['state'] = 'TEXT'
+        columns = [f"{col} {definition}" for col, definition in all_columns.items()]
+        columns.append("archived_at TEXT NOT NULL")
+        return f"CREATE TABLE IF NOT EXISTS {schema_name}.{cls.ARCHIVE_TABLE_NAME} ({', '.join(columns)})"
+    
+    @classmethod
+    def get_create_consultants_table_sql(cls):
+        """Generate CREATE TABLE SQL statement for the project-consultant link table."""
+        columns = [f"{col} {definition}" for col, definition in cls.CONSULTANTS_COLUMNS.items()]
+        columns.append("PRIMARY KEY (project_id, contact_id)")
+        return (f"CREATE TABLE IF NOT EXISTS {cls.CONSULTANTS_TABLE_NAME} "
+                f"({', '.join(columns)}) WITHOUT ROWID")
+    
+    @classmethod
+    def get_create_index_sql(cls, names=None):
+        """Generate CREATE INDEX SQL statements (for all indexes, or the given names)."""
+        return [f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+                for name, (table, columns) in cls.INDEXES.items()
+                if names is None or name in names]
+    
+    @classmethod
+    def to_day_number(cls, value) -> Optional[int]:
+        """
+        Convert a date string to its day number (date.toordinal()).
+        
+        Accepts YYYY-MM-DD and the legacy DD-MM-YYYY format. Returns None for
+        empty or unparseable values.
+        """
+        value = (value or '').strip()
+        if not value:
+            return None
+        parsed = parse_iso_date(value)
+        if parsed is None:
+            try:
+                parsed = datetime.strptime(value, cls.LEGACY_DATE_FORMAT).date()
+            except ValueError:
+                return None
+        return parsed.toordinal()
+    
+    @classmethod
+    def from_day_number(cls, day: int) -> str:
+        """Convert a day number back to a YYYY-MM-DD string."""
+        return date.fromordinal(day).isoformat()
+    
+    @classmethod
+    def get_derived_values(cls, data):
+        """Compute the DERIVED_COLUMNS values for project data."""
+        return {
+            'start_day': cls.to_day_number(data.get('start_date', '')),
+            'end_day': cls.to_day_number(data.get('end_date', ''))
+        }
+    
+    # Compiled validation engine (built on first use)
+    _validator = None
+
+    @classmethod
+    def get_validator(cls) -> ValidationEngine:
+        """Get the compiled validation engine for project data."""
+        if cls._validator is None:
+            cls._validator = ValidationEngine(cls)
+        return cls._validator
+    
     @classmethod
     def validate_project_data(cls, data):
         """Validate project data according to schema rules."""
-        errors = []
-        
-        # Check required fields
-        for field in cls.REQUIRED_FIELDS:
-            if not data.get(field, '').strip():
-                errors.append(f"{cls.FIELD_LABELS[field]} is required")
+        return cls.get_validator().validate_record(data)
+    
+    @classmethod
+    def validate_project_batch(cls, records):
+        """
+        Validate a batch of projects in one pass.
         
-        # Validate date format (basic validation)
-        for date_field in ['start_date', 'end_date']:
-            date_value = data.get(date_field, '').strip()
-            if date_value:
-                # Basic date format validation (YYYY-MM-DD)
-                try:
-                    if len(date_value) == 10 and date_value.count('-') == 2:
-                        year, month, day = date_value.split('-')
-                        if not (year.isdigit() and month.isdigit() and day.isdigit()):
-                            errors.append(f"{cls.FIELD_LABELS[date_field]} must be in YYYY-MM-DD format")
-                    elif date_value:
-                        errors.append(f"{cls.FIELD_LABELS[date_field]} must be in YYYY-MM-DD format")
-                except:
-                    errors.append(f"{cls.FIELD_LABELS[date_field]} must be in YYYY-MM-DD format")
-            
-        return errors
+        Returns:
+            Mapping of row index to error messages, for invalid rows only
+        """
+        return cls.get_validator().validate_batch(records)
@@ -4,7 +4,10 @@ View layer for the Project Management System.
 Contains all GUI components built with Tkinter for project management.
 """
 
+import bisect
+import heapq
 import tkinter as tk
+from datetime import date
 from tkinter import ttk, messagebox
 from typing import Dict, List, Callable, Optional
 from project_schema import ProjectSchema
@@ -13,7 +16,11 @@ from project_schema import ProjectSchema
 class ProjectFormView:
     """Form view for creating and editing projects."""
     
-    def __init__(self, parent: tk.Tk, on_save: Callable, on_cancel: Callable):
+    # Number of suggestion rows shown under the customer name
+    SUGGESTION_ROWS = 8
+    
+    def __init__(self, parent: tk.Tk, on_save: Callable, on_cancel: Callable,
+                 on_suggest: Optional[Callable] = None):
         """
         Initialize the project form view.
         
@@ -21,10 +28,20 @@ class ProjectFormView:
             parent: Parent tkinter window
             on_save: Callback function for save action
             on_cancel: Callback function for cancel action
+            on_suggest: Callback function returning customer name suggestions
+                (receives the text typed so far, returns a list of
+                (name, contact_id or None) tuples)
         """
         self.parent = parent
         self.on_save = on_save
         self.on_cancel = on_cancel
+        self.on_suggest = on_suggest
+        
+        # Contact picked from the suggestions (cleared when the name is edited)
+        self.customer_id: Optional[int] = None
+        self._picked_name: Optional[str] = None
+        self._suggestions: List[tuple] = []
+        self.suggestion_list: Optional[tk.Listbox] = None
         
         # Create form window
         self.window = tk.Toplevel(parent)
@@ -99,6 +116,10 @@ class ProjectFormView:
             self.entries[field] = entry
             row += 1
         
+        # Customer name autocomplete
+        if self.on_suggest:
+            self._create_suggestion_list(main_frame)
+        
         # Required fields note
         ttk.Label(main_frame, text="שדה חובה *", 
                  font=("TkDefaultFont", 8)).grid(
@@ -120,6 +141,80 @@ class ProjectFormView:
         # Set focus to first field
         self.entries['customer_name'].focus()
     
+    def _create_suggestion_list(self, parent: ttk.Frame) -> None:
+        """Create the customer name suggestion dropdown (hidden until there are matches)."""
+        entry = self.entries['customer_name']
+        self.suggestion_list = tk.Listbox(parent, height=self.SUGGESTION_ROWS, 
+                                          activestyle='dotbox', exportselection=False)
+        
+        entry.bind("<KeyRelease>", self._handle_customer_typed)
+        entry.bind("<Down>", lambda e: self._focus_suggestions())
+        entry.bind("<Escape>", lambda e: self._hide_suggestions())
+        entry.bind("<FocusOut>", lambda e: self.window.after(150, self._hide_if_unfocused))
+        self.suggestion_list.bind("<Return>", lambda e: self._pick_suggestion())
+        self.suggestion_list.bind("<ButtonRelease-1>", lambda e: self._pick_suggestion())
+        self.suggestion_list.bind("<Escape>", lambda e: self._hide_suggestions(focus_entry=True))
+        self.suggestion_list.bind("<FocusOut>", lambda e: self.window.after(150, self._hide_if_unfocused))
+    
+    def _handle_customer_typed(self, event) -> None:
+        """Update the suggestions after a key press in the customer name."""
+        if event.keysym in ('Down', 'Up', 'Return', 'Escape', 'Tab', 'ISO_Left_Tab'):
+            return
+        
+        text = self.entries['customer_name'].get()
+        if text != self._picked_name:
+            self.customer_id = None
+            self._picked_name = None
+        
+        self._suggestions = self.on_suggest(text) if text.strip() else []
+        if not self._suggestions:
+            self._hide_suggestions()
+            return
+        
+        self.suggestion_list.delete(0, tk.END)
+        for name, contact_id in self._suggestions:
+            self.suggestion_list.insert(tk.END, name if contact_id else f"{name}  (לקוח)")
+        self.suggestion_list.configure(height=min(len(self._suggestions), self.SUGGESTION_ROWS))
+        self.suggestion_list.place(in_=self.entries['customer_name'], relx=0, rely=1.0, relwidth=1.0)
+        self.suggestion_list.lift()
+    
+    def _focus_suggestions(self) -> None:
+        """Move the keyboard focus to the first suggestion."""
+        if self.suggestion_list and self.suggestion_list.winfo_ismapped():
+            self.suggestion_list.focus_set()
+            self.suggestion_list.selection_clear(0, tk.END)
+            self.suggestion_list.selection_set(0)
+            self.suggestion_list.activate(0)
+    
+    def _pick_suggestion(self) -> None:
+        """Fill the customer name from the selected suggestion."""
+        selection = self.suggestion_list.curselection()
+        if not selection:
+            return
+        name, contact_id = self._suggestions[selection[0]]
+        
+        entry = self.entries['customer_name']
+        entry.delete(0, tk.END)
+        entry.insert(0, name)
+        self.customer_id = contact_id
+        self._picked_name = name
+        self._hide_suggestions(focus_entry=True)
+    
+    def _hide_suggestions(self, focus_entry: bool = False) -> None:
+        """Hide the suggestion dropdown."""
+        if self.suggestion_list:
+            self.suggestion_list.place_forget()
+        if focus_entry:
+            self.entries['customer_name'].focus_set()
+    
+    def _hide_if_unfocused(self) -> None:
+        """Hide the suggestions once the focus left both the entry and the dropdown."""
+        if not self.window.winfo_exists():
+            return
+        focused = self.window.focus_get()
+        if focused not in (self.entries['customer_name'], self.suggestion_list):
+            self._hide_suggestions()
+    
     def _handle_save(self) -> None:
         """Handle save button click."""
         project_data = self.get_form_data()
@@ -144,6 +239,10 @@ class ProjectFormView:
                 # For combobox with textvariable
                 data[field] = entry.get().strip()
         
+        # Contact picked from the customer name suggestions
+        if self.customer_id is not None:
+            data['customer_id'] = str(self.customer_id)
+        
         return data
     
     def set_form_data(self, project_data: Dict[str, str]) -> None:
@@ -163,6 +262,11 @@ class ProjectFormView:
                 # For regular entry
                 entry.delete(0, tk.END)
                 entry.insert(0, value)
+        
+        # Keep the project's linked contact until the customer name is edited
+        customer_id = str(project_data.get('customer_id') or '').strip()
+        self.customer_id = int(customer_id) if customer_id else None
+        self._picked_name = project_data.get('customer_name', '') if customer_id else None
     
     def close(self) -> None:
         """Close the form window."""
@@ -173,7 +277,10 @@ class ProjectListView:
     """List view for displaying projects in a table format."""
     
     def __init__(self, parent: tk.Tk, on_add: Callable, on_edit: Callable, 
-                 on_delete: Callable, on_refresh: Callable):
+                 on_delete: Callable, on_refresh: Callable,
+                 on_batch_update: Optional[Callable] = None,
+                 on_archive: Optional[Callable] = None,
+                 on_timeline: Optional[Callable] = None):
         """
         Initialize the project list view.
         
@@ -181,14 +288,21 @@ class ProjectListView:
             parent: Parent tkinter window
             on_add: Callback function for add action
             on_edit: Callback function for edit action
-            on_delete: Callback function for delete action
+            on_delete: Callback function for delete action (receives list of IDs)
             on_refresh: Callback function for refresh action
+            on_batch_update: Callback function for batch update action
+                (receives list of IDs and a dictionary of field changes)
+            on_archive: Callback function for archiving finished projects
+            on_timeline: Callback function for opening the timeline view
         """
         self.parent = parent
         self.on_add = on_add
         self.on_edit = on_edit
         self.on_delete = on_delete
         self.on_refresh = on_refresh
+        self.on_batch_update = on_batch_update
+        self.on_archive = on_archive
+        self.on_timeline = on_timeline
         
         self._create_list_view()
     
@@ -217,7 +331,8 @@ class ProjectListView:
         
         # Create treeview
         columns = list(ProjectSchema.COLUMNS.keys())
-        self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings')
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings',
+                                 selectmode='extended')
         
         # Configure columns
         for col in columns:
@@ -256,16 +371,67 @@ class ProjectListView:
                   command=self._handle_delete).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Refresh", 
                   command=self.on_refresh).pack(side=tk.LEFT, padx=5)
+        if self.on_timeline:
+            ttk.Button(button_frame, text="Timeline", 
+                      command=self.on_timeline).pack(side=tk.LEFT, padx=5)
+        
+        # Batch update frame (applies to all selected projects)
+        batch_frame = ttk.Frame(main_frame)
+        batch_frame.grid(row=3, column=0, pady=(0, 5))
+        
+        self.batch_state_var = tk.StringVar(value=ProjectSchema.STATE_OPTIONS[0])
+        ttk.Button(batch_frame, text="Set State", 
+                  command=lambda: self._handle_batch_update('state', self.batch_state_var.get())
+                  ).pack(side=tk.LEFT, padx=5)
+        ttk.Combobox(batch_frame, textvariable=self.batch_state_var, 
+                    values=ProjectSchema.STATE_OPTIONS, state='readonly', 
+                    width=10).pack(side=tk.LEFT, padx=5)
+        
+        self.batch_active_var = tk.StringVar(value='לא')
+        ttk.Button(batch_frame, text="Set Active", 
+                  command=lambda: self._handle_batch_update('is_active', self.batch_active_var.get())
+                  ).pack(side=tk.LEFT, padx=5)
+        ttk.Combobox(batch_frame, textvariable=self.batch_active_var, 
+                    values=['כן', 'לא'], state='readonly', 
+                    width=5).pack(side=tk.LEFT, padx=5)
+        
+        # Archive controls
+        if self.on_archive:
+            ttk.Button(batch_frame, text="Archive Finished", 
+                      command=self.on_archive).pack(side=tk.LEFT, padx=5)
+        self.include_archived_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(batch_frame, text="Include archived", 
+                       variable=self.include_archived_var, 
+                       command=self.on_refresh).pack(side=tk.LEFT, padx=5)
+        
+        # Archived rows are shown greyed out
+        self.tree.tag_configure('archived', foreground='gray')
         
         # Status bar
         self.status_var = tk.StringVar()
         self.status_var.set("Ready")
         status_bar = ttk.Label(main_frame, textvariable=self.status_var, 
                               relief=tk.SUNKEN, anchor=tk.W)
-        status_bar.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
+        status_bar.grid(row=4, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
         
         # Bind double-click to edit
         self.tree.bind("<Double-1>", lambda e: self._handle_edit())
+        
+        # Bind Ctrl+A to select all rows
+        self.tree.bind("<Control-a>", lambda e: self.tree.selection_set(self.tree.get_children()))
+    
+    def get_selected_ids(self) -> List[int]:
+        """
+        Get the IDs of all selected projects.
+        
+        Returns:
+            List of project IDs
+        """
+        return [int(self.tree.item(item)['values'][0]) for item in self.tree.selection()]
+    
+    def get_include_archived(self) -> bool:
+        """Check whether archived projects should be listed."""
+        return self.include_archived_var.get()
     
     def _handle_edit(self) -> None:
         """Handle edit button click."""
@@ -276,6 +442,10 @@ class ProjectListView:
         
         # Get project ID from selected item
         item = selected_item[0]
+        if self.tree.tag_has('archived', item):
+            messagebox.showwarning("Archived Project", "Archived projects cannot be edited.")
+            return
+        
         project_id = self.tree.item(item)['values'][0]  # ID is first column
         self.on_edit(int(project_id))
     
@@ -286,16 +456,35 @@ class ProjectListView:
             messagebox.showwarning("No Selection", "Please select a project to delete.")
             return
         
+        # Get project IDs of all selected rows
+        project_ids = self.get_selected_ids()
+        
         # Get project info for confirmation
-        item = selected_item[0]
-        values = self.tree.item(item)['values']
-        project_id = values[0]
-        customer_name = values[1]  # customer_name
+        if len(selected_item) == 1:
+            customer_name = self.tree.item(selected_item[0])['values'][1]  # customer_name
+            prompt = f"Are you sure you want to delete project for '{customer_name}'?"
+        else:
+            prompt = f"Are you sure you want to delete {len(selected_item)} selected projects?"
         
         # Confirm deletion
-        if messagebox.askyesno("Confirm Delete", 
-                              f"Are you sure you want to delete project for '{customer_name}'?"):
-            self.on_delete(int(project_id))
+        if messagebox.askyesno("Confirm Delete", prompt):
+            self.on_delete(project_ids)
+    
+    def _handle_batch_update(self, field: str, value: str) -> None:
+        """
+        Handle batch update button click.
+        
+        Args:
+            field: Field to set on all selected projects
+            value: New value for the field
+        """
+        project_ids = self.get_selected_ids()
+        if not project_ids:
+            messagebox.showwarning("No Selection", "Please select projects to update.")
+            return
+        
+        if self.on_batch_update:
+            self.on_batch_update(project_ids, {field: value})
     
     def update_project_list(self, projects: List[Dict[str, str]]) -> None:
         """
@@ -311,12 +500,46 @@ class ProjectListView:
         # Add new items
         for project in projects:
             values = [project.get(col, '') for col in ProjectSchema.COLUMNS.keys()]
-            self.tree.insert('', tk.END, values=values)
+            tags = ('archived',) if project.get('archived') == 'כן' else ()
+            self.tree.insert('', tk.END, iid=project['id'], values=values, tags=tags)
         
         # Update status
         count = len(projects)
         self.status_var.set(f"{count} project{'s' if count != 1 else ''} loaded")
     
+    def remove_projects(self, project_ids: List[int]) -> None:
+        """
+        Remove projects from the treeview without reloading the list.
+        
+        Args:
+            project_ids: IDs of the projects to remove
+        """
+        items = [str(project_id) for project_id in project_ids if self.tree.exists(str(project_id))]
+        if items:
+            self.tree.delete(*items)
+        
+        count = len(self.tree.get_children())
+        self.status_var.set(f"{len(items)} deleted, {count} project{'s' if count != 1 else ''} shown")
+    
+    def update_project_fields(self, project_ids: List[int], changes: Dict[str, str]) -> None:
+        """
+        Update displayed field values for several projects without reloading the list.
+        
+        Args:
+            project_ids: IDs of the projects to update
+            changes: Dictionary of field -> new display value
+        """
+        updated = 0
+        for project_id in project_ids:
+            item = str(project_id)
+            if not self.tree.exists(item):
+                continue
+            for field, value in changes.items():
+                self.tree.set(item, field, value)
+            updated += 1
+        
+        self.status_var.set(f"{updated} project{'s' if updated != 1 else ''} updated")
+    
     def set_status(self, message: str) -> None:
         """
         Set status bar message.
@@ -325,3 +548,389 @@ class ProjectListView:
             message: Status message to display
         """
         self.status_var.set(message)
+
+
+class ProjectTimelineView:
+    """
+    Gantt-style timeline of project schedules drawn on a Canvas.
+    
+    Projects are packed into rows of non-overlapping schedules, and only the
+    bars inside the visible time/row window are drawn. Canvas items
+    are kept in pools and moved/reconfigured on every redraw instead of being
+    deleted and recreated, and redraws are coalesced to one per idle cycle, so
+    panning and zooming stay fast with tens of thousands of projects. Project
+    spans are requested for a time range wider than the viewport and fetched
+    again only when the viewport leaves that range.
+    """
+    
+    ROW_HEIGHT = 22
+    BAR_HEIGHT = 14
+    HEADER_HEIGHT = 30
+    
+    # Zoom limits and steps (pixels per day)
+    MIN_DAY_WIDTH = 0.05
+    MAX_DAY_WIDTH = 40.0
+    ZOOM_FACTOR = 1.25
+    
+    def __init__(self, parent: tk.Tk, on_range_change: Callable, 
+                 on_edit: Optional[Callable] = None):
+        """
+        Initialize the project timeline view.
+        
+        Args:
+            parent: Parent tkinter window
+            on_range_change: Callback function requesting the project spans of a
+                day range (receives first_day, last_day; answer with set_spans)
+            on_edit: Callback function for editing a project (receives project ID)
+        """
+        self.parent = parent
+        self.on_range_change = on_range_change
+        self.on_edit = on_edit
+        
+        # Viewport: left edge in days (date.toordinal), pixels per day, top row
+        self.day_width = 4.0
+        self.first_day = float(date.today().toordinal() - 30)
+        self.first_row = 0.0
+        
+        # Loaded spans, packed into rows (lanes) of non-overlapping
+        # (id, customer_name, state, start_day, end_day) tuples sorted by start
+        self.lanes: List[List[tuple]] = []
+        self.lane_ends: List[List[int]] = []
+        self.span_count = 0
+        self.loaded_range: Optional[tuple] = None
+        
+        # Canvas item pools and the project shown by each bar
+        self._bar_pool: List[tuple] = []
+        self._bar_projects: Dict[int, int] = {}
+        self._tick_pool: List[tuple] = []
+        self._redraw_pending = False
+        self._drag_start: Optional[tuple] = None
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title("Project Timeline")
+        self.window.geometry("1000x550")
+        
+        self._create_timeline_view()
+    
+    def _create_timeline_view(self) -> None:
+        """Create the timeline layout."""
+        main_frame = ttk.Frame(self.window, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        # Configure grid weights
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+        
+        # Toolbar
+        toolbar = ttk.Frame(main_frame)
+        toolbar.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+        ttk.Button(toolbar, text="Zoom In", 
+                  command=lambda: self.zoom(self.ZOOM_FACTOR)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="Zoom Out", 
+                  command=lambda: self.zoom(1 / self.ZOOM_FACTOR)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="Today", 
+                  command=self.go_to_today).pack(side=tk.LEFT, padx=5)
+        
+        # Canvas with a vertical scrollbar (rows are virtual, so the scrollbar
+        # is driven by the view instead of the canvas scroll region)
+        self.canvas = tk.Canvas(main_frame, background='white', highlightthickness=0)
+        self.canvas.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.v_scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self._handle_scrollbar)
+        self.v_scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        
+        # Header background and the "today" marker
+        self._header = self.canvas.create_rectangle(0, 0, 0, self.HEADER_HEIGHT, 
+                                                    fill='#f0f0f0', outline='')
+        self._today_line = self.canvas.create_line(0, 0, 0, 0, fill='red', dash=(4, 2))
+        
+        # Status bar
+        self.status_var = tk.StringVar()
+        self.status_var.set("Ready")
+        status_bar = ttk.Label(main_frame, textvariable=self.status_var, 
+                              relief=tk.SUNKEN, anchor=tk.W)
+        status_bar.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(10, 0))
+        
+        # Pan with drag and mouse wheel, zoom with Ctrl+wheel
+        self.canvas.bind("<Configure>", lambda e: self.schedule_redraw())
+        self.canvas.bind("<ButtonPress-1>", self._handle_drag_start)
+        self.canvas.bind("<B1-Motion>", self._handle_drag)
+        self.canvas.bind("<Double-1>", self._handle_double_click)
+        self.canvas.bind("<MouseWheel>", 
+                         lambda e: self.scroll_rows(-3 if e.delta > 0 else 3))
+        self.canvas.bind("<Shift-MouseWheel>", 
+                         lambda e: self.scroll_days(-30 / self.day_width if e.delta > 0 else 30 / self.day_width))
+        self.canvas.bind("<Control-MouseWheel>", 
+                         lambda e: self.zoom(self.ZOOM_FACTOR if e.delta > 0 else 1 / self.ZOOM_FACTOR, e.x))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll_rows(3))
+        self.canvas.bind("<Shift-Button-4>", lambda e: self.scroll_days(-30 / self.day_width))
+        self.canvas.bind("<Shift-Button-5>", lambda e: self.scroll_days(30 / self.day_width))
+        self.canvas.bind("<Control-Button-4>", lambda e: self.zoom(self.ZOOM_FACTOR, e.x))
+        self.canvas.bind("<Control-Button-5>", lambda e: self.zoom(1 / self.ZOOM_FACTOR, e.x))
+    
+    def is_open(self) -> bool:
+        """Check whether the timeline window still exists."""
+        return bool(self.window.winfo_exists())
+    
+    def _visible_days(self) -> tuple:
+        """Get the (first_day, last_day) range currently visible."""
+        width = max(self.canvas.winfo_width(), 1)
+        first_day = int(self.first_day)
+        return first_day, int(self.first_day + width / self.day_width) + 1
+    
+    def _visible_row_count(self) -> int:
+        """Get the number of rows that fit below the header."""
+        return max((self.canvas.winfo_height() - self.HEADER_HEIGHT) // self.ROW_HEIGHT, 1)
+    
+    def set_spans(self, first_day: int, last_day: int, spans: List[tuple]) -> None:
+        """
+        Set the project spans loaded for a day range and pack them into rows.
+        
+        Projects whose schedules do not overlap share a row: spans are placed,
+        in start order, on the lowest row that is free at their start day, so
+        the number of rows equals the peak number of concurrent projects.
+        
+        Args:
+            first_day: First day of the loaded range
+            last_day: Last day of the loaded range
+            spans: List of (id, customer_name, state, start_day, end_day) tuples
+        """
+        lanes: List[List[tuple]] = []
+        busy: List[tuple] = []  # heap of (end_day, lane) for lanes in use
+        free: List[int] = []    # heap of free lane indexes
+        for span in sorted(spans, key=lambda span: (span[3], span[0])):
+            while busy and busy[0][0] < span[3]:
+                heapq.heappush(free, heapq.heappop(busy)[1])
+            if free:
+                lane = heapq.heappop(free)
+            else:
+                lane = len(lanes)
+                lanes.append([])
+            lanes[lane].append(span)
+            heapq.heappush(busy, (span[4], lane))
+        
+        # Spans in a lane do not overlap, so their end days are sorted too
+        self.lanes = lanes
+        self.lane_ends = [[span[4] for span in lane] for lane in lanes]
+        self.span_count = len(spans)
+        self.loaded_range = (first_day, last_day)
+        self._clamp_rows()
+        self.schedule_redraw()
+    
+    def invalidate(self) -> None:
+        """Drop the loaded spans so they are fetched again on the next redraw."""
+        self.loaded_range = None
+        self.schedule_redraw()
+    
+    def scroll_rows(self, rows: float) -> None:
+        """Scroll the viewport vertically by a number of rows."""
+        self.first_row += rows
+        self._clamp_rows()
+        self.schedule_redraw()
+    
+    def scroll_days(self, days: float) -> None:
+        """Scroll the viewport horizontally by a number of days."""
+        self.first_day += days
+        self.schedule_redraw()
+    
+    def zoom(self, factor: float, x: Optional[int] = None) -> None:
+        """
+        Zoom the time axis, keeping the day under x (default: the centre) in place.
+        
+        Args:
+            factor: Zoom factor (> 1 zooms in)
+            x: Canvas x coordinate to zoom around
+        """
+        if x is None:
+            x = self.canvas.winfo_width() // 2
+        day_at_x = self.first_day + x / self.day_width
+        self.day_width = min(max(self.day_width * factor, self.MIN_DAY_WIDTH), self.MAX_DAY_WIDTH)
+        self.first_day = day_at_x - x / self.day_width
+        self.schedule_redraw()
+    
+    def go_to_today(self) -> None:
+        """Scroll the viewport so that today is a quarter of the way in from the left."""
+        self.first_day = date.today().toordinal() - self.canvas.winfo_width() / 4 / self.day_width
+        self.schedule_redraw()
+    
+    def _clamp_rows(self) -> None:
+        """Keep the top row inside the loaded rows."""
+        max_row = max(len(self.lanes) - self._visible_row_count(), 0)
+        self.first_row = min(max(self.first_row, 0.0), float(max_row))
+    
+    def _handle_scrollbar(self, action: str, value: str, unit: Optional[str] = None) -> None:
+        """Handle vertical scrollbar commands ('moveto' and 'scroll')."""
+        if action == 'moveto':
+            self.first_row = float(value) * len(self.lanes)
+        elif action == 'scroll':
+            step = self._visible_row_count() if unit == 'pages' else 1
+            self.first_row += int(value) * step
+        self._clamp_rows()
+        self.schedule_redraw()
+    
+    def _handle_drag_start(self, event) -> None:
+        """Remember where a drag started."""
+        self._drag_start = (event.x, event.y, self.first_day, self.first_row)
+    
+    def _handle_drag(self, event) -> None:
+        """Pan the viewport with the mouse."""
+        if not self._drag_start:
+            return
+        x, y, first_day, first_row = self._drag_start
+        self.first_day = first_day - (event.x - x) / self.day_width
+        self.first_row = first_row - (event.y - y) / self.ROW_HEIGHT
+        self._clamp_rows()
+        self.schedule_redraw()
+    
+    def _handle_double_click(self, event) -> None:
+        """Edit the project under the mouse."""
+        for item in self.canvas.find_overlapping(event.x, event.y, event.x, event.y):
+            project_id = self._bar_projects.get(item)
+            if project_id is not None and self.on_edit:
+                self.on_edit(project_id)
+                return
+    
+    def schedule_redraw(self) -> None:
+        """Redraw on the next idle cycle (several changes cause one redraw)."""
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.window.after_idle(self._redraw)
+    
+    def _redraw(self) -> None:
+        """Draw the visible part of the timeline."""
+        self._redraw_pending = False
+        if not self.is_open():
+            return
+        
+        self.first_day = max(self.first_day, 1.0)
+        first_day, last_day = self._visible_days()
+        
+        # Fetch spans when the viewport leaves the loaded range (with one
+        # viewport width of margin on both sides, so small pans need no query)
+        if (self.loaded_range is None or first_day < self.loaded_range[0]
+                or last_day > self.loaded_range[1]):
+            margin = last_day - first_day
+            self.loaded_range = (first_day - margin, last_day + margin)
+            self.on_range_change(first_day - margin, last_day + margin)
+            return  # set_spans schedules the redraw
+        
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        self._draw_axis(first_day, last_day, width, height)
+        
+        # Bars of the visible rows that overlap the visible days; within a row
+        # the first overlapping bar is found by bisecting the end days
+        top = int(self.first_row)
+        offset = (self.first_row - top) * self.ROW_HEIGHT
+        visible = []
+        for row in range(top, min(top + self._visible_row_count() + 1, len(self.lanes))):
+            lane = self.lanes[row]
+            y = self.HEADER_HEIGHT + (row - top) * self.ROW_HEIGHT - offset
+            for index in range(bisect.bisect_left(self.lane_ends[row], first_day), len(lane)):
+                span = lane[index]
+                if span[3] > last_day:
+                    break
+                visible.append((span, y))
+        
+        self._bar_projects.clear()
+        for index, (span, y) in enumerate(visible):
+            project_id, customer_name, state, start_day, end_day = span
+            x0 = max((start_day - self.first_day) * self.day_width, -1)
+            x1 = min((end_day + 1 - self.first_day) * self.day_width, width + 1)
+            bar_y = y + (self.ROW_HEIGHT - self.BAR_HEIGHT) / 2
+            
+            if index == len(self._bar_pool):
+                self._bar_pool.append((
+                    self.canvas.create_rectangle(0, 0, 0, 0, outline='#555555'),
+                    self.canvas.create_text(0, 0, anchor=tk.W, font=("TkDefaultFont", 8))
+                ))
+            rect, label = self._bar_pool[index]
+            self.canvas.coords(rect, x0, bar_y, x1, bar_y + self.BAR_HEIGHT)
+            self.canvas.itemconfigure(rect, state=tk.NORMAL, 
+                                      fill=ProjectSchema.STATE_COLORS.get(state, '#cccccc'))
+            self.canvas.coords(label, max(x0, 0) + 3, bar_y + self.BAR_HEIGHT / 2)
+            self.canvas.itemconfigure(label, state=tk.NORMAL, text=customer_name)
+            self._bar_projects[rect] = project_id
+            self._bar_projects[label] = project_id
+        
+        # Hide the pooled items not needed for this frame
+        for rect, label in self._bar_pool[len(visible):]:
+            self.canvas.itemconfigure(rect, state=tk.HIDDEN)
+            self.canvas.itemconfigure(label, state=tk.HIDDEN)
+        
+        # Keep the header above the bars
+        self.canvas.tag_raise(self._header)
+        for line, text in self._tick_pool:
+            self.canvas.tag_raise(text)
+        
+        # Update the scrollbar and status
+        rows = len(self.lanes)
+        if rows:
+            self.v_scrollbar.set(self.first_row / rows, 
+                                 min((self.first_row + self._visible_row_count()) / rows, 1.0))
+        else:
+            self.v_scrollbar.set(0.0, 1.0)
+        count = self.span_count
+        self.status_var.set(f"{count} project{'s' if count != 1 else ''} in {rows} rows between "
+                            f"{ProjectSchema.from_day_number(self.loaded_range[0])} and "
+                            f"{ProjectSchema.from_day_number(self.loaded_range[1])}, "
+                            f"{len(visible)} shown")
+    
+    def _draw_axis(self, first_day: int, last_day: int, width: int, height: int) -> None:
+        """Draw the date axis ticks (months, or years/decades when zoomed out)."""
+        self.canvas.coords(self._header, 0, 0, width, self.HEADER_HEIGHT)
+        
+        today_x = (date.today().toordinal() - self.first_day) * self.day_width
+        self.canvas.coords(self._today_line, today_x, self.HEADER_HEIGHT, today_x, height)
+        
+        # Tick dates: first day of each month (or year, or decade) in the visible range
+        yearly = self.day_width * 30 < 40
+        year_step = 10 if self.day_width * 365 < 40 else 1
+        start = date.fromordinal(max(first_day, 1))
+        if yearly:
+            current = date(max(start.year - start.year % year_step, 1), 1, 1)
+        else:
+            current = date(start.year, start.month, 1)
+        ticks = []
+        while current.toordinal() <= last_day and current.year + year_step <= date.max.year:
+            ticks.append(current)
+            if yearly:
+                current = date(current.year + year_step, 1, 1)
+            elif current.month == 12:
+                current = date(current.year + 1, 1, 1)
+            else:
+                current = date(current.year, current.month + 1, 1)
+        
+        for index, tick in enumerate(ticks):
+            x = (tick.toordinal() - self.first_day) * self.day_width
+            if index == len(self._tick_pool):
+                self._tick_pool.append((
+                    self.canvas.create_line(0, 0, 0, 0, fill='#e0e0e0'),
+                    self.canvas.create_text(0, 0, anchor=tk.W, font=("TkDefaultFont", 8))
+                ))
+            line, text = self._tick_pool[index]
+            self.canvas.coords(line, x, 0, x, height)
+            self.canvas.itemconfigure(line, state=tk.NORMAL)
+            self.canvas.coords(text, x + 3, self.HEADER_HEIGHT / 2)
+            self.canvas.itemconfigure(text, state=tk.NORMAL, 
+                                      text=str(tick.year) if yearly else tick.strftime("%m/%Y"))
+            self.canvas.tag_lower(line)
+        
+        for line, text in self._tick_pool[len(ticks):]:
+            self.canvas.itemconfigure(line, state=tk.HIDDEN)
+            self.canvas.itemconfigure(text, state=tk.HIDDEN)
+    
+    def set_status(self, message: str) -> None:
+        """
+        Set status bar message.
+        
+        Args:
+            message: Status message to display
+        """
+        self.status_var.set(message)
+    
+    def close(self) -> None:
+        """Close the timeline window."""
+        self.window.destroy()
@@ -0,0 +1,183 @@
+# File: replica.py
+"""
+In-memory read replica of the database for read-heavy workstations.
+The database file is copied into an in-memory database with the SQLite
+backup API on a background thread; the models then serve reads from memory
+and send writes to the file. A background thread refreshes the copy when
+PRAGMA data_version shows the file has changed (through this application or
+another workstation). After a write by this process, reads use the file until
+the refreshed copy is in place, so changes are visible immediately.
+
+Enable it in the application by setting the APM_READ_REPLICA environment
+variable to 1.
+"""
+
+import itertools
+import os
+import sqlite3
+import threading
+from typing import Optional
+from performance import ProfileArg, connect
+
+
+# Environment variable enabling the replica in the application
+REPLICA_ENV_VAR = "APM_READ_REPLICA"
+
+# Seconds between checks of the database file for changes by other connections
+DEFAULT_POLL_INTERVAL = 2.0
+
+# Pages copied per backup step (the copy yields the file lock between steps)
+BACKUP_PAGES_PER_STEP = 1024
+
+# Distinguishes the in-memory databases of different replicas and refreshes
+_replica_ids = itertools.count(1)
+
+
+def replica_enabled() -> bool:
+    """Whether the read replica is enabled for the application."""
+    return os.environ.get(REPLICA_ENV_VAR, '').strip().lower() in ('1', 'true', 'yes')
+
+
+class ReplicaWriteConnection(sqlite3.Connection):
+    """Connection to the database file that marks the replica stale when its `with` block ends."""
+    
+    replica = None
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        result = super().__exit__(exc_type, exc_value, traceback)
+        if self.replica is not None:
+            self.replica.invalidate()
+        return result
+
+
+class ReadReplica:
+    """In-memory copy of a database file, refreshed when the file changes."""
+    
+    def __init__(self, db_path: str = "contacts.db", profile: ProfileArg = None,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL):
+        """
+        Initialize the replica (call load or load_async to fill it).
+        
+        Args:
+            db_path: Path to SQLite database file
+            profile: Performance profile or profile name for connections to the file
+            poll_interval: Seconds between checks of the file for changes
+        """
+        self.db_path = db_path
+        self.profile = profile
+        self.poll_interval = poll_interval
+        
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # URI of the current in-memory copy, and a connection keeping it alive
+        self._memory_uri: Optional[str] = None
+        self._keeper: Optional[sqlite3.Connection] = None
+        # Incremented by every local write; the copy is current only if it was
+        # taken after the latest one
+        self._write_generation = 0
+        self._copied_generation = -1
+        # Connection to the file used only to watch PRAGMA data_version
+        self._watch: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+    
+    @property
+    def ready(self) -> bool:
+        """Whether reads are currently served from memory."""
+        with self._lock:
+            return self._memory_uri is not None and self._copied_generation == self._write_generation
+    
+    def connect_for_read(self) -> sqlite3.Connection:
+        """Get a connection for reading: the in-memory copy if current, else the file."""
+        with self._lock:
+            uri = self._memory_uri if self._copied_generation == self._write_generation else None
+        if uri:
+            return sqlite3.connect(uri, uri=True)
+        return connect(self.db_path, self.profile)
+    
+    def connect_for_write(self) -> sqlite3.Connection:
+        """Get a connection to the file; the replica is refreshed after its `with` block."""
+        conn = connect(self.db_path, self.profile, factory=ReplicaWriteConnection)
+        conn.replica = self
+        return conn
+    
+    def invalidate(self) -> None:
+        """Serve reads from the file until the copy has been refreshed."""
+        with self._lock:
+            self._write_generation += 1
+        self._wake.set()
+    
+    def load(self) -> None:
+        """Copy the database into memory (blocking)."""
+        with self._lock:
+            generation = self._write_generation
+        
+        if self._watch is None:
+            self._watch = sqlite3.connect(self.db_path, check_same_thread=False)
+        data_version = self._watch.execute("PRAGMA data_version").fetchone()[0]
+        
+        # Shared-cache in-memory database: every connection to the URI sees it
+        uri = f"file:apm-replica-{os.getpid()}-{next(_replica_ids)}?mode=memory&cache=shared"
+        keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        source = connect(self.db_path, self.profile)
+        try:
+            source.backup(keeper, pages=BACKUP_PAGES_PER_STEP)
+        except sqlite3.Error:
+            keeper.close()
+            raise
+        finally:
+            source.close()
+        
+        with self._lock:
+            old_keeper = self._keeper
+            self._memory_uri, self._keeper = uri, keeper
+            self._copied_generation = generation
+            self._data_version = data_version
+        # Connections still reading the old copy keep it alive until they close
+        if old_keeper:
+            old_keeper.close()
+    
+    def load_async(self) -> threading.Thread:
+        """
+        Copy the database into memory and keep the copy fresh, on a background thread.
+        
+        Returns:
+            The replica thread
+        """
+        self._thread = threading.Thread(target=self._run, name="read-replica", daemon=True)
+        self._thread.start()
+        return self._thread
+    
+    def _run(self) -> None:
+        """Background loop: load, then refresh after local writes or when the file changes."""
+        while not self._stopped.is_set():
+            try:
+                if self._needs_refresh():
+                    self.load()
+            except sqlite3.Error as e:
+                print(f"Error refreshing read replica: {e}")
+                # Reads keep falling back to the file; retry on the next poll
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+    
+    def _needs_refresh(self) -> bool:
+        """Whether the copy is missing, behind a local write, or older than the file."""
+        with self._lock:
+            if self._memory_uri is None or self._copied_generation != self._write_generation:
+                return True
+        return self._watch.execute("PRAGMA data_version").fetchone()[0] != self._data_version
+    
+    def close(self) -> None:
+        """Stop refreshing and release the in-memory copy."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        with self._lock:
+            keeper, self._keeper, self._memory_uri = self._keeper, None, None
+        if keeper:
+            keeper.close()
+        if self._watch:
+            self._watch.close()
+            self._watch = None
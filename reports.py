@@ -0,0 +1,361 @@
+# File: reports.py
+"""
+Weekly CSV/HTML reports for the Architecture Project Manager.
+Each report reads the database through the models, page by page or as one
+aggregate query, and streams its rows to the output file as they are read,
+so a report never holds a large result in memory. Report jobs run in a pool
+of worker processes: several large reports are built in parallel, and the
+application's UI thread only receives their completion.
+
+Run `python reports.py <output_dir>` to build the weekly reports by hand.
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import html
+import os
+import sqlite3
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+from schema import ContactSchema
+from project_schema import ProjectSchema
+from models import ContactModel
+from project_model import ProjectModel
+
+
+# Rows read from the database per page
+PAGE_SIZE = 1000
+
+# Days ahead covered by the upcoming end dates report
+DEFAULT_UPCOMING_DAYS = 30
+
+# Weeks ahead covered by the weekly capacity report
+DEFAULT_CAPACITY_WEEKS = 12
+
+# Output formats, by file extension
+FORMATS = ['html', 'csv']
+
+
+class Report:
+    """A report: its columns and the rows it streams."""
+    
+    def __init__(self, name: str, title: str, columns: List[Tuple[str, str]],
+                 rows: Callable[[str, Dict], Iterator[Dict[str, str]]]):
+        """
+        Initialize a report.
+        
+        Args:
+            name: Report name (used in file names and on the command line)
+            title: Report title
+            columns: (field, label) of each column, in order
+            rows: Yields the report rows as dictionaries; receives (db_path, options)
+        """
+        self.name = name
+        self.title = title
+        self.columns = columns
+        self.rows = rows
+
+
+def _projects_by_state(db_path: str, options: Dict) -> Iterator[Dict[str, str]]:
+    """Rows of the projects-by-state report (one aggregate query)."""
+    yield from ProjectModel(db_path).get_state_summary()
+
+
+def _active_projects_per_customer(db_path: str, options: Dict) -> Iterator[Dict[str, str]]:
+    """Rows of the active-projects-per-customer report, page by page."""
+    model = ProjectModel(db_path)
+    page = model.get_customer_summary_page(limit=PAGE_SIZE)
+    while page:
+        yield from page
+        page = model.get_customer_summary_page(page[-1]['customer_name'], PAGE_SIZE)
+
+
+def _upcoming_end_dates(db_path: str, options: Dict) -> Iterator[Dict[str, str]]:
+    """Rows of the upcoming end dates report (a range of the end date index)."""
+    days = options.get('days', DEFAULT_UPCOMING_DAYS)
+    yield from ProjectModel(db_path).get_projects_ending_within(days, options.get('from_date'))
+
+
+def _weekly_capacity(db_path: str, options: Dict) -> Iterator[Dict[str, str]]:
+    """Rows of the weekly capacity report (one sweep over the schedules of open projects)."""
+    first = date.fromisoformat(options['from_date']) if options.get('from_date') else date.today()
+    last = first + timedelta(weeks=options.get('weeks', DEFAULT_CAPACITY_WEEKS) - 1)
+    yield from ProjectModel(db_path).get_weekly_load(first.isoformat(), last.isoformat(), open_only=True)
+
+
+def _contact_directory(db_path: str, options: Dict) -> Iterator[Dict[str, str]]:
+    """Rows of the contact directory, page by page."""
+    model = ContactModel(db_path)
+    page = model.get_contacts_page(limit=PAGE_SIZE)
+    while page:
+        yield from page
+        page = model.get_contacts_page(int(page[-1]['id']), PAGE_SIZE)
+
+
+REPORTS = {
+    report.name: report for report in [
+        Report(
+            "projects-by-state", "פרויקטים לפי מצב",
+            [('state', ProjectSchema.FIELD_LABELS['state']), ('projects', 'פרויקטים'),
+             ('active_projects', 'פרויקטים פעילים')],
+            _projects_by_state
+        ),
+        Report(
+            "active-per-customer", "פרויקטים פעילים לפי לקוח",
+            [('customer_name', ProjectSchema.FIELD_LABELS['customer_name']),
+             ('active_projects', 'פרויקטים פעילים'),
+             ('first_start_date', ProjectSchema.FIELD_LABELS['start_date']),
+             ('last_end_date', ProjectSchema.FIELD_LABELS['end_date'])],
+            _active_projects_per_customer
+        ),
+        Report(
+            "upcoming-end-dates", "תאריכי סיום קרובים",
+            [('end_date', ProjectSchema.FIELD_LABELS['end_date']),
+             ('customer_name', ProjectSchema.FIELD_LABELS['customer_name']),
+             ('location', ProjectSchema.FIELD_LABELS['location']),
+             ('state', ProjectSchema.FIELD_LABELS['state']),
+             ('start_date', ProjectSchema.FIELD_LABELS['start_date'])],
+            _upcoming_end_dates
+        ),
+        Report(
+            "weekly-capacity", "עומס פרויקטים שבועי",
+            [('week_start', 'תחילת שבוע'), ('week_end', 'סוף שבוע'), ('projects', 'פרויקטים'),
+             ('peak_concurrent', 'שיא במקביל'), ('project_days', 'ימי פרויקט')],
+            _weekly_capacity
+        ),
+        Report(
+            "contacts", "אנשי קשר",
+            [(field, ContactSchema.FIELD_LABELS[field])
+             for field in ['last_name', 'first_name', 'phone', 'email', 'address']],
+            _contact_directory
+        ),
+    ]
+}
+
+# Reports built by the weekly run
+WEEKLY_REPORTS = ["projects-by-state", "active-per-customer", "upcoming-end-dates", "weekly-capacity"]
+
+
+class CsvReportWriter:
+    """Writes a report as CSV (UTF-8 with BOM, so spreadsheet programs detect Hebrew)."""
+    
+    encoding = 'utf-8-sig'
+    
+    def __init__(self, file: TextIO):
+        """Initialize the writer for an open text file (opened with newline='')."""
+        self.writer = csv.writer(file)
+    
+    def begin(self, report: Report) -> None:
+        """Write the header row."""
+        self.writer.writerow([label for _, label in report.columns])
+    
+    def write_row(self, values: List[str]) -> None:
+        """Write one row."""
+        self.writer.writerow(values)
+    
+    def end(self, row_count: int) -> None:
+        """Finish the file (nothing follows the rows in CSV)."""
+
+
+class HtmlReportWriter:
+    """Writes a report as a right-to-left HTML table."""
+    
+    encoding = 'utf-8'
+    
+    def __init__(self, file: TextIO):
+        """Initialize the writer for an open text file."""
+        self.file = file
+    
+    def begin(self, report: Report) -> None:
+        """Write the page head, title and table header."""
+        title = html.escape(report.title)
+        header = "".join(f"<th>{html.escape(label)}</th>" for _, label in report.columns)
+        self.file.write(
+            f'<!DOCTYPE html>\n<html lang="he" dir="rtl">\n<head>\n<meta charset="utf-8">\n'
+            f'<title>{title}</title>\n'
+            f'<style>table {{ border-collapse: collapse; }} '
+            f'th, td {{ border: 1px solid #999; padding: 2px 8px; }}</style>\n'
+            f'</head>\n<body>\n<h1>{title}</h1>\n<p>{date.today().isoformat()}</p>\n'
+            f'<table>\n<thead><tr>{header}</tr></thead>\n<tbody>\n'
+        )
+    
+    def write_row(self, values: List[str]) -> None:
+        """Write one table row."""
+        self.file.write("<tr>" + "".join(f"<td>{html.escape(value)}</td>" for value in values) + "</tr>\n")
+    
+    def end(self, row_count: int) -> None:
+        """Close the table with the row count, and the page."""
+        self.file.write(f"</tbody>\n</table>\n<p>סה\"כ: {row_count}</p>\n</body>\n</html>\n")
+
+
+WRITERS = {'csv': CsvReportWriter, 'html': HtmlReportWriter}
+
+
+class ReportJob:
+    """One report to build into one file."""
+    
+    def __init__(self, report_name: str, output_path: str, output_format: str,
+                 options: Optional[Dict] = None):
+        """
+        Initialize a report job.
+        
+        Args:
+            report_name: Name of the report (see REPORTS)
+            output_path: File to write
+            output_format: 'html' or 'csv'
+            options: Report options (e.g. 'days' for the upcoming end dates report,
+                'weeks' for the weekly capacity report)
+        """
+        self.report_name = report_name
+        self.output_path = output_path
+        self.output_format = output_format
+        self.options = options or {}
+
+
+def weekly_jobs(output_dir: str, formats: Optional[List[str]] = None,
+                report_names: Optional[List[str]] = None) -> List[ReportJob]:
+    """
+    Jobs building reports into dated files, e.g. projects-by-state-2024-05-06.html.
+    
+    Args:
+        output_dir: Directory to write to
+        formats: Output formats (default: all)
+        report_names: Reports to build (default: WEEKLY_REPORTS)
+    """
+    stamp = date.today().isoformat()
+    return [ReportJob(name, os.path.join(output_dir, f"{name}-{stamp}.{output_format}"), output_format)
+            for name in report_names or WEEKLY_REPORTS
+            for output_format in formats or FORMATS]
+
+
+def build_report(job: ReportJob, db_path: str = "contacts.db") -> Tuple[bool, str]:
+    """
+    Build a report file, streaming rows to it as they are read.
+    
+    The report is written to a temporary file that replaces the output file
+    only when complete, so a failed or interrupted job never leaves a
+    truncated report behind.
+    
+    Args:
+        job: Report to build
+        db_path: Path to SQLite database file
+    
+    Returns:
+        Tuple of (success: bool, message: str)
+    """
+    report = REPORTS.get(job.report_name)
+    if not report:
+        return False, f"Unknown report '{job.report_name}'"
+    if job.output_format not in WRITERS:
+        return False, f"Unknown report format '{job.output_format}'"
+    
+    writer_class = WRITERS[job.output_format]
+    partial_path = job.output_path + ".part"
+    try:
+        with open(partial_path, 'w', encoding=writer_class.encoding, newline='') as file:
+            writer = writer_class(file)
+            writer.begin(report)
+            row_count = 0
+            for row in report.rows(db_path, job.options):
+                writer.write_row([row.get(field, "") for field, _ in report.columns])
+                row_count += 1
+            writer.end(row_count)
+        os.replace(partial_path, job.output_path)
+        return True, f"{os.path.basename(job.output_path)}: {row_count} row{'s' if row_count != 1 else ''}"
+        
+    except (OSError, sqlite3.Error) as e:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        return False, f"{os.path.basename(job.output_path)}: {e}"
+
+
+class ReportRunner:
+    """Builds report jobs in parallel in worker processes."""
+    
+    def __init__(self, db_path: str = "contacts.db", max_workers: Optional[int] = None):
+        """
+        Initialize the runner (worker processes start with the first job).
+        
+        Args:
+            db_path: Path to SQLite database file
+            max_workers: Worker processes (default: one per CPU)
+        """
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+    
+    def submit(self, job: ReportJob,
+               on_done: Optional[Callable[[ReportJob, bool, str], None]] = None) -> concurrent.futures.Future:
+        """
+        Start building a report.
+        
+        Args:
+            job: Report to build
+            on_done: Called with (job, success, message) when the job ends; it
+                runs on a background thread of the runner
+        
+        Returns:
+            Future of build_report's (success, message)
+        """
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers)
+        future = self._executor.submit(build_report, job, self.db_path)
+        if on_done:
+            def done(future: concurrent.futures.Future) -> None:
+                try:
+                    success, message = future.result()
+                except Exception as e:
+                    success, message = False, f"{os.path.basename(job.output_path)}: {e}"
+                on_done(job, success, message)
+            future.add_done_callback(done)
+        return future
+    
+    def run(self, jobs: List[ReportJob]) -> List[Tuple[bool, str]]:
+        """Build reports in parallel and wait for all of them (results in job order)."""
+        results = []
+        for future in [self.submit(job) for job in jobs]:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append((False, str(e)))
+        return results
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker processes (after the running jobs if wait is True)."""
+        if self._executor:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point: reports.py <output_dir> [options]."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output_dir", help="directory to write the reports to")
+    parser.add_argument("--db", default="contacts.db", help="database to report on")
+    parser.add_argument("--reports", nargs="+", choices=sorted(REPORTS), default=WEEKLY_REPORTS,
+                        help="reports to build")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS, help="output formats")
+    parser.add_argument("--days", type=int, default=DEFAULT_UPCOMING_DAYS,
+                        help="days ahead covered by the upcoming end dates report")
+    parser.add_argument("--weeks", type=int, default=DEFAULT_CAPACITY_WEEKS,
+                        help="weeks ahead covered by the weekly capacity report")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+    
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs = weekly_jobs(args.output_dir, args.formats, args.reports)
+    for job in jobs:
+        job.options['days'] = args.days
+        job.options['weeks'] = args.weeks
+    
+    runner = ReportRunner(args.db, args.workers)
+    try:
+        for success, message in runner.run(jobs):
+            print(message if success else f"Error: {message}")
+    finally:
+        runner.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ This module defines the database schema and validation rules to ensure
 consistency across models and views.
 """
 
+from validation import ValidationEngine
+
 class ContactSchema:
     """Central schema definition for contact data structure."""
     
@@ -20,6 +22,19 @@ class ContactSchema:
         'email': 'TEXT',
         'address': 'TEXT'
     }
+    
+    # Columns derived from other fields on every write (not displayed)
+    DERIVED_COLUMNS = {
+        'phone_normalized': 'TEXT',
+        'email_normalized': 'TEXT'
+    }
+    
+    # Indexes for exact reverse lookups and name-ordered paging
+    INDEXES = {
+        'idx_contacts_phone_normalized': ['phone_normalized'],
+        'idx_contacts_email_normalized': ['email_normalized'],
+        'idx_contacts_last_name_first_name': ['last_name', 'first_name']
+    }
     # Field order for display
     COLUMNS_DISPLAY_ORDER = {
         'address': 'TEXT',
@@ -42,6 +57,12 @@ class ContactSchema:
     # Required fields
     REQUIRED_FIELDS = ['first_name', 'last_name']
     
+    # Fields validated as email addresses
+    EMAIL_FIELDS = ['email']
+    
+    # Country calling code assumed for local (0-prefixed) phone numbers
+    DEFAULT_COUNTRY_CODE = '972'
+    
     # Field order for display
     DISPLAY_ORDER = ['first_name', 'last_name', 'phone', 'email', 'address']
     
@@ -58,22 +79,76 @@ class ContactSchema:
     @classmethod
     def get_create_table_sql(cls):
         """Generate CREATE TABLE SQL statement."""
-        columns = [f"{col} {definition}" for col, definition in cls.COLUMNS.items()]
+        all_columns = {**cls.COLUMNS, **cls.DERIVED_COLUMNS}
+        columns = [f"{col} {definition}" for col, definition in all_columns.items()]
         return f"CREATE TABLE IF NOT EXISTS {cls.TABLE_NAME} ({', '.join(columns)})"
     
+    @classmethod
+    def get_create_index_sql(cls, names=None):
+        """Generate CREATE INDEX SQL statements (for all indexes, or the given names)."""
+        return [f"CREATE INDEX IF NOT EXISTS {name} ON {cls.TABLE_NAME} ({', '.join(columns)})"
+                for name, columns in cls.INDEXES.items()
+                if names is None or name in names]
+    
+    @classmethod
+    def normalize_phone(cls, phone):
+        """
+        Normalize a free-text phone number to E.164-like digits.
+        
+        '054-526 2331', '+972 54 5262331' and '00972545262331' all become
+        '972545262331'. Returns an empty string if there are no digits.
+        """
+        phone = (phone or '').strip()
+        digits = ''.join(ch for ch in phone if ch.isdigit())
+        if not digits:
+            return ''
+        if phone.startswith('+'):
+            return digits
+        if digits.startswith('00'):
+            return digits[2:]
+        if digits.startswith('0'):
+            return cls.DEFAULT_COUNTRY_CODE + digits[1:]
+        return digits
+    
+    @classmethod
+    def normalize_email(cls, email):
+        """Normalize an email address for matching (trimmed, lowercase)."""
+        return (email or '').strip().lower()
+    
+    @classmethod
+    def normalize_name(cls, name):
+        """Normalize a person/customer name for matching (collapse spaces, ignore case)."""
+        return " ".join((name or '').split()).lower()
+    
+    @classmethod
+    def get_derived_values(cls, data):
+        """Compute the DERIVED_COLUMNS values for contact data."""
+        return {
+            'phone_normalized': cls.normalize_phone(data.get('phone', '')),
+            'email_normalized': cls.normalize_email(data.get('email', ''))
+        }
+    
+    # Compiled validation engine (built on first use)
+    _validator = None
+
+    @classmethod
+    def get_validator(cls) -> ValidationEngine:
+        """Get the compiled validation engine for contact data."""
+        if cls._validator is None:
+            cls._validator = ValidationEngine(cls)
+        return cls._validator
+    
     @classmethod
     def validate_contact_data(cls, data):
         """Validate contact data according to schema rules."""
-        errors = []
-        
-        # Check required fields
-        for field in cls.REQUIRED_FIELDS:
-            if not data.get(field, '').strip():
-                errors.append(f"{cls.FIELD_LABELS[field]} is required")
+        return cls.get_validator().validate_record(data)
+    
+    @classmethod
+    def validate_contact_batch(cls, records):
+        """
+        Validate a batch of contacts in one pass.
         
-        # Basic email validation
-        email = data.get('email', '').strip()
-        if email and '@' not in email:
-            errors.append("Email address must contain '@' symbol")
-            
-        return errors
+        Returns:
+            Mapping of row index to error messages, for invalid rows only
+        """
+        return cls.get_validator().validate_batch(records)
@@ -0,0 +1,341 @@
+# File: server.py
+"""
+Headless HTTP/JSON service exposing contacts and projects to local tools.
+Runs without the GUI: python server.py [--db contacts.db] [--port 8765]
+
+Endpoints (all JSON):
+    GET    /contacts?after_id=&limit=&phone=&email=    list (keyset paged) or look up
+    GET    /contacts/search?q=&limit=                  name prefix / phone / email search
+    GET    /contacts/<id>                              one contact
+    GET    /contacts/<id>/projects                     contact with linked projects
+    POST   /contacts                                   create
+    PUT    /contacts/<id>                              update
+    DELETE /contacts/<id>                              delete
+    GET    /projects?after_id=&limit=&state=           list (keyset paged)
+    GET    /projects?active_from=&active_to=           projects active in a date range
+    GET    /projects?ending_within=<days>              open projects ending soon
+    GET    /projects?overdue=1                         open projects past their end date
+    GET    /projects/<id>                              one project
+    POST   /projects, PUT /projects/<id>, DELETE /projects/<id>
+
+List endpoints send an ETag that changes whenever the database changes (from
+this service or any other process), and answer 304 Not Modified to requests
+whose If-None-Match still matches, without running a query.
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from connection_pool import ConnectionPool
+from models import ContactModel
+from performance import PROFILES
+from project_model import ProjectModel
+
+
+# Default listening address (local tools only)
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Page size for list endpoints (and the largest page a client may ask for)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Largest request body accepted
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class ApiError(Exception):
+    """Error answered with a JSON {"error": ...} body and the given status."""
+    
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ApiServer(ThreadingHTTPServer):
+    """Threaded HTTP server sharing one connection pool and one set of models."""
+    
+    daemon_threads = True
+    
+    def __init__(self, address: Tuple[str, int], db_path: str = "contacts.db",
+                 pool_size: int = 8, verbose: bool = False, profile: Optional[str] = None):
+        """
+        Initialize the server (migrates the database if needed).
+        
+        Args:
+            address: (host, port) to listen on; port 0 picks a free port
+            db_path: Path to SQLite database file
+            pool_size: Idle database connections kept open
+            verbose: Log every request to stderr
+            profile: Performance profile name (default: the configured profile)
+        """
+        self.pool = ConnectionPool(db_path, max_idle=pool_size, profile=profile)
+        self.contacts = ContactModel(db_path, pool=self.pool, profile=profile)
+        self.projects = ProjectModel(db_path, pool=self.pool, profile=profile)
+        self.verbose = verbose
+        
+        # PRAGMA data_version on this connection changes whenever any other
+        # connection commits, which makes it a cheap database-wide change counter
+        self._version_conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._version_lock = threading.Lock()
+        # ETags must not repeat across restarts (data_version starts over)
+        self._etag_prefix = f"{os.getpid():x}{int(time.time()):x}"
+        super().__init__(address, ApiRequestHandler)
+    
+    def current_etag(self) -> str:
+        """ETag for the current state of the database."""
+        with self._version_lock:
+            version = self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+        return f'W/"{self._etag_prefix}-{version}"'
+    
+    def server_close(self) -> None:
+        super().server_close()
+        self._version_conn.close()
+        self.pool.close()
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """Routes requests to the contact and project models."""
+    
+    server: ApiServer
+    protocol_version = "HTTP/1.1"  # Keep-alive for clients making many requests
+    disable_nagle_algorithm = True  # Headers and body are separate writes
+    
+    # (method, path pattern, handler name); patterns are matched in order
+    ROUTES = [
+        ('GET', r'/contacts', 'list_contacts'),
+        ('GET', r'/contacts/search', 'search_contacts'),
+        ('GET', r'/contacts/(\d+)', 'get_contact'),
+        ('GET', r'/contacts/(\d+)/projects', 'get_contact_projects'),
+        ('POST', r'/contacts', 'create_contact'),
+        ('PUT', r'/contacts/(\d+)', 'update_contact'),
+        ('DELETE', r'/contacts/(\d+)', 'delete_contact'),
+        ('GET', r'/projects', 'list_projects'),
+        ('GET', r'/projects/(\d+)', 'get_project'),
+        ('POST', r'/projects', 'create_project'),
+        ('PUT', r'/projects/(\d+)', 'update_project'),
+        ('DELETE', r'/projects/(\d+)', 'delete_project'),
+    ]
+    
+    def do_GET(self):
+        self._dispatch('GET')
+    
+    def do_POST(self):
+        self._dispatch('POST')
+    
+    def do_PUT(self):
+        self._dispatch('PUT')
+    
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+    
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+    
+    def _dispatch(self, method: str) -> None:
+        """Find the route for the request and send its JSON response."""
+        # Always consume the body so a keep-alive connection stays in sync
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': 'Request body too large'})
+            return
+        self.body = self.rfile.read(length)
+        
+        url = urlsplit(self.path)
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = url.path.rstrip('/') or '/'
+        
+        path_matched = False
+        for route_method, pattern, handler_name in self.ROUTES:
+            match = re.fullmatch(pattern, path)
+            if not match:
+                continue
+            path_matched = True
+            if route_method != method:
+                continue
+            etag = None
+            try:
+                result = getattr(self, handler_name)(*(int(group) for group in match.groups()))
+                status, body = result[:2]
+                if len(result) > 2:
+                    etag = result[2]
+            except ApiError as e:
+                status, body = e.status, {'error': e.message}
+            except Exception as e:
+                self.log_error("Error handling %s %s: %r", method, self.path, e)
+                status, body = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'Internal server error'}
+            self._send_json(status, body, etag)
+            return
+        
+        if path_matched:
+            self._send_json(HTTPStatus.METHOD_NOT_ALLOWED, {'error': 'Method not allowed'})
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {'error': 'Not found'})
+    
+    def _send_json(self, status: HTTPStatus, body, etag: Optional[str] = None) -> None:
+        """Send a JSON response (no body if body is None, e.g. for 304 Not Modified)."""
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+        if body is None:
+            self.end_headers()
+            return
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def _read_json(self) -> Dict[str, str]:
+        """Read a JSON object request body; values are converted to strings like form input."""
+        try:
+            data = json.loads(self.body or b'{}')
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, 'Request body is not valid JSON')
+        if not isinstance(data, dict):
+            raise ApiError(HTTPStatus.BAD_REQUEST, 'Request body must be a JSON object')
+        return {key: '' if value is None else str(value) for key, value in data.items()}
+    
+    def _int_param(self, name: str, default: int, maximum: Optional[int] = None) -> int:
+        """Read a non-negative integer query parameter."""
+        value = self.query.get(name)
+        if value is None:
+            return default
+        if not value.isdigit():
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' must be a non-negative integer")
+        return min(int(value), maximum) if maximum else int(value)
+    
+    def _list_response(self, fetch) -> Tuple[HTTPStatus, Optional[Dict], str]:
+        """
+        Answer a list request, honoring If-None-Match.
+        
+        Args:
+            fetch: Callable returning the list of rows
+        
+        Returns:
+            Tuple of (status, body or None for 304, ETag)
+        """
+        # Taken before querying: if the data changes meanwhile, the client just refetches
+        etag = self.server.current_etag()
+        if etag in (self.headers.get('If-None-Match') or ''):
+            return HTTPStatus.NOT_MODIFIED, None, etag
+        items = fetch()
+        return HTTPStatus.OK, {'items': items, 'count': len(items)}, etag
+    
+    @staticmethod
+    def _result(result: Tuple[bool, str], created: bool = False) -> Tuple[HTTPStatus, Dict]:
+        """Convert a model (success, message) result to a response."""
+        success, message = result
+        if success:
+            return (HTTPStatus.CREATED if created else HTTPStatus.OK), {'message': message}
+        if 'not found' in message.lower():
+            raise ApiError(HTTPStatus.NOT_FOUND, message)
+        if message.startswith('Database error'):
+            raise ApiError(HTTPStatus.SERVICE_UNAVAILABLE, message)
+        raise ApiError(HTTPStatus.BAD_REQUEST, message)
+    
+    @staticmethod
+    def _found(item: Optional[Dict], what: str) -> Tuple[HTTPStatus, Dict]:
+        """Respond with one record, or 404."""
+        if item is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"{what} not found")
+        return HTTPStatus.OK, item
+    
+    # Contacts
+    
+    def list_contacts(self):
+        contacts = self.server.contacts
+        if 'phone' in self.query:
+            return self._list_response(lambda: contacts.find_contacts_by_phone(self.query['phone']))
+        if 'email' in self.query:
+            return self._list_response(lambda: contacts.find_contacts_by_email(self.query['email']))
+        after_id = self._int_param('after_id', 0)
+        limit = self._int_param('limit', DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+        return self._list_response(lambda: contacts.get_contacts_page(after_id, limit))
+    
+    def search_contacts(self):
+        limit = self._int_param('limit', DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+        text = self.query.get('q', '')
+        return self._list_response(lambda: self.server.contacts.search_contacts(text, limit))
+    
+    def get_contact(self, contact_id: int):
+        return self._found(self.server.contacts.get_contact_by_id(contact_id), "Contact")
+    
+    def get_contact_projects(self, contact_id: int):
+        return self._found(self.server.projects.get_contact_with_projects(contact_id), "Contact")
+    
+    def create_contact(self):
+        return self._result(self.server.contacts.create_contact(self._read_json()), created=True)
+    
+    def update_contact(self, contact_id: int):
+        return self._result(self.server.contacts.update_contact(contact_id, self._read_json()))
+    
+    def delete_contact(self, contact_id: int):
+        return self._result(self.server.contacts.delete_contact(contact_id))
+    
+    # Projects
+    
+    def list_projects(self):
+        projects = self.server.projects
+        if 'active_from' in self.query or 'active_to' in self.query:
+            start, end = self.query.get('active_from', ''), self.query.get('active_to', '')
+            return self._list_response(lambda: projects.get_projects_active_between(start, end))
+        if 'ending_within' in self.query:
+            days = self._int_param('ending_within', 0)
+            return self._list_response(lambda: projects.get_projects_ending_within(days))
+        if self.query.get('overdue') in ('1', 'true'):
+            return self._list_response(projects.get_overdue_projects)
+        after_id = self._int_param('after_id', 0)
+        limit = self._int_param('limit', DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+        state = self.query.get('state')
+        return self._list_response(lambda: projects.get_projects_page(after_id, limit, state))
+    
+    def get_project(self, project_id: int):
+        return self._found(self.server.projects.get_project_by_id(project_id), "Project")
+    
+    def create_project(self):
+        return self._result(self.server.projects.create_project(self._read_json()), created=True)
+    
+    def update_project(self, project_id: int):
+        return self._result(self.server.projects.update_project(project_id, self._read_json()))
+    
+    def delete_project(self, project_id: int):
+        return self._result(self.server.projects.delete_project(project_id))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point: run the service until interrupted."""
+    parser = argparse.ArgumentParser(description="Serve contacts and projects over local HTTP/JSON.")
+    parser.add_argument("--db", default="contacts.db", help="SQLite database file")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+    parser.add_argument("--pool-size", type=int, default=8, help="idle database connections kept open")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    parser.add_argument("--profile", choices=sorted(PROFILES),
+                        help="performance profile (default: $APM_DB_PROFILE or laptop)")
+    args = parser.parse_args(argv)
+    
+    server = ApiServer((args.host, args.port), args.db, args.pool_size, args.verbose, args.profile)
+    print(f"Serving {args.db} on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,428 @@
+# File: shards.py
+"""
+Combined access to several office databases (shards) for head office.
+Each branch office keeps its own contacts.db. A ShardSet attaches all of them
+to one connection with ATTACH DATABASE; the sharded models run list, search
+and aggregate queries across every shard as one UNION ALL query, merging the
+per-shard results in name order, and send each write to the ordinary model of
+the shard that owns the record. Attached connections are kept and reused, so
+the shards are attached (and their pragmas applied) once per connection, not
+once per query.
+
+Records of different shards may share an ID, so every record returned here
+carries a 'shard' field, and writes take the shard name along with the ID.
+"""
+
+import contextlib
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from schema import ContactSchema
+from project_schema import ProjectSchema
+from performance import ProfileArg, connect, get_profile
+from models import ContactModel
+from project_model import ProjectModel
+
+
+# Most databases SQLite attaches to one connection (SQLITE_MAX_ATTACHED)
+MAX_SHARDS = 10
+
+# Idle attached connections kept open by default
+DEFAULT_MAX_IDLE = 4
+
+# Builds one shard's SELECT: receives (shard name, attached schema name) and
+# returns (sql, params)
+ArmBuilder = Callable[[str, str], Tuple[str, List]]
+
+
+class ShardSet:
+    """A named set of office database files queried together."""
+    
+    def __init__(self, shards: Dict[str, str], profile: ProfileArg = None,
+                 max_idle: int = DEFAULT_MAX_IDLE):
+        """
+        Initialize the shard set.
+        
+        Args:
+            shards: Shard (office) names mapped to their database files; names
+                must be identifiers (letters, digits and underscores)
+            profile: Performance profile or profile name applied to every shard
+            max_idle: Attached connections kept open between queries
+        
+        Raises:
+            ValueError: If there are no shards, too many, or a name is invalid
+        """
+        if not shards:
+            raise ValueError("No shards given")
+        if len(shards) > MAX_SHARDS:
+            raise ValueError(f"At most {MAX_SHARDS} shards can be queried together")
+        invalid = [name for name in shards if not name.isidentifier()]
+        if invalid:
+            raise ValueError(f"Invalid shard names: {', '.join(invalid)}")
+        
+        self.shards = dict(shards)
+        self.profile = profile
+        self.max_idle = max_idle
+        # Idle connections, each with the (name, path) pairs it attached
+        self._idle: List[Tuple[Tuple[Tuple[str, str], ...], sqlite3.Connection]] = []
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def parse(cls, spec: str, profile: ProfileArg = None) -> 'ShardSet':
+        """
+        Create a shard set from a "name=path,name=path" specification.
+        
+        Raises:
+            ValueError: If an entry is not name=path or the shards are invalid
+        """
+        shards = {}
+        for entry in spec.split(','):
+            name, separator, path = entry.partition('=')
+            if not separator or not path.strip():
+                raise ValueError(f"Expected name=path, got '{entry}'")
+            shards[name.strip()] = path.strip()
+        return cls(shards, profile)
+    
+    @property
+    def names(self) -> List[str]:
+        """Shard names, in the order that breaks ties between shards."""
+        return sorted(self.shards)
+    
+    @staticmethod
+    def schema(name: str) -> str:
+        """Name a shard's database is attached under."""
+        return f"shard_{name}"
+    
+    def _open(self) -> sqlite3.Connection:
+        """Open a connection with every shard attached."""
+        # Connections move between threads, but only one thread uses each at a time
+        conn = connect(":memory:", self.profile, check_same_thread=False)
+        profile = get_profile(self.profile)
+        for name in self.names:
+            conn.execute(f"ATTACH DATABASE ? AS {self.schema(name)}", (self.shards[name],))
+            profile.apply(conn, self.schema(name))
+        return conn
+    
+    @contextlib.contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a connection with every shard attached (use it as a `with` block).
+        
+        An idle connection is reused if it attached the current shards; one
+        attached before the shards changed is closed and a new one opened.
+        """
+        attached = tuple(sorted(self.shards.items()))
+        conn = None
+        with self._lock:
+            while self._idle and conn is None:
+                idle_attached, idle = self._idle.pop()
+                if idle_attached == attached:
+                    conn = idle
+                else:
+                    idle.close()
+        if conn is None:
+            conn = self._open()
+        
+        try:
+            yield conn
+        finally:
+            conn.row_factory = None
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append((attached, conn))
+                    conn = None
+            if conn is not None:
+                conn.close()
+    
+    def close(self) -> None:
+        """Close the idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _, conn in idle:
+            conn.close()
+    
+    def fan_out(self, build: ArmBuilder) -> Tuple[str, List]:
+        """
+        Combine one SELECT per shard with UNION ALL.
+        
+        Each SELECT may have its own ORDER BY and LIMIT (so each shard reads
+        just its first rows through its own index); the caller appends the
+        ORDER BY and LIMIT merging them.
+        
+        Args:
+            build: Builds the SELECT of one shard
+        
+        Returns:
+            Tuple of (sql, params)
+        """
+        arms, params = [], []
+        for name in self.names:
+            sql, arm_params = build(name, self.schema(name))
+            arms.append(f"SELECT * FROM ({sql})")
+            params += arm_params
+        return " UNION ALL ".join(arms), params
+
+
+def _after_condition(name: str, columns: List[str],
+                     after: Optional[Dict[str, str]]) -> Tuple[str, List]:
+    """
+    WHERE condition selecting the rows of one shard that follow a keyset cursor.
+    
+    The merged order is (columns..., shard, id): rows of shards sorting before
+    the cursor's shard must come strictly after the cursor's columns, rows of
+    the cursor's shard after its columns and ID, and rows of later shards at
+    or after its columns.
+    
+    Args:
+        name: Shard name
+        columns: Ordering columns (before shard and ID)
+        after: Last record of the previous page (None for the first page)
+    
+    Returns:
+        Tuple of (condition, params)
+    """
+    if not after:
+        return "1", []
+    key = ", ".join(columns)
+    placeholders = ", ".join("?" * len(columns))
+    values = [after[column] for column in columns]
+    if name == after['shard']:
+        return f"({key}, id) > ({placeholders}, ?)", values + [int(after['id'])]
+    if name < after['shard']:
+        return f"({key}) > ({placeholders})", values
+    return f"({key}) >= ({placeholders})", values
+
+
+class ShardedContactModel:
+    """Contacts of every shard: combined reads, writes routed to the owning shard."""
+    
+    def __init__(self, shard_set: ShardSet):
+        """
+        Initialize the model (every shard's schema is brought up to date).
+        
+        Args:
+            shard_set: Shards to combine
+        """
+        self.shard_set = shard_set
+        self.models = {name: ContactModel(path, profile=shard_set.profile)
+                       for name, path in shard_set.shards.items()}
+    
+    def _read(self, sql: str, params: List) -> List[Dict[str, str]]:
+        """Run a combined query and convert its rows to contact dictionaries."""
+        with self.shard_set.connect() as conn:
+            conn.row_factory = sqlite3.Row
+            contacts = []
+            for row in conn.execute(sql, params):
+                contact = {'shard': row['shard']}
+                for column in ContactSchema.COLUMNS.keys():
+                    contact[column] = str(row[column]) if row[column] is not None else ""
+                contacts.append(contact)
+            return contacts
+    
+    def get_contacts_page(self, after: Optional[Dict[str, str]] = None,
+                          limit: int = 1000) -> List[Dict[str, str]]:
+        """
+        Retrieve one page of the contacts of all shards in name order (keyset pagination).
+        
+        Args:
+            after: Last contact of the previous page (None for the first page)
+            limit: Maximum number of contacts to return
+        
+        Returns:
+            List of contact dictionaries with their 'shard', ordered by last
+            name, first name, shard and ID
+        """
+        def build(name: str, schema: str) -> Tuple[str, List]:
+            condition, params = _after_condition(name, ['last_name', 'first_name'], after)
+            return (f"SELECT '{name}' AS shard, * FROM {schema}.{ContactSchema.TABLE_NAME} "
+                    f"WHERE {condition} ORDER BY last_name, first_name, id LIMIT ?"), params + [limit]
+        
+        sql, params = self.shard_set.fan_out(build)
+        try:
+            return self._read(f"{sql} ORDER BY last_name, first_name, shard, id LIMIT ?", params + [limit])
+            
+        except sqlite3.Error as e:
+            print(f"Error retrieving contacts: {e}")
+            return []
+    
+    def search_contacts(self, text: str, limit: int = 50) -> List[Dict[str, str]]:
+        """
+        Search the contacts of all shards by name prefix, phone number or email address.
+        
+        Args:
+            text: First or last name prefix, phone number or email address
+            limit: Maximum number of contacts to return
+        
+        Returns:
+            List of matching contact dictionaries with their 'shard', in shard
+            and ID order
+        """
+        text = " ".join((text or '').split())
+        if not text:
+            return []
+        
+        pattern = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        search_params = [pattern, pattern, ContactSchema.normalize_phone(text) or None,
+                         ContactSchema.normalize_email(text)]
+        
+        def build(name: str, schema: str) -> Tuple[str, List]:
+            return (f"SELECT '{name}' AS shard, * FROM {schema}.{ContactSchema.TABLE_NAME} "
+                    f"WHERE first_name LIKE ? ESCAPE '\\' OR last_name LIKE ? ESCAPE '\\' "
+                    f"OR phone_normalized = ? OR email_normalized = ? "
+                    f"ORDER BY id LIMIT ?"), search_params + [limit]
+        
+        sql, params = self.shard_set.fan_out(build)
+        try:
+            return self._read(f"{sql} ORDER BY shard, id LIMIT ?", params + [limit])
+            
+        except sqlite3.Error as e:
+            print(f"Error searching contacts: {e}")
+            return []
+    
+    def count_contacts(self) -> Dict[str, int]:
+        """
+        Count the contacts of each shard.
+        
+        Returns:
+            Shard names mapped to their contact counts (empty on error)
+        """
+        sql, params = self.shard_set.fan_out(lambda name, schema: (
+            f"SELECT '{name}' AS shard, COUNT(*) AS count FROM {schema}.{ContactSchema.TABLE_NAME}", []
+        ))
+        try:
+            with self.shard_set.connect() as conn:
+                return dict(conn.execute(sql, params).fetchall())
+                
+        except sqlite3.Error as e:
+            print(f"Error counting contacts: {e}")
+            return {}
+    
+    def create_contact(self, shard: str, contact_data: Dict[str, str]) -> Tuple[bool, str]:
+        """Create a contact in a shard (see ContactModel.create_contact)."""
+        if shard not in self.models:
+            return False, f"Unknown shard '{shard}'"
+        return self.models[shard].create_contact(contact_data)
+    
+    def update_contact(self, shard: str, contact_id: int,
+                       contact_data: Dict[str, str]) -> Tuple[bool, str]:
+        """Update a contact of a shard (see ContactModel.update_contact)."""
+        if shard not in self.models:
+            return False, f"Unknown shard '{shard}'"
+        return self.models[shard].update_contact(contact_id, contact_data)
+    
+    def delete_contact(self, shard: str, contact_id: int) -> Tuple[bool, str]:
+        """Delete a contact of a shard (see ContactModel.delete_contact)."""
+        if shard not in self.models:
+            return False, f"Unknown shard '{shard}'"
+        return self.models[shard].delete_contact(contact_id)
+
+
+class ShardedProjectModel:
+    """Projects of every shard: combined reads, writes routed to the owning shard."""
+    
+    def __init__(self, shard_set: ShardSet):
+        """
+        Initialize the model (every shard's schema is brought up to date).
+        
+        Args:
+            shard_set: Shards to combine
+        """
+        self.shard_set = shard_set
+        self.models = {name: ProjectModel(path, profile=shard_set.profile)
+                       for name, path in shard_set.shards.items()}
+    
+    def get_projects_page(self, after: Optional[Dict[str, str]] = None, limit: int = 1000,
+                          state: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Retrieve one page of the (non-archived) projects of all shards in
+        customer name order (keyset pagination).
+        
+        Args:
+            after: Last project of the previous page (None for the first page)
+            limit: Maximum number of projects to return
+            state: Only return projects in this state
+        
+        Returns:
+            List of project dictionaries with their 'shard', ordered by
+            customer name, shard and ID
+        """
+        # Each shard has its own state lookup table (labels other than the
+        # standard states may have different codes in different shards)
+        columns = ", ".join(f"p.{ProjectSchema.column_name(column)}" for column in ProjectSchema.COLUMNS)
+        
+        def build(name: str, schema: str) -> Tuple[str, List]:
+            condition, params = _after_condition(name, ['customer_name'], after)
+            if state:
+                condition += (f" AND state_code = (SELECT code FROM {schema}.{ProjectSchema.STATES_TABLE_NAME} "
+                              f"WHERE label = ?)")
+                params.append(state)
+            return (f"SELECT '{name}' AS shard, {columns}, s.label AS state_label "
+                    f"FROM {schema}.{ProjectSchema.TABLE_NAME} p "
+                    f"LEFT JOIN {schema}.{ProjectSchema.STATES_TABLE_NAME} s ON s.code = p.state_code "
+                    f"WHERE {condition} ORDER BY customer_name, id LIMIT ?"), params + [limit]
+        
+        sql, params = self.shard_set.fan_out(build)
+        try:
+            with self.shard_set.connect() as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute(f"{sql} ORDER BY customer_name, shard, id LIMIT ?", params + [limit])
+                
+                projects = []
+                for row in cursor:
+                    project = {'shard': row['shard']}
+                    for column in ProjectSchema.COLUMNS.keys():
+                        value = row['state_label' if column == 'state' else column]
+                        # Convert boolean field for display
+                        if column == 'is_active':
+                            value = 'כן' if value else 'לא'
+                        project[column] = str(value) if value is not None else ""
+                    projects.append(project)
+                
+                return projects
+                
+        except sqlite3.Error as e:
+            print(f"Error retrieving projects: {e}")
+            return []
+    
+    def count_projects_by_state(self) -> Dict[str, int]:
+        """
+        Count the (non-archived) projects of all shards per state.
+        
+        Returns:
+            States mapped to their project counts across shards (empty on error)
+        """
+        sql, params = self.shard_set.fan_out(lambda name, schema: (
+            f"SELECT COALESCE(s.label, '') AS state, COUNT(*) AS count "
+            f"FROM {schema}.{ProjectSchema.TABLE_NAME} p "
+            f"LEFT JOIN {schema}.{ProjectSchema.STATES_TABLE_NAME} s ON s.code = p.state_code GROUP BY 1", []
+        ))
+        try:
+            with self.shard_set.connect() as conn:
+                return dict(conn.execute(
+                    f"SELECT state, SUM(count) FROM ({sql}) GROUP BY state ORDER BY state", params
+                ).fetchall())
+                
+        except sqlite3.Error as e:
+            print(f"Error counting projects: {e}")
+            return {}
+    
+    def create_project(self, shard: str, project_data: Dict[str, str]) -> Tuple[bool, str]:
+        """Create a project in a shard (see ProjectModel.create_project)."""
+        if shard not in self.models:
+            return False, f"Unknown shard '{shard}'"
+        return self.models[shard].create_project(project_data)
+    
+    def update_project(self, shard: str, project_id: int,
+                       project_data: Dict[str, str]) -> Tuple[bool, str]:
+        """Update a project of a shard (see ProjectModel.update_project)."""
+        if shard not in self.models:
+            return False, f"Unknown shard '{shard}'"
+        return self.models[shard].update_project(project_id, project_data)
+    
+    def delete_project(self, shard: str, project_id: int) -> Tuple[bool, str]:
+        """Delete a project of a shard (see ProjectModel.delete_project)."""
+        if shard not in self.models:
+            return False, f"Unknown shard '{shard}'"
+        return self.models[shard].delete_project(project_id)
@@ -0,0 +1,122 @@
+# File: soak.py
+"""
+Soak test of tab switching for the Architecture Project Manager.
+Starts the application on a copy of a database, switches between the
+contacts and projects views thousands of times under a MemoryTracker, and
+fails (exit status 1) if memory, widgets, Tcl commands or after() callbacks
+grew. Needs a display (e.g. `xvfb-run python soak.py` on a server); run
+`python soak.py --help` for the options. tests/test_soak.py runs it under
+pytest; tests/conftest.py starts Xvfb for it when there is no display,
+and it is skipped when Xvfb is not installed either.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from typing import List, Optional
+
+from app_controller import AppController
+from benchmark import create_sample_database
+from memory_diagnostics import MemoryTracker
+
+
+# Tab switches measured
+DEFAULT_SWITCHES = 10000
+
+# Switches before the baseline is taken (caches and lazily created views fill up)
+DEFAULT_WARMUP_SWITCHES = 50
+
+# Python memory the whole run may keep, in KiB
+DEFAULT_MAX_GROWTH_KIB = 1024
+
+# Measures that must not grow at all
+EXACT_MEASURES = ['widgets', 'tcl_commands', 'after_callbacks']
+
+
+def switch_tabs(app: AppController, count: int) -> None:
+    """Switch between the views `count` times, processing events after each switch."""
+    for _ in range(count):
+        if app.current_view == 'contacts':
+            app.show_projects()
+        else:
+            app.show_contacts()
+        app.root.update()
+
+
+def run_soak(switches: int, warmup: int, sample_every: int, max_growth_kib: int,
+             output_dir: str) -> List[str]:
+    """
+    Run the soak test in the current directory (which holds contacts.db).
+    
+    Args:
+        switches: Tab switches measured
+        warmup: Tab switches before the baseline
+        sample_every: Switches between measurements
+        max_growth_kib: Python memory the run may keep, in KiB
+        output_dir: Folder of the memory log and report
+    
+    Returns:
+        Failures (empty if memory stayed flat)
+    """
+    app = AppController()
+    try:
+        switch_tabs(app, warmup)
+        app.memory_tracker = MemoryTracker(app.root, output_dir=output_dir, sample_every=sample_every)
+        app.memory_tracker.start()
+        switch_tabs(app, switches)
+        
+        growth = app.memory_tracker.growth()
+        print("Growth per switch: " + ", ".join(f"{name} {growth[name] / switches:+.3f}" for name in growth))
+        failures = [f"{name} grew by {growth[name]}" for name in EXACT_MEASURES if growth[name]]
+        if growth['traced_bytes'] > max_growth_kib * 1024:
+            failures.append(f"Python memory grew by {growth['traced_bytes'] / 1024:.0f} KiB "
+                            f"(limit {max_growth_kib} KiB)")
+    finally:
+        app._on_closing()
+        app.root.destroy()
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point: soak.py [options]."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", help="database to copy, e.g. contacts.db (default: a generated sample database)")
+    parser.add_argument("--contacts", type=int, default=2000, help="sample contacts to generate")
+    parser.add_argument("--projects", type=int, default=500, help="sample projects to generate")
+    parser.add_argument("--switches", type=int, default=DEFAULT_SWITCHES, help="tab switches measured")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP_SWITCHES,
+                        help="tab switches before the baseline")
+    parser.add_argument("--sample-every", type=int, default=100, help="switches between measurements")
+    parser.add_argument("--max-growth-kib", type=int, default=DEFAULT_MAX_GROWTH_KIB,
+                        help="Python memory the run may keep, in KiB")
+    parser.add_argument("--output-dir", default="profiles", help="folder of the memory log and report")
+    args = parser.parse_args(argv)
+    
+    output_dir = os.path.abspath(args.output_dir)
+    source_db = os.path.abspath(args.db) if args.db else None
+    work_dir = tempfile.mkdtemp(prefix="apm-soak-")
+    start_dir = os.getcwd()
+    try:
+        # The application opens contacts.db (and writes backups) in the current directory
+        os.chdir(work_dir)
+        if source_db:
+            shutil.copyfile(source_db, "contacts.db")
+        else:
+            create_sample_database("contacts.db", args.contacts, args.projects)
+        failures = run_soak(args.switches, args.warmup, args.sample_every, args.max_growth_kib, output_dir)
+    finally:
+        os.chdir(start_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print(f"Memory log: {os.path.join(output_dir, 'memory.log')}")
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print(f"OK: memory stayed flat over {args.switches} tab switches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# File: stall_watchdog.py
+"""
+Watchdog for stalls of the Tk event loop.
+A heartbeat scheduled with after() on the Tk thread records when the event
+loop last ran. A background thread checks the heartbeat; when it is late by
+more than a threshold, the Tk thread is busy with synchronous work (a slow
+model call, a large Treeview rebuild) and the window is frozen. While the
+stall lasts, the background thread samples the Tk thread's stack; when the
+loop runs again, the stall is logged with its duration, the stack at the
+start of the stall and its site: the application line the Tk thread was on
+most often. The session report lists the sites by total frozen time.
+
+Enable it in the application by setting the APM_STALL_WATCHDOG environment
+variable to 1; the log and report are written to the profiles folder.
+"""
+
+import collections
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from typing import Dict, List, Optional
+from profiler import DEFAULT_OUTPUT_DIR
+
+
+# Environment variable enabling the watchdog in the application
+WATCHDOG_ENV_VAR = "APM_STALL_WATCHDOG"
+
+# Seconds the event loop may be late before it counts as stalled
+DEFAULT_THRESHOLD = 0.25
+
+# Seconds between heartbeats (and between stack samples during a stall)
+DEFAULT_INTERVAL = 0.05
+
+# Sites listed in the session report
+DEFAULT_TOP_SITES = 20
+
+# Files of the application (frames elsewhere are library code)
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def watchdog_enabled() -> bool:
+    """Whether the stall watchdog is enabled for the application."""
+    return os.environ.get(WATCHDOG_ENV_VAR, '').strip().lower() in ('1', 'true', 'yes')
+
+
+def _frame_site(frame) -> str:
+    """Where a frame is, as "file:line (function)"."""
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} ({frame.f_code.co_name})"
+
+
+def _app_site(frame) -> str:
+    """The innermost application frame of a stack (the innermost frame if none is)."""
+    innermost = frame
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if os.path.dirname(filename) == _APP_DIR and filename != os.path.abspath(__file__):
+            return _frame_site(frame)
+        frame = frame.f_back
+    return _frame_site(innermost)
+
+
+class StallWatchdog:
+    """Detects and logs stalls of a Tk event loop."""
+    
+    def __init__(self, root, threshold: float = DEFAULT_THRESHOLD, interval: float = DEFAULT_INTERVAL,
+                 output_dir: str = DEFAULT_OUTPUT_DIR):
+        """
+        Initialize the watchdog (call start from the Tk thread).
+        
+        Args:
+            root: Tk root window whose event loop is watched
+            threshold: Seconds the event loop may be late before it counts as stalled
+            interval: Seconds between heartbeats
+            output_dir: Folder of the stall log and session report
+        """
+        self.root = root
+        self.threshold = threshold
+        self.interval = interval
+        self.output_dir = output_dir
+        self.log_path = os.path.join(output_dir, "stalls.log")
+        
+        # Site -> [stalls, total seconds, longest seconds]
+        self.sites: Dict[str, List[float]] = collections.defaultdict(lambda: [0, 0.0, 0.0])
+        self._tk_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._started_at = 0.0
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """Start the heartbeat and the watching thread (from the Tk thread)."""
+        self._tk_thread_id = threading.get_ident()
+        self._started_at = self._last_beat = time.monotonic()
+        self._beat()
+        self._thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self._thread.start()
+    
+    def _beat(self) -> None:
+        """Heartbeat on the Tk thread."""
+        self._last_beat = time.monotonic()
+        if not self._stopped.is_set():
+            self.root.after(int(self.interval * 1000), self._beat)
+    
+    def _watch(self) -> None:
+        """Watching thread: detect stalls and sample the Tk thread's stack during them."""
+        stall_beat = None  # Heartbeat the current stall started after
+        first_stack = None
+        site_samples = collections.Counter()
+        
+        while not self._stopped.wait(self.interval):
+            last_beat = self._last_beat
+            late = time.monotonic() - last_beat - self.interval
+            
+            if stall_beat is not None and last_beat != stall_beat:
+                # The event loop ran again: the stall is over
+                duration = last_beat - stall_beat - self.interval
+                self._record(duration, site_samples.most_common(1)[0][0], first_stack)
+                stall_beat, first_stack = None, None
+                site_samples.clear()
+                continue
+            
+            if late > self.threshold:
+                frame = sys._current_frames().get(self._tk_thread_id)
+                if frame is None:
+                    continue
+                if stall_beat is None:
+                    stall_beat = last_beat
+                    first_stack = "".join(traceback.format_stack(frame))
+                site_samples[_app_site(frame)] += 1
+    
+    def _record(self, duration: float, site: str, stack: str) -> None:
+        """Log a finished stall and add it to its site's totals."""
+        totals = self.sites[site]
+        totals[0] += 1
+        totals[1] += duration
+        totals[2] = max(totals[2], duration)
+        
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(self.log_path, 'a', encoding='utf-8') as file:
+                file.write(f"{datetime.now().isoformat(timespec='seconds')} "
+                           f"stall of {duration * 1000:.0f} ms at {site}\n{stack}\n")
+        except OSError as e:
+            print(f"Error writing stall log: {e}")
+    
+    def report(self, top: int = DEFAULT_TOP_SITES) -> str:
+        """
+        Summarize the stalls of the session.
+        
+        Args:
+            top: Number of sites to list
+        
+        Returns:
+            Report text listing the sites by total frozen time
+        """
+        elapsed = time.monotonic() - self._started_at
+        frozen = sum(totals[1] for totals in self.sites.values())
+        stalls = sum(totals[0] for totals in self.sites.values())
+        lines = [f"{stalls} stalls over {self.threshold * 1000:.0f} ms, frozen {frozen:.1f} s "
+                 f"of {elapsed:.0f} s", ""]
+        if self.sites:
+            lines.append(f"{'total s':>8} {'stalls':>6} {'longest ms':>10}  site")
+            for site, (count, total, longest) in sorted(self.sites.items(), key=lambda item: -item[1][1])[:top]:
+                lines.append(f"{total:>8.2f} {count:>6} {longest * 1000:>10.0f}  {site}")
+        return "\n".join(lines) + "\n"
+    
+    def stop(self) -> Optional[str]:
+        """
+        Stop watching and write the session report.
+        
+        Returns:
+            Path of the report, or None if it could not be written
+        """
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir,
+                                f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-stalls.txt")
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(self.report())
+        except OSError as e:
+            print(f"Error writing stall report: {e}")
+            return None
+        return path
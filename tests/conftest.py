@@ -0,0 +1,40 @@
+# File: tests/conftest.py
+"""Shared fixtures for the Architecture Project Manager tests (run with `python -m pytest`)."""
+
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Virtual display for the GUI tests (soak test) on machines without one
+XVFB_DISPLAY = ":99"
+
+_xvfb = None
+
+
+def pytest_configure(config):
+    """Start Xvfb when there is no display but it is installed, so the GUI tests run."""
+    global _xvfb
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin") or not shutil.which("Xvfb"):
+        return
+    _xvfb = subprocess.Popen(["Xvfb", XVFB_DISPLAY, "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # Wait for the server socket before the GUI tests are collected
+    socket_path = f"/tmp/.X11-unix/X{XVFB_DISPLAY[1:]}"
+    deadline = time.time() + 10
+    while not os.path.exists(socket_path) and _xvfb.poll() is None and time.time() < deadline:
+        time.sleep(0.05)
+    if _xvfb.poll() is None:
+        os.environ["DISPLAY"] = XVFB_DISPLAY
+    else:
+        _xvfb = None
+
+
+def pytest_unconfigure(config):
+    """Stop the Xvfb started for the run."""
+    if _xvfb:
+        _xvfb.terminate()
+        _xvfb.wait()
@@ -0,0 +1,92 @@
+# File: tests/test_app_controller.py
+"""Tests of tab switching in the main application controller (no display needed)."""
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+import app_controller
+import views
+from app_controller import AppController
+from autocomplete import CustomerNameIndex
+
+
+class _Widget:
+    """Stand-in for a frame or button, counting how it is shown and hidden."""
+    
+    def __init__(self, *args, **kwargs):
+        self.shown = 0
+        self.hidden = 0
+    
+    def grid(self, *args, **kwargs):
+        self.shown += 1
+    
+    def grid_remove(self):
+        self.hidden += 1
+    
+    def configure(self, **kwargs):
+        pass
+    
+    def destroy(self):
+        pass
+
+
+class _ContactController:
+    created = 0
+    
+    def __init__(self, **kwargs):
+        type(self).created += 1
+        self.main_view = type("MainView", (), {"root": _Widget()})()
+        self.form_view = None
+        self.refreshes = 0
+    
+    def refresh_contacts(self):
+        self.refreshes += 1
+    
+    show_add_form = show_edit_form = delete_contacts = refresh_contacts
+
+
+class _ProjectController:
+    created = 0
+    
+    def __init__(self, parent, **kwargs):
+        type(self).created += 1
+        self.form_view = None
+        self.timeline_view = None
+        self.refreshes = 0
+    
+    def refresh_projects(self):
+        self.refreshes += 1
+
+
+def _fail(title, message):
+    raise AssertionError(message)
+
+
+def test_tab_switches_reuse_frames_and_controllers(monkeypatch):
+    monkeypatch.setattr(app_controller, "ContactController", _ContactController)
+    monkeypatch.setattr(app_controller, "ProjectController", _ProjectController)
+    monkeypatch.setattr(views, "ContactListView", _Widget)
+    monkeypatch.setattr(app_controller.messagebox, "showerror", _fail)
+    
+    # Only the state the tab switches use
+    app = AppController.__new__(AppController)
+    app.root = _Widget()
+    app.contacts_btn, app.projects_btn = _Widget(), _Widget()
+    app.contact_frame = app.project_frame = None
+    app.contact_controller = app.project_controller = None
+    app.customer_index = CustomerNameIndex()
+    app.replica = app.write_behind = app.memory_tracker = None
+    frames = []
+    app._create_module_frame = lambda: frames.append(_Widget()) or frames[-1]
+    
+    for _ in range(100):
+        app.show_contacts()
+        app.show_projects()
+    
+    assert _ContactController.created == 1 and _ProjectController.created == 1
+    assert frames == [app.contact_frame, app.project_frame]
+    assert app.contact_frame.hidden == 100 and app.project_frame.hidden == 99
+    assert app.contact_controller.refreshes == 100
+    assert app.project_controller.refreshes == 99
+    assert app.current_view == 'projects'
@@ -0,0 +1,59 @@
+# File: tests/test_backup.py
+"""Tests of the scheduled online backups."""
+
+import os
+import sqlite3
+import time
+
+from backup import BackupManager
+
+
+def _manager(tmp_path) -> BackupManager:
+    db_path = str(tmp_path / "contacts.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE contacts (id INTEGER PRIMARY KEY, first_name TEXT)")
+    return BackupManager(db_path, backup_dir=str(tmp_path / "backups"))
+
+
+def _wait_for_backups(manager: BackupManager, count: int) -> bool:
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        # Done once the copy is written and the timer re-armed for the next one
+        if len(manager.list_backups()) >= count and not manager.is_running() and manager._timer.interval:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_first_schedule_backs_up_at_once(tmp_path):
+    manager = _manager(tmp_path)
+    try:
+        manager.schedule()
+        assert _wait_for_backups(manager, 1)
+        # The next one is a full interval after the backup just taken
+        assert manager._timer.interval == 24 * 3600
+    finally:
+        manager.stop()
+
+
+def test_schedule_counts_from_the_newest_backup(tmp_path):
+    manager = _manager(tmp_path)
+    assert manager.backup_now()[0]
+    backup_path = manager.list_backups()[-1]
+    ten_hours_ago = time.time() - 10 * 3600
+    os.utime(backup_path, (ten_hours_ago, ten_hours_ago))
+    try:
+        manager.schedule()
+        assert 13.9 * 3600 < manager._timer.interval <= 14 * 3600
+    finally:
+        manager.stop()
+    
+    # Older than the interval: backed up at startup
+    two_days_ago = time.time() - 48 * 3600
+    os.utime(backup_path, (two_days_ago, two_days_ago))
+    time.sleep(1)  # Backup file names carry the time to the second
+    try:
+        manager.schedule()
+        assert _wait_for_backups(manager, 2)
+    finally:
+        manager.stop()
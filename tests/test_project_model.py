@@ -0,0 +1,60 @@
+# File: tests/test_project_model.py
+"""Tests of the project model's customer links."""
+
+import sqlite3
+
+from migrations import MigrationRunner
+from models import ContactModel
+from project_model import ProjectModel
+
+
+def _project(name: str, **fields) -> dict:
+    project = {'customer_name': name, 'location': '', 'start_date': '2025-01-01', 'end_date': '2025-06-30',
+               'is_active': 'כן', 'state': 'תכנון'}
+    project.update(fields)
+    return project
+
+
+def _customer_id(db_path: str, project_id: int):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT customer_id FROM projects WHERE id = ?", (project_id,)).fetchone()[0]
+
+
+def test_editing_project_with_ambiguous_customer_name_keeps_its_link(tmp_path):
+    db_path = str(tmp_path / "contacts.db")
+    MigrationRunner(db_path).migrate()
+    contacts = ContactModel(db_path)
+    for phone in ('050-1111111', '050-2222222'):
+        assert contacts.create_contact({'first_name': 'David', 'last_name': 'Cohen', 'phone': phone})[0]
+    
+    model = ProjectModel(db_path)
+    assert model.create_project(_project("David Cohen", customer_id='2'))[0]
+    assert _customer_id(db_path, 1) == 2
+    
+    # Saved unchanged, without customer_id (as a form that did not pick a suggestion)
+    project = model.get_project_by_id(1)
+    project.pop('customer_id', None)
+    assert model.update_project(1, project)[0]
+    assert _customer_id(db_path, 1) == 2
+    
+    assert model.update_project(1, _project("  david   COHEN ", state='בביצוע'))[0]
+    assert _customer_id(db_path, 1) == 2
+    
+    # A new customer name is resolved again
+    assert contacts.create_contact({'first_name': 'Noa', 'last_name': 'Levi'})[0]
+    assert model.update_project(1, _project("Noa Levi"))[0]
+    assert _customer_id(db_path, 1) == 3
+    assert model.update_project(1, _project("David Cohen"))[0]
+    assert _customer_id(db_path, 1) is None
+
+
+def test_project_by_id_carries_its_customer_link(tmp_path):
+    db_path = str(tmp_path / "contacts.db")
+    MigrationRunner(db_path).migrate()
+    assert ContactModel(db_path).create_contact({'first_name': 'David', 'last_name': 'Cohen'})[0]
+    
+    model = ProjectModel(db_path)
+    assert model.create_project(_project("David Cohen"))[0]
+    assert model.create_project(_project("Free text customer"))[0]
+    assert model.get_project_by_id(1)['customer_id'] == "1"
+    assert model.get_project_by_id(2)['customer_id'] == ""
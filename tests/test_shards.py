@@ -0,0 +1,30 @@
+# File: tests/test_shards.py
+"""Tests of combined queries across office databases."""
+
+from models import ContactModel
+from shards import ShardSet, ShardedContactModel
+
+
+def _contact(first_name: str) -> dict:
+    return {'first_name': first_name, 'last_name': 'Cohen', 'phone': '', 'email': '', 'address': ''}
+
+
+def test_attached_connections_are_reused_until_the_shards_change(tmp_path):
+    paths = {name: str(tmp_path / f"{name}.db") for name in ("haifa", "eilat", "acre")}
+    for name, path in paths.items():
+        assert ContactModel(path).create_contact(_contact(name.title()))[0]
+    
+    shard_set = ShardSet({name: paths[name] for name in ("haifa", "eilat")})
+    contacts = ShardedContactModel(shard_set)
+    assert contacts.count_contacts() == {'eilat': 1, 'haifa': 1}
+    with shard_set.connect() as first:
+        pass
+    with shard_set.connect() as second:
+        assert second is first
+        assert second.row_factory is None
+    
+    shard_set.shards['acre'] = paths['acre']
+    with shard_set.connect() as third:
+        assert third is not first
+        assert len(third.execute("PRAGMA database_list").fetchall()) == 4  # main and the three shards
+    shard_set.close()
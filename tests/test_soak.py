@@ -0,0 +1,31 @@
+# File: tests/test_soak.py
+"""Soak test: thousands of tab switches must not grow memory (needs a display)."""
+
+import pytest
+
+tkinter = pytest.importorskip("tkinter")
+
+from benchmark import create_sample_database
+from soak import (DEFAULT_MAX_GROWTH_KIB, DEFAULT_SWITCHES, DEFAULT_WARMUP_SWITCHES,
+                  run_soak)
+
+
+def _display_available() -> bool:
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError:
+        return False
+    root.destroy()
+    return True
+
+
+@pytest.mark.skipif(not _display_available(), reason="needs a display (install Xvfb; tests/conftest.py starts it)")
+def test_tab_switches_keep_memory_flat(tmp_path, monkeypatch):
+    # The application opens contacts.db in the current directory
+    monkeypatch.chdir(tmp_path)
+    create_sample_database("contacts.db", 2000, 500)
+    
+    failures = run_soak(DEFAULT_SWITCHES, DEFAULT_WARMUP_SWITCHES, sample_every=100,
+                        max_growth_kib=DEFAULT_MAX_GROWTH_KIB, output_dir=str(tmp_path / "profiles"))
+    
+    assert failures == []
@@ -0,0 +1,138 @@
+# File: tests/test_state_history.py
+"""Tests of the append-only project state history."""
+
+import datetime
+
+import pytest
+
+import project_model
+from migrations import MigrationRunner
+from project_model import ProjectModel
+
+PLANNING, IN_PROGRESS, DONE, ON_HOLD = 'תכנון', 'בביצוע', 'הושלם', 'מושהה'
+
+
+class _Clock:
+    """Settable date.today() for the project model."""
+    
+    def __init__(self, day: str):
+        self.today = datetime.date.fromisoformat(day)
+    
+    def advance(self, days: int) -> None:
+        self.today += datetime.timedelta(days=days)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock('2025-03-01')
+    
+    class _Date(datetime.date):
+        @classmethod
+        def today(cls):
+            return clock.today
+    
+    monkeypatch.setattr(project_model, 'date', _Date)
+    return clock
+
+
+@pytest.fixture
+def model(tmp_path):
+    db_path = str(tmp_path / "contacts.db")
+    MigrationRunner(db_path).migrate()
+    return ProjectModel(db_path)
+
+
+def _project(name: str, state: str = PLANNING, is_active: str = 'כן', end_date: str = '2025-12-31') -> dict:
+    return {'customer_name': name, 'location': '', 'start_date': '2025-01-01', 'end_date': end_date,
+            'is_active': is_active, 'state': state}
+
+
+def _history(model: ProjectModel, project_id: int) -> list:
+    return [(change['date'], change['state'], change['is_active'], change['days_in_previous_state'])
+            for change in model.get_state_history(project_id)]
+
+
+def _states(model: ProjectModel, as_of_date: str) -> dict:
+    return {int(project['id']): (project['state'], project['is_active'], project['since'])
+            for project in model.get_states_as_of(as_of_date)}
+
+
+def test_same_day_changes_keep_their_order(clock, model):
+    assert model.create_project(_project("Same day"))[0]
+    assert model.update_project(1, _project("Same day", IN_PROGRESS))[0]
+    assert model.update_project(1, _project("Same day", IN_PROGRESS, is_active='לא'))[0]
+    assert model.update_project(1, _project("Same day", ON_HOLD, is_active='לא'))[0]
+    # Saving without a state or active change adds nothing
+    assert model.update_project(1, _project("Same day, renamed", ON_HOLD, is_active='לא'))[0]
+    
+    assert _history(model, 1) == [
+        ('2025-03-01', PLANNING, 'כן', ''),
+        ('2025-03-01', IN_PROGRESS, 'כן', '0'),
+        ('2025-03-01', IN_PROGRESS, 'לא', ''),
+        ('2025-03-01', ON_HOLD, 'לא', '0'),
+    ]
+    # The end of the day shows the last change
+    assert _states(model, '2025-03-01') == {1: (ON_HOLD, 'לא', '2025-03-01')}
+
+
+def test_states_as_of_before_and_between_changes(clock, model):
+    assert model.create_project(_project("First"))[0]
+    clock.advance(10)
+    assert model.update_projects([1], {'state': IN_PROGRESS})[0]
+    assert model.create_project(_project("Second"))[0]
+    clock.advance(5)
+    assert model.update_projects([1], {'is_active': 'לא'})[0]
+    
+    # Before the first history row nothing is known
+    assert _states(model, '2025-02-28') == {}
+    assert _states(model, '2025-03-05') == {1: (PLANNING, 'כן', '2025-03-01')}
+    assert _states(model, '2025-03-11') == {1: (IN_PROGRESS, 'כן', '2025-03-11'),
+                                           2: (PLANNING, 'כן', '2025-03-11')}
+    # An active flag change keeps the day the state was entered
+    assert _states(model, '2025-03-16')[1] == (IN_PROGRESS, 'לא', '2025-03-11')
+    assert model.get_states_as_of('2025-02-30') == []
+
+
+def test_time_in_state_counts_finished_stays_only(clock, model):
+    for name in ("Short", "Long"):
+        assert model.create_project(_project(name))[0]
+    clock.advance(4)
+    assert model.update_projects([1], {'state': IN_PROGRESS})[0]
+    clock.advance(6)
+    assert model.update_projects([2], {'state': IN_PROGRESS})[0]
+    assert model.update_projects([1], {'state': DONE})[0]
+    
+    assert model.get_average_state_durations() == [
+        {'state': PLANNING, 'stays': '2', 'average_days': '7.0'},
+        {'state': IN_PROGRESS, 'stays': '1', 'average_days': '6.0'},
+    ]
+    # Stays are dated by the day they ended
+    assert model.get_average_state_durations('2025-03-01', '2025-03-05') == [
+        {'state': PLANNING, 'stays': '1', 'average_days': '4.0'},
+    ]
+
+
+def test_archive_restore_and_delete(clock, model):
+    assert model.create_project(_project("Archived", end_date='2025-02-01'))[0]
+    assert model.update_projects([1], {'state': DONE})[0]
+    clock.advance(30)
+    assert model.archive_finished_projects(max_age_days=0) == 1
+    
+    # Archived projects keep their history and name
+    assert _states(model, '2025-03-20') == {1: (DONE, 'כן', '2025-03-01')}
+    assert model.get_states_as_of('2025-03-20')[0]['customer_name'] == "Archived"
+    
+    # Restoring is not a state change
+    clock.advance(1)
+    assert model.restore_projects([1])[0]
+    assert _history(model, 1) == [('2025-03-01', PLANNING, 'כן', ''), ('2025-03-01', DONE, 'כן', '0')]
+    
+    clock.advance(1)
+    assert model.delete_project(1)[0]
+    assert _history(model, 1)[-1] == ('2025-04-02', '', '', '32')
+    assert model.get_average_state_durations('2025-04-02') == [{'state': DONE, 'stays': '1', 'average_days': '32.0'}]
+    # Gone after its deletion; before it, shown without a name
+    assert _states(model, '2025-04-02') == {}
+    assert model.get_states_as_of('2025-04-01') == [
+        {'id': '1', 'customer_name': '', 'state': DONE, 'is_active': 'כן', 'since': '2025-03-01'}
+    ]
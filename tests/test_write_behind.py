@@ -0,0 +1,83 @@
+# File: tests/test_write_behind.py
+"""Tests of the write-behind queue with the project model."""
+
+import sqlite3
+
+import write_behind
+from migrations import MigrationRunner
+from project_model import ProjectModel
+from write_behind import WriteBehindQueue
+
+
+def _project(name: str, state: str = 'תכנון') -> dict:
+    return {'customer_name': name, 'location': '', 'start_date': '2025-01-01', 'end_date': '2025-06-30',
+            'is_active': 'כן', 'state': state}
+
+
+def test_queued_create_after_state_changes_resolves_to_its_project(tmp_path):
+    db_path = str(tmp_path / "contacts.db")
+    MigrationRunner(db_path).migrate()
+    direct = ProjectModel(db_path)
+    for index in range(3):
+        assert direct.create_project(_project(f"Direct {index}"))[0]
+    # State history rows make the history table's IDs run ahead of the projects'
+    assert direct.update_projects([1, 2], {'state': 'בביצוע'})[0]
+    
+    queue = WriteBehindQueue(window=60)
+    try:
+        model = ProjectModel(db_path, write_behind=queue)
+        assert model.create_project(_project("Queued"))[0]
+        temp_id = -1
+        assert model.update_project(temp_id, _project("Queued", 'בביצוע'))[0]
+        assert queue.flush(timeout=10)
+        
+        with sqlite3.connect(db_path) as conn:
+            project_id = conn.execute("SELECT id FROM projects WHERE customer_name = 'Queued'").fetchone()[0]
+        assert queue.resolve_id(temp_id) == project_id
+        assert model.get_project_by_id(project_id)['state'] == 'בביצוע'
+        assert [change['state'] for change in model.get_state_history(project_id)] == ['תכנון', 'בביצוע']
+        
+        assert model.delete_projects([temp_id])[0]
+        assert queue.flush(timeout=10)
+        assert model.get_project_by_id(project_id) is None
+        assert len(direct.get_all_projects()) == 3
+    finally:
+        queue.close()
+
+
+def test_writes_to_different_databases_are_committed_to_their_own(tmp_path):
+    paths = [str(tmp_path / "office1.db"), str(tmp_path / "office2.db")]
+    for path in paths:
+        MigrationRunner(path).migrate()
+    
+    queue = WriteBehindQueue(window=60)
+    try:
+        models = [ProjectModel(path, write_behind=queue) for path in paths]
+        for index in range(4):
+            assert models[index % 2].create_project(_project(f"Office {index % 2 + 1} #{index}"))[0]
+        assert queue.flush(timeout=10)
+    finally:
+        queue.close()
+    
+    for number, path in enumerate(paths, 1):
+        with sqlite3.connect(path) as conn:
+            names = [row[0] for row in conn.execute("SELECT customer_name FROM projects")]
+        assert names and all(name.startswith(f"Office {number} ") for name in names)
+
+
+def test_resolved_temporary_ids_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(write_behind, 'RECENT_ID_MAPPINGS', 2)
+    db_path = str(tmp_path / "contacts.db")
+    MigrationRunner(db_path).migrate()
+    
+    queue = WriteBehindQueue(window=60)
+    try:
+        model = ProjectModel(db_path, write_behind=queue)
+        for index in range(5):
+            assert model.create_project(_project(f"Project {index}"))[0]
+            assert queue.flush(timeout=10)
+        # The two most recent creates still resolve
+        assert sorted(queue._id_map) == [-5, -4]
+        assert model.get_project_by_id(-5)['customer_name'] == "Project 4"
+    finally:
+        queue.close()
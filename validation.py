@@ -0,0 +1,177 @@
+# File: validation.py
+"""
+Batch validation engine for the Architecture Project Manager.
+Compiles the rules declared on a schema class (required fields, email fields,
+date fields) once and validates whole batches of records in a single pass.
+"""
+
+import re
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# Strict ISO calendar date (YYYY-MM-DD)
+_DATE_PATTERN = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+
+# Pragmatic email shape: one '@', no whitespace, a dot in the domain part
+_EMAIL_PATTERN = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s.]+")
+
+def parse_iso_date(value: str) -> Optional[date]:
+    """
+    Parse a strict YYYY-MM-DD string into a date.
+
+    Args:
+        value: Date string to parse
+
+    Returns:
+        The parsed date, or None if the value is not a real calendar date
+    """
+    match = _DATE_PATTERN.fullmatch(value)
+    if not match:
+        return None
+    try:
+        return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    except ValueError:
+        return None
+
+
+def is_valid_iso_date(value: str) -> bool:
+    """Check whether a string is a real calendar date in YYYY-MM-DD format."""
+    return parse_iso_date(value) is not None
+
+
+def is_valid_email(value: str) -> bool:
+    """Check whether a string looks like a deliverable email address."""
+    return _EMAIL_PATTERN.fullmatch(value) is not None
+
+
+class ValidationEngine:
+    """
+    Precompiled validator for one schema class.
+
+    Rules are derived from the schema's REQUIRED_FIELDS, EMAIL_FIELDS and
+    DATE_FIELDS when the engine is built. Each rule is then run over a whole
+    column at a time, so validating a batch costs a handful of tight loops
+    rather than one Python call chain per record.
+    """
+
+    def __init__(self, schema):
+        """
+        Initialize the engine from a schema class.
+
+        Args:
+            schema: Schema class (e.g. ContactSchema or ProjectSchema)
+        """
+        self.schema = schema
+        self.rules: List[Tuple[str, Callable[[str], Optional[str]]]] = self._compile_rules()
+
+    def _compile_rules(self) -> List[Tuple[str, Callable[[str], Optional[str]]]]:
+        """
+        Compile the schema declarations into (field, check) pairs.
+
+        Each check receives the stripped field value and returns an error
+        message, or None when the value is valid.
+        """
+        labels = self.schema.FIELD_LABELS
+        rules = []
+
+        for field in self.schema.REQUIRED_FIELDS:
+            message = f"{labels[field]} is required"
+            rules.append((field, lambda value, message=message: None if value else message))
+
+        for field in getattr(self.schema, 'EMAIL_FIELDS', []):
+            def check_email(value: str) -> Optional[str]:
+                if not value or is_valid_email(value):
+                    return None
+                if '@' not in value:
+                    return "Email address must contain '@' symbol"
+                return "Email address must be in name@domain format"
+            rules.append((field, check_email))
+
+        for field in getattr(self.schema, 'DATE_FIELDS', []):
+            format_message = f"{labels[field]} must be in YYYY-MM-DD format"
+            calendar_message = f"{labels[field]} is not a valid calendar date"
+
+            def check_date(value: str, format_message=format_message,
+                           calendar_message=calendar_message) -> Optional[str]:
+                if not value:
+                    return None
+                if not _DATE_PATTERN.fullmatch(value):
+                    return format_message
+                if parse_iso_date(value) is None:
+                    return calendar_message
+                return None
+            rules.append((field, check_date))
+
+        return rules
+
+    def validate_record(self, data: Dict[str, str]) -> List[str]:
+        """
+        Validate a single record.
+
+        Args:
+            data: Dictionary of field values
+
+        Returns:
+            List of error messages (empty if the record is valid)
+        """
+        errors = []
+        for field, check in self.rules:
+            error = check((data.get(field) or '').strip())
+            if error:
+                errors.append(error)
+        return errors
+
+    def validate_columns(self, columns: Dict[str, Sequence[Optional[str]]],
+                         row_count: Optional[int] = None) -> Dict[int, List[str]]:
+        """
+        Validate a batch given as columns (field name -> list of values).
+
+        Args:
+            columns: Mapping of field name to the values of that field per row
+            row_count: Number of rows; inferred from the columns if omitted
+
+        Returns:
+            Mapping of row index to its error messages, for invalid rows only
+        """
+        if row_count is None:
+            row_count = max((len(values) for values in columns.values()), default=0)
+
+        errors: Dict[int, List[str]] = {}
+        for field, check in self.rules:
+            values = columns.get(field)
+            if values is None:
+                # Missing column: every row sees an empty value
+                error = check('')
+                if error:
+                    for index in range(row_count):
+                        errors.setdefault(index, []).append(error)
+                continue
+
+            # Batches repeat values (dates especially), so run each distinct
+            # value through the check once
+            results: Dict[str, Optional[str]] = {}
+            for index, value in enumerate(values):
+                value = value.strip() if value else ''
+                if value in results:
+                    error = results[value]
+                else:
+                    error = results[value] = check(value)
+                if error:
+                    errors.setdefault(index, []).append(error)
+        return errors
+
+    def validate_batch(self, records: Iterable[Dict[str, str]]) -> Dict[int, List[str]]:
+        """
+        Validate a batch of records (list of dictionaries) in one pass.
+
+        Args:
+            records: Iterable of record dictionaries
+
+        Returns:
+            Mapping of row index to its error messages, for invalid rows only
+        """
+        records = records if isinstance(records, list) else list(records)
+        fields = {field for field, _ in self.rules}
+        columns = {field: [record.get(field) for record in records] for field in fields}
+        return self.validate_columns(columns, row_count=len(records))
@@ -167,7 +167,7 @@ class ContactListView:
             parent: Parent tkinter window
             on_add: Callback function for add action
             on_edit: Callback function for edit action
-            on_delete: Callback function for delete action
+            on_delete: Callback function for delete action (receives list of IDs)
             on_refresh: Callback function for refresh action
         """
         self.parent = parent
@@ -203,7 +203,8 @@ class ContactListView:
         
         # Create treeview
         columns = list(ContactSchema.COLUMNS.keys())
-        self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings')
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings',
+                                 selectmode='extended')
         
         # Configure columns
         for col in columns:
@@ -252,6 +253,9 @@ class ContactListView:
         
         # Bind double-click to edit
         self.tree.bind("<Double-1>", lambda e: self._handle_edit())
+        
+        # Bind Ctrl+A to select all rows
+        self.tree.bind("<Control-a>", lambda e: self.tree.selection_set(self.tree.get_children()))
     
     def _handle_edit(self) -> None:
         """Handle edit button click."""
@@ -272,16 +276,20 @@ class ContactListView:
             messagebox.showwarning("No Selection", "Please select a contact to delete.")
             return
         
+        # Get contact IDs of all selected rows
+        contact_ids = [int(self.tree.item(item)['values'][0]) for item in selected_item]
+        
         # Get contact info for confirmation
-        item = selected_item[0]
-        values = self.tree.item(item)['values']
-        contact_id = values[0]
-        name = f"{values[1]} {values[2]}"  # first_name + last_name
+        if len(selected_item) == 1:
+            values = self.tree.item(selected_item[0])['values']
+            name = f"{values[1]} {values[2]}"  # first_name + last_name
+            prompt = f"Are you sure you want to delete '{name}'?"
+        else:
+            prompt = f"Are you sure you want to delete {len(selected_item)} selected contacts?"
         
         # Confirm deletion
-        if messagebox.askyesno("Confirm Delete", 
-                              f"Are you sure you want to delete '{name}'?"):
-            self.on_delete(int(contact_id))
+        if messagebox.askyesno("Confirm Delete", prompt):
+            self.on_delete(contact_ids)
     
     def update_contact_list(self, contacts: List[Dict[str, str]]) -> None:
         """
@@ -297,12 +305,26 @@ class ContactListView:
         # Add new items
         for contact in contacts:
             values = [contact.get(col, '') for col in ContactSchema.COLUMNS.keys()]
-            self.tree.insert('', tk.END, values=values)
+            self.tree.insert('', tk.END, iid=contact['id'], values=values)
         
         # Update status
         count = len(contacts)
         self.status_var.set(f"{count} contact{'s' if count != 1 else ''} loaded")
     
+    def remove_contacts(self, contact_ids: List[int]) -> None:
+        """
+        Remove contacts from the treeview without reloading the list.
+        
+        Args:
+            contact_ids: IDs of the contacts to remove
+        """
+        items = [str(contact_id) for contact_id in contact_ids if self.tree.exists(str(contact_id))]
+        if items:
+            self.tree.delete(*items)
+        
+        count = len(self.tree.get_children())
+        self.status_var.set(f"{len(items)} deleted, {count} contact{'s' if count != 1 else ''} shown")
+    
     def set_status(self, message: str) -> None:
         """
         Set status bar message.
@@ -316,13 +338,16 @@ class ContactListView:
 class MainView:
     """Main application view that manages the overall window."""
     
-    def __init__(self, title: str = "Contact Management System"):
+    def __init__(self, title: str = "Contact Management System",
+                 on_close: Optional[Callable[[], bool]] = None):
         """
         Initialize the main application window.
         
         Args:
             title: Window title
+            on_close: Called when the window is closed; returning False keeps it open
         """
+        self.on_close = on_close
         self.root = tk.Tk()
         self.root.title(title)
         self.root.geometry("800x600")
@@ -343,6 +368,8 @@ class MainView:
     
     def _on_closing(self) -> None:
         """Handle window close event."""
+        if self.on_close and not self.on_close():
+            return
         self.root.quit()  # Exit the mainloop
         self.root.destroy()  # Destroy the window
     
@@ -0,0 +1,378 @@
+# File: write_behind.py
+"""
+Write-behind queue with group commit for fast data entry.
+When a model has a queue, its create/update/delete calls are validated and
+queued instead of written, and return at once. A background thread applies
+queued writes in order, many per transaction (up to a batch size, or whatever
+arrived within a short time window), so one sync to disk covers a whole
+group of edits. Until a write is committed, the model's list and
+get-by-ID reads show it, and its other reads wait for the queue to drain.
+
+Each write runs inside its own savepoint, so a write that fails (e.g. its
+record was deleted meanwhile) is rolled back and reported without affecting
+the rest of its group. Queued writes live in memory: they are lost if the
+process dies before they are flushed, which is why the application flushes
+the queue before closing.
+
+Enable it in the application by setting the APM_WRITE_BEHIND environment
+variable to 1.
+"""
+
+import collections
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+
+# Environment variable enabling the write-behind queue in the application
+WRITE_BEHIND_ENV_VAR = "APM_WRITE_BEHIND"
+
+# Most writes committed in one transaction
+DEFAULT_MAX_BATCH = 200
+
+# Seconds a write may wait for others to join its group
+DEFAULT_WINDOW_SECONDS = 0.5
+
+# Seconds to wait before retrying a group whose transaction failed
+RETRY_DELAY_SECONDS = 2.0
+
+# Resolved temporary IDs kept after no queued write refers to them (views show
+# a created record with its temporary ID until they are refreshed)
+RECENT_ID_MAPPINGS = 1000
+
+
+def write_behind_enabled() -> bool:
+    """Whether the write-behind queue is enabled for the application."""
+    return os.environ.get(WRITE_BEHIND_ENV_VAR, '').strip().lower() in ('1', 'true', 'yes')
+
+
+class PendingWrite:
+    """A queued model write, with what reads need to show it before it is committed."""
+    
+    def __init__(self, description: str, apply: Callable[[], Tuple[bool, str]],
+                 connect: Callable[[], sqlite3.Connection], target: str, table: str, action: str,
+                 record_ids: List[int], record: Optional[Dict[str, str]] = None):
+        """
+        Initialize a pending write.
+        
+        Args:
+            description: What the write does, for error messages
+            apply: Performs the write (the model method, run on the flush thread)
+            connect: Opens a connection to the database the write goes to
+            target: Path of that database (only writes to the same database
+                are grouped in one transaction)
+            table: Table written to
+            action: 'create', 'update' or 'delete'
+            record_ids: IDs of the affected records (a temporary ID for a create)
+            record: Display values of the created or updated fields
+        """
+        self.description = description
+        self.apply = apply
+        self.connect = connect
+        self.target = target
+        self.table = table
+        self.action = action
+        self.record_ids = record_ids
+        self.record = record or {}
+        # Real ID of the created record, reported by apply (see WriteBehindQueue.record_created)
+        self.created_id: Optional[int] = None
+
+
+class _GroupConnection:
+    """
+    Stands in for a model connection while a group is flushed: each `with`
+    block becomes a savepoint of the group transaction and commit() is
+    deferred to the end of the group.
+    """
+    
+    def __init__(self, conn: sqlite3.Connection):
+        object.__setattr__(self, '_conn', conn)
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+    
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+    
+    def __enter__(self):
+        self._conn.execute("SAVEPOINT write_behind")
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self._conn.execute("ROLLBACK TO write_behind")
+        self._conn.execute("RELEASE write_behind")
+        self._conn.row_factory = None
+        return False
+    
+    def commit(self) -> None:
+        """Committed with the rest of the group."""
+
+
+class WriteBehindQueue:
+    """Queue of model writes flushed in grouped transactions on a background thread."""
+    
+    def __init__(self, max_batch: int = DEFAULT_MAX_BATCH, window: float = DEFAULT_WINDOW_SECONDS,
+                 on_error: Optional[Callable[[str, str], None]] = None,
+                 on_commit: Optional[Callable[[List[PendingWrite]], None]] = None):
+        """
+        Initialize the queue and start its flush thread.
+        
+        Args:
+            max_batch: Most writes committed in one transaction
+            window: Seconds a write may wait for others to join its group
+            on_error: Called (on the flush thread) with (description, message)
+                when a queued write fails
+            on_commit: Called (on the flush thread) with the writes of each
+                committed group
+        """
+        self.max_batch = max_batch
+        self.window = window
+        self.on_error = on_error
+        self.on_commit = on_commit
+        
+        self._writes: Deque[PendingWrite] = collections.deque()
+        self._first_queued_at = 0.0
+        self._condition = threading.Condition()
+        # Held while a group is written and committed; readers hold it while
+        # they combine committed rows with pending writes
+        self._commit_lock = threading.RLock()
+        self._temp_ids = 0
+        # Temporary IDs of created records mapped to their real IDs, oldest first
+        self._id_map: Dict[int, int] = collections.OrderedDict()
+        self._group_id_map: Dict[int, int] = {}
+        self._group: Optional[_GroupConnection] = None
+        # Write being applied on the flush thread
+        self._applying: Optional[PendingWrite] = None
+        # Callers waiting in flush(); the grouping window is skipped for them
+        self._flush_waiters = 0
+        # Whether the last group transaction failed (reported once per streak)
+        self._failing = False
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+    
+    def _on_flush_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+    
+    def accepts_writes(self) -> bool:
+        """Whether a model write should be queued (False while the queue itself applies writes)."""
+        return not self._on_flush_thread()
+    
+    def new_temp_id(self) -> int:
+        """Get a temporary (negative) ID for a record whose create is still queued."""
+        with self._condition:
+            self._temp_ids -= 1
+            return self._temp_ids
+    
+    def resolve_id(self, record_id: int) -> int:
+        """Map a temporary record ID to the real one, once its create has been applied."""
+        if record_id >= 0:
+            return record_id
+        if self._on_flush_thread() and record_id in self._group_id_map:
+            return self._group_id_map[record_id]
+        return self._id_map.get(record_id, record_id)
+    
+    def record_created(self, record_id: int) -> None:
+        """
+        Report the real ID of the record created by the write being applied.
+        
+        Called by model creates on the flush thread, with the ID of their own
+        insert (the connection's last insert may be a later one, e.g. a history row).
+        """
+        if self._on_flush_thread() and self._applying is not None:
+            self._applying.created_id = record_id
+    
+    def submit(self, write: PendingWrite) -> None:
+        """Queue a write."""
+        with self._condition:
+            if not self._writes:
+                self._first_queued_at = time.monotonic()
+            self._writes.append(write)
+            self._condition.notify_all()
+    
+    def group_connection(self) -> Optional[_GroupConnection]:
+        """The connection model writes must use while a group is flushed (flush thread only)."""
+        return self._group if self._on_flush_thread() else None
+    
+    def pending_count(self) -> int:
+        """Number of writes not committed yet."""
+        with self._condition:
+            return len(self._writes)
+    
+    def consistent_view(self) -> threading.RLock:
+        """
+        Lock to hold while reading committed rows and the pending writes to
+        show with them, so no write is seen twice or not at all.
+        """
+        return self._commit_lock
+    
+    def pending_writes(self, table: str) -> List[PendingWrite]:
+        """Get the queued writes to a table, oldest first."""
+        with self._condition:
+            return [write for write in self._writes if write.table == table]
+    
+    def apply_pending(self, table: str, records: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Show the queued writes to a table in records read from it.
+        
+        Args:
+            table: Table the records were read from
+            records: Record dictionaries (with string 'id' values)
+        
+        Returns:
+            The records with queued creates added, updates applied and deletes removed
+        """
+        writes = self.pending_writes(table)
+        if not writes:
+            return records
+        
+        by_id = {record['id']: record for record in records}
+        for write in writes:
+            keys = [str(self.resolve_id(record_id)) for record_id in write.record_ids]
+            if write.action == 'create':
+                by_id[keys[0]] = dict(write.record, id=keys[0])
+            elif write.action == 'update':
+                for key in keys:
+                    if key in by_id:
+                        by_id[key] = dict(by_id[key], **write.record)
+            elif write.action == 'delete':
+                for key in keys:
+                    by_id.pop(key, None)
+        return list(by_id.values())
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write all queued writes now and wait for them.
+        
+        Args:
+            timeout: Seconds to wait at most (None: until done)
+        
+        Returns:
+            True if the queue is empty (failed writes are reported through
+            on_error and dropped; writes of a failed transaction stay queued)
+        """
+        if self._on_flush_thread():
+            return not self._writes
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._flush_waiters += 1
+            self._condition.notify_all()
+            try:
+                while self._writes:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+            finally:
+                self._flush_waiters -= 1
+        return True
+    
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Flush and stop the flush thread.
+        
+        Returns:
+            True if every queued write was flushed
+        """
+        flushed = self.flush(timeout)
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join(timeout=5)
+        return flushed
+    
+    def _run(self) -> None:
+        """Flush thread: wait for a full batch or the end of the window, then write a group."""
+        while True:
+            with self._condition:
+                while not self._writes and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                while len(self._writes) < self.max_batch and not self._flush_waiters:
+                    remaining = self._first_queued_at + self.window - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                # A group goes to one database: the writes up to the first one to another
+                target = self._writes[0].target
+                batch = list(itertools.islice(
+                    itertools.takewhile(lambda write: write.target == target, self._writes), self.max_batch))
+            
+            if not self._write_group(batch):
+                time.sleep(RETRY_DELAY_SECONDS)
+    
+    def _write_group(self, batch: List[PendingWrite]) -> bool:
+        """
+        Apply a group of writes in one transaction.
+        
+        Returns:
+            False if the transaction failed (the writes stay queued for a retry)
+        """
+        failures = []
+        with self._commit_lock:
+            try:
+                with batch[0].connect() as conn:
+                    conn.execute("PRAGMA foreign_keys = ON")  # Cascades of queued deletes
+                    conn.execute("BEGIN IMMEDIATE")
+                    self._group = _GroupConnection(conn)
+                    self._group_id_map = {}
+                    try:
+                        for write in batch:
+                            self._applying = write
+                            try:
+                                success, message = write.apply()
+                            except Exception as e:
+                                success, message = False, f"Unexpected error: {e}"
+                            if not success:
+                                failures.append((write.description, message))
+                            elif write.action == 'create' and write.created_id is not None:
+                                self._group_id_map[write.record_ids[0]] = write.created_id
+                        conn.commit()
+                    except BaseException:
+                        conn.rollback()
+                        raise
+                    finally:
+                        self._group = None
+                        self._applying = None
+            except sqlite3.Error as e:
+                if not self._failing:
+                    self._report("Saving changes (will retry)", f"Database error: {e}")
+                self._failing = True
+                return False
+            
+            self._failing = False
+            with self._condition:
+                self._id_map.update(self._group_id_map)
+                for _ in batch:
+                    self._writes.popleft()
+                if self._writes:
+                    self._first_queued_at = time.monotonic()
+                self._condition.notify_all()
+        
+        for description, message in failures:
+            self._report(description, message)
+        if self.on_commit:
+            self.on_commit(batch)
+        self._prune_id_map()
+        return True
+    
+    def _prune_id_map(self) -> None:
+        """Forget the oldest resolved temporary IDs that no queued write refers to."""
+        with self._condition:
+            excess = len(self._id_map) - RECENT_ID_MAPPINGS
+            if excess <= 0:
+                return
+            referenced = {record_id for write in self._writes for record_id in write.record_ids if record_id < 0}
+            for temp_id in [temp_id for temp_id in self._id_map if temp_id not in referenced][:excess]:
+                del self._id_map[temp_id]
+    
+    def _report(self, description: str, message: str) -> None:
+        if self.on_error:
+            self.on_error(description, message)
+        else:
+            print(f"Error: {description}: {message}")